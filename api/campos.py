@@ -0,0 +1,60 @@
+"""
+Selección de campos en respuestas (sparse fieldsets)
+
+`fields=` limita la respuesta a los campos pedidos y `include=` agrega campos
+opcionales que no vienen por defecto (columnas JSONB pesadas). La selección se
+traduce a `load_only` para que PostgreSQL no lea ni envíe columnas que la
+respuesta no usa.
+"""
+from typing import List, Optional, Sequence
+
+from fastapi import HTTPException, status
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import load_only
+
+
+def _parsear(valor: Optional[str]) -> List[str]:
+    return [c.strip() for c in valor.split(",") if c.strip()] if valor else []
+
+
+def resolver_campos(
+    fields: Optional[str],
+    include: Optional[str],
+    disponibles: Sequence[str],
+    por_defecto: Sequence[str],
+    obligatorios: Sequence[str] = ("id",)
+) -> List[str]:
+    """
+    Campos a devolver, en el orden de `disponibles`.
+
+    Args:
+        fields: Lista separada por comas; si se omite se usa `por_defecto`
+        include: Campos adicionales separados por comas
+        disponibles: Todos los campos que admite la respuesta
+        por_defecto: Campos cuando no se envía `fields`
+        obligatorios: Campos que siempre se devuelven
+
+    Raises:
+        HTTPException 400 si se pide un campo inexistente
+    """
+    pedidos = _parsear(fields)
+    adicionales = _parsear(include)
+
+    desconocidos = sorted(set(pedidos + adicionales) - set(disponibles))
+    if desconocidos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos desconocidos: {', '.join(desconocidos)}. Disponibles: {', '.join(disponibles)}"
+        )
+
+    seleccion = set(obligatorios) | set(pedidos or por_defecto) | set(adicionales)
+    return [c for c in disponibles if c in seleccion]
+
+
+def opciones_carga(modelo, campos: Sequence[str]):
+    """
+    `load_only` con las columnas de `modelo` incluidas en `campos`; los
+    campos que no son columnas (nombres de joins, valores calculados) se ignoran.
+    """
+    columnas = sa_inspect(modelo).column_attrs.keys()
+    return load_only(*[getattr(modelo, c) for c in campos if c in columnas])
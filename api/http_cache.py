@@ -0,0 +1,86 @@
+"""
+GET condicional (ETag / If-None-Match) y caché de respuestas en memoria
+
+Para endpoints de lectura frecuente y cambios raros (procesos): el ETag débil
+se deriva de `updated_at` o de un hash del contenido, y cuando coincide con
+If-None-Match se responde 304 sin cargar ni serializar el cuerpo.
+
+La caché de respuestas guarda (etag, cuerpo serializado) por clave y es local
+a cada worker; se invalida en las escrituras y su TTL acota la
+desactualización entre workers (PROCESOS_CACHE_TTL_SECONDS, 0 = desactivada).
+"""
+import hashlib
+import os
+from typing import Optional
+
+from fastapi import Request, Response
+
+from api.services.cache_service import CacheTTL
+
+
+# max-age que se anuncia a los clientes; con 0 el navegador revalida siempre
+# (una revalidación cuesta una consulta liviana y un 304 sin cuerpo)
+PROCESOS_MAX_AGE = int(os.getenv("PROCESOS_MAX_AGE_SECONDS", "0"))
+
+cache_procesos = CacheTTL(
+    ttl_segundos=float(os.getenv("PROCESOS_CACHE_TTL_SECONDS", "0")),
+    max_entradas=2000
+)
+
+
+def etag_debil(*partes) -> str:
+    """ETag débil a partir de valores que identifican la versión del recurso"""
+    digest = hashlib.sha1("|".join(str(p) for p in partes).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_contenido(cuerpo: bytes) -> str:
+    """ETag débil a partir del cuerpo ya serializado"""
+    return f'W/"{hashlib.sha1(cuerpo).hexdigest()[:20]}"'
+
+
+def coincide_etag(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Comparación débil (RFC 9110 §13.1.2): se ignora el prefijo W/ de ambos lados.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    opaco = etag.removeprefix("W/")
+    return any(candidato.strip().removeprefix("W/") == opaco for candidato in if_none_match.split(","))
+
+
+def _headers_cache(etag: str, max_age: int) -> dict:
+    return {
+        "ETag": etag,
+        # private: la respuesta depende del token; Vary evita que un proxy la comparta
+        "Cache-Control": f"private, max-age={max_age}, must-revalidate",
+        "Vary": "Authorization",
+    }
+
+
+def no_modificado(request: Request, etag: str, max_age: int = PROCESOS_MAX_AGE) -> Optional[Response]:
+    """Respuesta 304 si el cliente ya tiene esta versión, o None"""
+    if coincide_etag(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=_headers_cache(etag, max_age))
+    return None
+
+
+def respuesta_cacheable(request: Request, etag: str, cuerpo: bytes, max_age: int = PROCESOS_MAX_AGE) -> Response:
+    """Respuesta JSON ya serializada con ETag, o 304 si coincide"""
+    respuesta = no_modificado(request, etag, max_age)
+    if respuesta is not None:
+        return respuesta
+    return Response(content=cuerpo, media_type="application/json", headers=_headers_cache(etag, max_age))
+
+
+def invalidar_procesos() -> None:
+    """
+    Descartar las respuestas cacheadas de procesos.
+
+    Un cambio en un proceso afecta su detalle y cualquier listado que lo
+    incluya, por lo que se limpia toda la caché.
+    """
+    cache_procesos.limpiar()
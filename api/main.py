@@ -1,8 +1,10 @@
 """
 Aplicación principal FastAPI para 4C FICEM CORE
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Header, HTTPException, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from typing import Optional
 import os
 from dotenv import load_dotenv
 
@@ -26,16 +28,44 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Queries", "Server-Timing", "ETag", "Content-Disposition", "X-Template-Origen"],
 )
 
+# Réplica de lectura (DATABASE_REPLICA_URL): quien acaba de escribir lee del primario
+from database.connection import engine_replica
+
+if engine_replica is not None:
+    from api.middleware.replica import LecturaPropiaMiddleware
+
+    app.add_middleware(LecturaPropiaMiddleware)
+
+# Compresión gzip/brotli según Accept-Encoding (queda dentro de las métricas,
+# que así registran el tamaño enviado por la red)
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+
+if COMPRESSION_ENABLED:
+    from api.middleware.compresion import CompresionMiddleware
+
+    app.add_middleware(CompresionMiddleware)
+
+# Métricas de rendimiento por ruta (latencia, tamaños, consultas y tiempo de BD)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+if METRICS_ENABLED:
+    from api.middleware.metricas import MetricasMiddleware, registro_metricas
+
+    app.add_middleware(MetricasMiddleware, excluir=["/internal/"])
+
 # Importar rutas
-from api.routes import auth, procesos, submissions, usuarios
+from api.routes import admin, auth, procesos, submissions, usuarios
 
 # Registrar rutas
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["Autenticación"])
 app.include_router(usuarios.router, prefix="/api/v1", tags=["Usuarios"])
 app.include_router(procesos.router, prefix="/api/v1", tags=["Procesos MRV"])
 app.include_router(submissions.router, prefix="/api/v1", tags=["Submissions"])
+app.include_router(admin.router, prefix="/api/v1/admin", tags=["Administración"])
 
 
 @app.get("/", tags=["Health"])
@@ -56,3 +86,18 @@ async def health():
         "database": "connected",  # TODO: verificar conexión real
         "service": "4c-ficem-core"
     }
+
+
+if METRICS_ENABLED:
+    @app.get("/internal/metrics", include_in_schema=False)
+    async def metricas(authorization: Optional[str] = Header(None)):
+        """Métricas en formato Prometheus (requiere METRICS_TOKEN; sin token no se exponen)"""
+        if not METRICS_TOKEN:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+        if authorization != f"Bearer {METRICS_TOKEN}":
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="No autorizado")
+
+        return PlainTextResponse(
+            registro_metricas.exportar(),
+            media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
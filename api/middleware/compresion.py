@@ -0,0 +1,150 @@
+"""
+Compresión de respuestas (brotli / gzip) negociada por Accept-Encoding
+"""
+import os
+import zlib
+from typing import Optional
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+COMPRESION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
+TIPOS_COMPRIMIBLES = (
+    b"application/json",
+    b"text/",
+    b"application/javascript",
+    b"application/xml",
+    b"image/svg+xml",
+)
+
+
+def elegir_codificacion(accept_encoding: str) -> Optional[str]:
+    """
+    Codificación preferida entre las soportadas ('br' si brotli está
+    instalado, luego 'gzip'), respetando los pesos q del cliente.
+    """
+    pesos = {}
+    for parte in accept_encoding.lower().split(","):
+        nombre, _, parametros = parte.strip().partition(";")
+        q = 1.0
+        if parametros.strip().startswith("q="):
+            try:
+                q = float(parametros.strip()[2:])
+            except ValueError:
+                q = 0.0
+        pesos[nombre.strip()] = q
+
+    soportadas = (["br"] if brotli is not None else []) + ["gzip"]
+    candidatas = [(pesos.get(c, pesos.get("*", 0.0)), -i, c) for i, c in enumerate(soportadas)]
+    q, _, codificacion = max(candidatas)
+    return codificacion if q > 0 else None
+
+
+class _Compresor:
+    """Compresión incremental con la misma interfaz para gzip y brotli"""
+
+    def __init__(self, codificacion: str):
+        if codificacion == "br":
+            self._objeto = brotli.Compressor(quality=4)
+            self._procesar, self._terminar = self._objeto.process, self._objeto.finish
+        else:
+            self._objeto = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31 = formato gzip
+            self._procesar, self._terminar = self._objeto.compress, self._objeto.flush
+
+    def comprimir(self, datos: bytes, final: bool) -> bytes:
+        salida = self._procesar(datos) if datos else b""
+        return salida + self._terminar() if final else salida
+
+
+class CompresionMiddleware:
+    """
+    Middleware ASGI puro que comprime respuestas compresibles.
+
+    No comprime respuestas que ya traen Content-Encoding, tipos binarios
+    (Excel, imágenes) ni cuerpos completos menores a `minimo` bytes. Las
+    respuestas en streaming se comprimen por fragmento sin bufferizarlas.
+    """
+
+    def __init__(self, app, minimo: int = COMPRESION_MIN_BYTES):
+        self.app = app
+        self.minimo = minimo
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = ""
+        for nombre, valor in scope.get("headers", []):
+            if nombre == b"accept-encoding":
+                accept_encoding = valor.decode("latin-1")
+                break
+
+        codificacion = elegir_codificacion(accept_encoding) if accept_encoding else None
+        if codificacion is None:
+            await self.app(scope, receive, send)
+            return
+
+        estado = {"inicio": None, "compresor": None, "directo": False}
+
+        async def send_comprimido(mensaje):
+            if estado["directo"]:
+                await send(mensaje)
+                return
+
+            if mensaje["type"] == "http.response.start":
+                # Se retiene hasta ver el primer fragmento del cuerpo
+                estado["inicio"] = mensaje
+                return
+
+            if mensaje["type"] != "http.response.body":
+                await send(mensaje)
+                return
+
+            cuerpo = mensaje.get("body", b"")
+            mas = mensaje.get("more_body", False)
+
+            if estado["compresor"] is None:
+                inicio = estado["inicio"]
+                if not self._comprimible(inicio, len(cuerpo), mas):
+                    estado["directo"] = True
+                    await send(inicio)
+                    await send(mensaje)
+                    return
+
+                headers = [(n, v) for n, v in inicio.get("headers", []) if n.lower() != b"content-length"]
+                headers.append((b"content-encoding", codificacion.encode()))
+                headers.append((b"vary", b"Accept-Encoding"))
+                await send({**inicio, "headers": headers})
+                estado["compresor"] = _Compresor(codificacion)
+
+            datos = estado["compresor"].comprimir(cuerpo, final=not mas)
+            if datos or not mas:
+                await send({"type": "http.response.body", "body": datos, "more_body": mas})
+
+        await self.app(scope, receive, send_comprimido)
+
+        # Respuesta sin cuerpo: enviar el inicio retenido
+        if estado["inicio"] is not None and estado["compresor"] is None and not estado["directo"]:
+            await send(estado["inicio"])
+            await send({"type": "http.response.body", "body": b""})
+
+    def _comprimible(self, inicio: dict, tamano: int, mas: bool) -> bool:
+        if inicio["status"] in (204, 304) or inicio["status"] < 200:
+            return False
+        if not mas and tamano < self.minimo:
+            return False
+
+        content_type = b""
+        for nombre, valor in inicio.get("headers", []):
+            nombre = nombre.lower()
+            if nombre == b"content-encoding":
+                return False
+            if nombre == b"content-type":
+                content_type = valor.lower()
+
+        return content_type.startswith(TIPOS_COMPRIMIBLES)
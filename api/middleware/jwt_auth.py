@@ -1,12 +1,12 @@
 """
 Middleware y dependencies para autenticación JWT
 """
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from typing import Optional
 
-from database.connection import get_db
+from database.connection import METODOS_LECTURA, get_db, registrar_escritura_usuario
 from database.models import Usuario, UserRole
 from api.services.auth_service import decode_token
 
@@ -15,12 +15,16 @@ security = HTTPBearer()
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
 ) -> Usuario:
     """
     Dependency que extrae y valida el usuario del JWT token.
     Lanza HTTP 401 si el token es inválido o el usuario no existe.
+
+    En requests que modifican datos registra la escritura del usuario, que se
+    guarda si la request confirma su transacción (ver api/middleware/replica.py).
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -52,6 +56,9 @@ async def get_current_user(
             detail="Usuario desactivado"
         )
 
+    if request.method not in METODOS_LECTURA:
+        registrar_escritura_usuario(db, user.id)
+
     return user
 
 
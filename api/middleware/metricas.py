@@ -0,0 +1,229 @@
+"""
+Middleware de métricas de rendimiento por ruta
+
+Registra por request: latencia, tamaño de request/respuesta, cantidad de
+consultas SQL y tiempo en BD (vía database.instrumentacion). Las métricas se
+exponen en formato de texto de Prometheus en /internal/metrics (solo con
+METRICS_TOKEN definido).
+"""
+import bisect
+import threading
+import time
+from typing import Dict, Sequence, Tuple
+
+from database.instrumentacion import EstadisticasRequest, estadisticas_request
+
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+SIN_RUTA = "sin_ruta"
+
+
+class Histograma:
+    """Histograma acumulativo con etiquetas, al estilo de Prometheus"""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str], buckets: Sequence[float]):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        # valores de etiquetas -> [conteos por bucket..., suma, total]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valores: Tuple[str, ...], valor: float) -> None:
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [0] * len(self.buckets) + [0.0, 0]
+            if indice < len(self.buckets):
+                serie[indice] += 1
+            serie[-2] += valor
+            serie[-1] += 1
+
+    def exportar(self) -> str:
+        lineas = [
+            f"# HELP {self.nombre} {self.ayuda}",
+            f"# TYPE {self.nombre} histogram",
+        ]
+
+        with self._lock:
+            series = [(valores, list(serie)) for valores, serie in self._series.items()]
+
+        for valores, serie in sorted(series):
+            base = ",".join(
+                f'{etiqueta}="{_escapar(valor)}"' for etiqueta, valor in zip(self.etiquetas, valores)
+            )
+            acumulado = 0
+            for limite, conteo in zip(self.buckets, serie):
+                acumulado += conteo
+                lineas.append(f'{self.nombre}_bucket{{{base},le="{_formatear(limite)}"}} {acumulado}')
+            lineas.append(f'{self.nombre}_bucket{{{base},le="+Inf"}} {serie[-1]}')
+            lineas.append(f"{self.nombre}_sum{{{base}}} {_formatear(serie[-2])}")
+            lineas.append(f"{self.nombre}_count{{{base}}} {serie[-1]}")
+
+        return "\n".join(lineas)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _formatear(numero: float) -> str:
+    return repr(float(numero)) if not float(numero).is_integer() else str(int(numero))
+
+
+class RegistroMetricas:
+    """Conjunto de histogramas de la API (uno por worker)"""
+
+    def __init__(self):
+        etiquetas = ("method", "route", "status")
+        self.duracion = Histograma(
+            "ficem_http_request_duration_seconds",
+            "Latencia de requests HTTP por ruta",
+            etiquetas, BUCKETS_LATENCIA
+        )
+        self.tamano_request = Histograma(
+            "ficem_http_request_size_bytes",
+            "Tamaño del cuerpo de las requests",
+            etiquetas, BUCKETS_BYTES
+        )
+        self.tamano_respuesta = Histograma(
+            "ficem_http_response_size_bytes",
+            "Tamaño del cuerpo de las respuestas",
+            etiquetas, BUCKETS_BYTES
+        )
+        self.consultas_db = Histograma(
+            "ficem_db_queries_per_request",
+            "Consultas SQL ejecutadas por request",
+            etiquetas, BUCKETS_CONSULTAS
+        )
+        self.tiempo_db = Histograma(
+            "ficem_db_time_seconds_per_request",
+            "Tiempo acumulado en BD por request",
+            etiquetas, BUCKETS_LATENCIA
+        )
+
+    def _histogramas(self):
+        return (self.duracion, self.tamano_request, self.tamano_respuesta, self.consultas_db, self.tiempo_db)
+
+    def registrar(
+        self,
+        metodo: str,
+        ruta: str,
+        status: int,
+        duracion: float,
+        bytes_request: int,
+        bytes_respuesta: int,
+        stats: EstadisticasRequest
+    ) -> None:
+        etiquetas = (metodo, ruta, str(status))
+        self.duracion.observar(etiquetas, duracion)
+        self.tamano_request.observar(etiquetas, bytes_request)
+        self.tamano_respuesta.observar(etiquetas, bytes_respuesta)
+        self.consultas_db.observar(etiquetas, stats.consultas)
+        self.tiempo_db.observar(etiquetas, stats.tiempo_db)
+
+    def exportar(self) -> str:
+        """Métricas en formato de texto de Prometheus (0.0.4)"""
+        return "\n".join(h.exportar() for h in self._histogramas()) + "\n"
+
+    def limpiar(self) -> None:
+        for histograma in self._histogramas():
+            histograma.limpiar()
+
+
+registro_metricas = RegistroMetricas()
+
+
+def plantilla_ruta(scope) -> str:
+    """
+    Plantilla de la ruta resuelta (ej: /api/v1/submissions/{submission_id}).
+
+    Se usa la plantilla y no la URL real para acotar la cardinalidad de las
+    etiquetas. Según la versión de FastAPI, `route.path` puede no incluir el
+    prefijo de include_router; en ese caso se reconstruye desde la URL.
+    """
+    ruta = scope.get("route")
+    plantilla = getattr(ruta, "path_format", None) or getattr(ruta, "path", None)
+    if not plantilla:
+        return SIN_RUTA
+
+    path = scope.get("path", "")
+    try:
+        parametros = {k: str(v) for k, v in (scope.get("path_params") or {}).items()}
+        sufijo = plantilla.format(**parametros)
+    except (KeyError, IndexError, ValueError):
+        return plantilla
+
+    if path != sufijo and path.endswith(sufijo):
+        return path[:-len(sufijo)] + plantilla
+    return plantilla
+
+
+class MetricasMiddleware:
+    """
+    Middleware ASGI puro (no BaseHTTPMiddleware) para no bufferizar respuestas
+    ni cambiar el contexto en que se ejecutan los endpoints.
+
+    Agrega a cada respuesta los headers `X-DB-Queries` y `Server-Timing`.
+    """
+
+    def __init__(self, app, registro: RegistroMetricas = registro_metricas, excluir: Sequence[str] = ()):
+        self.app = app
+        self.registro = registro
+        self.excluir = tuple(excluir)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path", "").startswith(self.excluir):
+            await self.app(scope, receive, send)
+            return
+
+        stats = EstadisticasRequest(metodo=scope["method"], resolver_ruta=lambda: plantilla_ruta(scope))
+        token = estadisticas_request.set(stats)
+        inicio = time.perf_counter()
+        medidas = {"bytes_request": 0, "bytes_respuesta": 0, "status": 500}
+
+        async def receive_medido():
+            mensaje = await receive()
+            if mensaje["type"] == "http.request":
+                medidas["bytes_request"] += len(mensaje.get("body", b""))
+            return mensaje
+
+        async def send_medido(mensaje):
+            if mensaje["type"] == "http.response.start":
+                medidas["status"] = mensaje["status"]
+                # La ruta ya está resuelta cuando el endpoint empieza a responder
+                stats.ruta = plantilla_ruta(scope)
+                transcurrido_ms = (time.perf_counter() - inicio) * 1000
+                headers = list(mensaje.get("headers", []))
+                headers.append((b"x-db-queries", str(stats.consultas).encode()))
+                headers.append((
+                    b"server-timing",
+                    f"db;dur={stats.tiempo_db * 1000:.1f}, app;dur={transcurrido_ms:.1f}".encode()
+                ))
+                mensaje = {**mensaje, "headers": headers}
+            elif mensaje["type"] == "http.response.body":
+                medidas["bytes_respuesta"] += len(mensaje.get("body", b""))
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive_medido, send_medido)
+        finally:
+            estadisticas_request.reset(token)
+            self.registro.registrar(
+                metodo=stats.metodo,
+                ruta=stats.ruta,
+                status=medidas["status"],
+                duracion=time.perf_counter() - inicio,
+                bytes_request=medidas["bytes_request"],
+                bytes_respuesta=medidas["bytes_respuesta"],
+                stats=stats
+            )
@@ -0,0 +1,72 @@
+"""
+Lectura de los propios cambios con réplica de lectura
+
+Un usuario que modificó datos en los últimos REPLICA_STICKY_SECONDS lee del
+primario. La marca principal es usuarios.ultima_escritura, que se guarda al
+confirmar cada request que modifica datos (get_current_user) y se lee con el
+propio usuario autenticado, del primario: funciona con cualquier cliente
+(Bearer desde scripts, frontends en otro dominio) y con varios workers.
+
+Además, después de una request que modifica datos (POST/PUT/PATCH/DELETE
+con status < 400) se envía la cookie COOKIE_LECTURA_PRIMARIA: los navegadores
+que la devuelven no dependen de que el commit de ultima_escritura ya haya
+terminado.
+"""
+from datetime import datetime, timedelta
+
+from fastapi import Depends, Request
+from sqlalchemy.orm import Session
+
+from database.connection import (
+    COOKIE_LECTURA_PRIMARIA, METODOS_LECTURA, REPLICA_STICKY_SECONDS, get_db, marcar_lectura_replica
+)
+from database.models import Usuario
+from api.middleware.jwt_auth import get_current_user
+
+
+def escritura_reciente(usuario: Usuario) -> bool:
+    """El usuario modificó datos en los últimos REPLICA_STICKY_SECONDS"""
+    return (
+        usuario.ultima_escritura is not None
+        and usuario.ultima_escritura > datetime.utcnow() - timedelta(seconds=REPLICA_STICKY_SECONDS)
+    )
+
+
+def get_db_lectura(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+) -> Session:
+    """
+    Dependency para endpoints de solo lectura (listados, reportes, exportaciones).
+
+    Es la misma sesión de `get_db`, marcada para leer de la réplica si está
+    configurada y el usuario no escribió en los últimos
+    REPLICA_STICKY_SECONDS. La autenticación se resuelve antes de marcarla,
+    por lo que el usuario (y su ultima_escritura) se lee del primario.
+    """
+    if not request.cookies.get(COOKIE_LECTURA_PRIMARIA) and not escritura_reciente(current_user):
+        marcar_lectura_replica(db)
+    return db
+
+
+class LecturaPropiaMiddleware:
+    """Middleware ASGI puro que marca al cliente después de cada escritura"""
+
+    def __init__(self, app, segundos: int = REPLICA_STICKY_SECONDS):
+        self.app = app
+        self.cookie = (
+            f"{COOKIE_LECTURA_PRIMARIA}=1; Max-Age={segundos}; Path=/; HttpOnly; SameSite=Lax"
+        ).encode()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in METODOS_LECTURA:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_marcado(mensaje):
+            if mensaje["type"] == "http.response.start" and mensaje["status"] < 400:
+                mensaje = {**mensaje, "headers": [*mensaje.get("headers", []), (b"set-cookie", self.cookie)]}
+            await send(mensaje)
+
+        await self.app(scope, receive, send_marcado)
@@ -1,7 +1,15 @@
 """
 Sistema centralizado de permisos por rol
 """
-from database.models import UserRole
+import enum
+import os
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import true, false
+
+from database.models import UserRole, Submission, Empresa
+from api.services.cache_service import CacheTTL
 
 # Matriz de permisos: acción -> roles permitidos
 # "*" significa todos los usuarios autenticados
@@ -46,9 +54,51 @@ PERMISOS = {
     "dashboard.ver": ["*"],
     "dashboard.estadisticas_globales": ["ROOT", "ADMIN_PROCESO", "EJECUTIVO_FICEM"],
     "dashboard.estadisticas_pais": ["COORDINADOR_PAIS"],
+
+    # === Sistema ===
+    "sistema.diagnostico": ["ROOT"],
 }
 
 
+# Matriz compilada al importar el módulo: cada acción recibe un bit y cada rol
+# la máscara de acciones permitidas. Verificar un permiso (o varios a la vez)
+# es un AND de enteros, sin recorrer listas de roles en cada request.
+_BIT_ACCION = {accion: 1 << i for i, accion in enumerate(PERMISOS)}
+_MASCARA_TODAS = (1 << len(PERMISOS)) - 1
+
+
+def _compilar_mascaras() -> dict:
+    """Construye la máscara de permisos de cada rol a partir de PERMISOS"""
+    mascaras = {rol: 0 for rol in UserRole}
+
+    for accion, roles_permitidos in PERMISOS.items():
+        bit = _BIT_ACCION[accion]
+        for rol in UserRole:
+            if "*" in roles_permitidos or rol.value in roles_permitidos:
+                mascaras[rol] |= bit
+
+    # ROOT siempre tiene todos los permisos
+    mascaras[UserRole.ROOT] = _MASCARA_TODAS
+
+    return mascaras
+
+
+# UserRole hereda de str: la máscara se obtiene tanto con el enum como con su valor
+_MASCARA_ROL = _compilar_mascaras()
+
+
+@lru_cache(maxsize=256)
+def _mascara_acciones(acciones: tuple) -> Optional[int]:
+    """Máscara combinada de varias acciones (None si alguna no existe)"""
+    mascara = 0
+    for accion in acciones:
+        bit = _BIT_ACCION.get(accion)
+        if bit is None:
+            return None
+        mascara |= bit
+    return mascara
+
+
 def tiene_permiso(usuario, accion: str) -> bool:
     """
     Verifica si un usuario tiene permiso para realizar una acción.
@@ -60,19 +110,104 @@ def tiene_permiso(usuario, accion: str) -> bool:
     Returns:
         bool: True si tiene permiso
     """
-    # ROOT siempre tiene todos los permisos
-    if usuario.rol.value == "ROOT":
-        return True
+    bit = _BIT_ACCION.get(accion)
+
+    # Acción no registrada: solo ROOT
+    if bit is None:
+        return usuario.rol == UserRole.ROOT
 
-    roles_permitidos = PERMISOS.get(accion, [])
+    return bool(_MASCARA_ROL.get(usuario.rol, 0) & bit)
 
-    if not roles_permitidos:
-        return False
 
-    if "*" in roles_permitidos:
+def tiene_permisos(usuario, *acciones: str) -> bool:
+    """
+    Verifica que un usuario tenga TODAS las acciones indicadas.
+
+    Uso: tiene_permisos(usuario, "submissions.ver_todos", "submissions.aprobar_ficem")
+    """
+    requerida = _mascara_acciones(acciones)
+
+    if requerida is None:
+        return usuario.rol == UserRole.ROOT
+
+    return _MASCARA_ROL.get(usuario.rol, 0) & requerida == requerida
+
+
+def tiene_algun_permiso(usuario, *acciones: str) -> bool:
+    """
+    Verifica que un usuario tenga AL MENOS UNA de las acciones indicadas.
+    Las acciones no registradas se ignoran (salvo para ROOT).
+    """
+    if usuario.rol == UserRole.ROOT:
         return True
 
-    return usuario.rol.value in roles_permitidos
+    mascara = 0
+    for accion in acciones:
+        mascara |= _BIT_ACCION.get(accion, 0)
+
+    return bool(_MASCARA_ROL.get(usuario.rol, 0) & mascara)
+
+
+class AlcanceVisibilidad(str, enum.Enum):
+    """Alcance de los submissions que un usuario puede ver"""
+    GLOBAL = "GLOBAL"      # ver_todos: ROOT, ADMIN_PROCESO, EJECUTIVO_FICEM
+    PAIS = "PAIS"          # ver_pais: submissions de empresas de su país
+    EMPRESA = "EMPRESA"    # ver_empresa: submissions de su empresa
+    NINGUNO = "NINGUNO"
+
+
+def _compilar_alcances() -> dict:
+    """Resuelve el alcance de cada rol con la misma precedencia que los permisos ver_*"""
+    alcances = {}
+
+    for rol, mascara in _MASCARA_ROL.items():
+        if mascara & _BIT_ACCION["submissions.ver_todos"]:
+            alcances[rol] = AlcanceVisibilidad.GLOBAL
+        elif mascara & _BIT_ACCION["submissions.ver_pais"]:
+            alcances[rol] = AlcanceVisibilidad.PAIS
+        elif mascara & _BIT_ACCION["submissions.ver_empresa"]:
+            alcances[rol] = AlcanceVisibilidad.EMPRESA
+        else:
+            alcances[rol] = AlcanceVisibilidad.NINGUNO
+
+    return alcances
+
+
+_ALCANCE_ROL = _compilar_alcances()
+
+
+def alcance_visibilidad(usuario) -> AlcanceVisibilidad:
+    """
+    Alcance de visibilidad de submissions del usuario.
+
+    Resolverlo una vez por request reemplaza la cadena
+    ver_todos → ver_pais → ver_empresa.
+    """
+    return _ALCANCE_ROL.get(usuario.rol, AlcanceVisibilidad.NINGUNO)
+
+
+def predicado_visibilidad(usuario, alcance: Optional[AlcanceVisibilidad] = None):
+    """
+    Expresión SQL que restringe submissions al alcance del usuario.
+
+    Se aplica dentro de la misma consulta que obtiene los datos, ya sea como
+    filtro (listados) o como columna booleana (detalle, para distinguir 404 de 403).
+    La consulta debe incluir el join Submission → Empresa para el alcance PAIS.
+
+    Args:
+        usuario: Objeto Usuario
+        alcance: Alcance ya resuelto en la request (se calcula si no se pasa)
+    """
+    alcance = alcance or alcance_visibilidad(usuario)
+
+    if alcance == AlcanceVisibilidad.GLOBAL:
+        return true()
+    if alcance == AlcanceVisibilidad.PAIS:
+        return Empresa.pais == usuario.pais
+    if alcance == AlcanceVisibilidad.EMPRESA:
+        return Submission.empresa_id == usuario.empresa_id
+
+    return false()
 
 
 def requiere_permiso(accion: str):
@@ -114,13 +249,50 @@ TAREA_POR_ESTADO = {
 }
 
 
+# Caché de tareas por usuario: alimenta el badge del header en cada página.
+# Se invalida en cada transición de estado; el TTL acota la desactualización
+# entre workers distintos.
+_cache_tareas = CacheTTL(
+    ttl_segundos=float(os.getenv("TAREAS_CACHE_TTL_SECONDS", "30")),
+    max_entradas=5000
+)
+
+
+def invalidar_tareas_pendientes():
+    """
+    Invalida la caché de tareas pendientes.
+
+    Una transición afecta las bandejas de varios usuarios (informante,
+    supervisor, admins, coordinador), por lo que se descarta toda la caché.
+    """
+    _cache_tareas.limpiar()
+
+
 def obtener_tareas_pendientes(usuario, db) -> list:
     """
     Obtiene las tareas pendientes para un usuario según su rol.
 
+    Usa una caché por usuario con TTL corto (TAREAS_CACHE_TTL_SECONDS).
+
     Returns:
         Lista de diccionarios con tipo de tarea y cantidad
     """
+    clave = (usuario.id, usuario.rol, usuario.empresa_id, usuario.pais)
+    tareas = _cache_tareas.get(clave)
+
+    if tareas is None:
+        tareas = _calcular_tareas_pendientes(usuario, db)
+        _cache_tareas.set(clave, tareas)
+
+    return [dict(t) for t in tareas]
+
+
+def _calcular_tareas_pendientes(usuario, db) -> list:
+    """
+    Calcula las tareas pendientes con una sola consulta agregada por rol
+    (COUNT(*) FILTER (WHERE ...)), apoyada en el índice (empresa_id, estado_actual).
+    """
+    from sqlalchemy import func
     from database.models import Submission, EstadoSubmission
 
     tareas = []
@@ -128,18 +300,15 @@ def obtener_tareas_pendientes(usuario, db) -> list:
 
     if rol == "INFORMANTE_EMPRESA":
         # Submissions en borrador o rechazados de su empresa
-        borrador = db.query(Submission).filter(
-            Submission.empresa_id == usuario.empresa_id,
-            Submission.estado_actual == EstadoSubmission.BORRADOR
-        ).count()
+        rechazado = [EstadoSubmission.RECHAZADO_EMPRESA, EstadoSubmission.RECHAZADO_FICEM]
 
-        rechazados = db.query(Submission).filter(
+        borrador, rechazados = db.query(
+            func.count().filter(Submission.estado_actual == EstadoSubmission.BORRADOR),
+            func.count().filter(Submission.estado_actual.in_(rechazado))
+        ).filter(
             Submission.empresa_id == usuario.empresa_id,
-            Submission.estado_actual.in_([
-                EstadoSubmission.RECHAZADO_EMPRESA,
-                EstadoSubmission.RECHAZADO_FICEM
-            ])
-        ).count()
+            Submission.estado_actual.in_([EstadoSubmission.BORRADOR] + rechazado)
+        ).one()
 
         if borrador:
             tareas.append({"tipo": "completar_envio", "cantidad": borrador, "accion": "Completar y enviar"})
@@ -148,23 +317,25 @@ def obtener_tareas_pendientes(usuario, db) -> list:
 
     elif rol == "SUPERVISOR_EMPRESA":
         # Submissions esperando aprobación de su empresa
-        pendientes = db.query(Submission).filter(
+        pendientes = db.query(func.count()).select_from(Submission).filter(
             Submission.empresa_id == usuario.empresa_id,
             Submission.estado_actual == EstadoSubmission.ENVIADO
-        ).count()
+        ).scalar()
 
         if pendientes:
             tareas.append({"tipo": "aprobar_envio", "cantidad": pendientes, "accion": "Revisar y aprobar"})
 
     elif rol in ["ROOT", "ADMIN_PROCESO"]:
         # Submissions esperando aprobación FICEM
-        pendientes = db.query(Submission).filter(
-            Submission.estado_actual == EstadoSubmission.APROBADO_EMPRESA
-        ).count()
-
-        en_revision = db.query(Submission).filter(
-            Submission.estado_actual == EstadoSubmission.EN_REVISION_FICEM
-        ).count()
+        pendientes, en_revision = db.query(
+            func.count().filter(Submission.estado_actual == EstadoSubmission.APROBADO_EMPRESA),
+            func.count().filter(Submission.estado_actual == EstadoSubmission.EN_REVISION_FICEM)
+        ).filter(
+            Submission.estado_actual.in_([
+                EstadoSubmission.APROBADO_EMPRESA,
+                EstadoSubmission.EN_REVISION_FICEM
+            ])
+        ).one()
 
         if pendientes:
             tareas.append({"tipo": "revisar_submission", "cantidad": pendientes, "accion": "Iniciar revisión"})
@@ -175,16 +346,16 @@ def obtener_tareas_pendientes(usuario, db) -> list:
         # Submissions de su país en cualquier estado activo
         from database.models import Empresa
 
-        activos = db.query(Submission).join(Empresa).filter(
+        activos = db.query(func.count()).select_from(Submission).join(Empresa).filter(
             Empresa.pais == usuario.pais,
             Submission.estado_actual.notin_([
                 EstadoSubmission.APROBADO_FICEM,
                 EstadoSubmission.PUBLICADO,
                 EstadoSubmission.ARCHIVADO
             ])
-        ).count()
+        ).scalar()
 
         if activos:
             tareas.append({"tipo": "monitorear_pais", "cantidad": activos, "accion": "Monitorear progreso"})
 
-    return tareas
\ No newline at end of file
+    return tareas
@@ -0,0 +1,85 @@
+"""
+Respuestas JSON para payloads grandes
+
+- `RespuestaJSON`: serializa con orjson si está instalado (stdlib json si no),
+  sin pasar por jsonable_encoder.
+- `respuesta_json_con_crudo`: envía un campo cuyo valor ya es JSON (p.ej.
+  `columna_jsonb::text` de PostgreSQL) en fragmentos, sin parsearlo ni
+  construir el documento completo en memoria.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Iterator, Optional
+from uuid import UUID
+
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+TAMANO_FRAGMENTO = 64 * 1024
+
+
+def _por_defecto(valor: Any) -> Any:
+    """Tipos que el serializador no conoce"""
+    if isinstance(valor, BaseModel):
+        return valor.model_dump(mode="json")
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    if isinstance(valor, (UUID, Enum)):
+        return str(valor.value if isinstance(valor, Enum) else valor)
+    if isinstance(valor, (set, frozenset, tuple)):
+        return list(valor)
+    if hasattr(valor, "tolist"):  # numpy
+        return valor.tolist()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+
+def serializar_json(contenido: Any) -> bytes:
+    """JSON compacto en UTF-8"""
+    if isinstance(contenido, BaseModel):
+        return contenido.model_dump_json().encode()
+    if orjson is not None:
+        return orjson.dumps(contenido, default=_por_defecto, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(contenido, ensure_ascii=False, separators=(",", ":"), default=_por_defecto).encode()
+
+
+class RespuestaJSON(JSONResponse):
+    """JSONResponse con serialización rápida; acepta dicts, listas o modelos Pydantic"""
+
+    def render(self, content: Any) -> bytes:
+        return serializar_json(content)
+
+
+def _fragmentos(campos: dict, clave: str, json_crudo: str) -> Iterator[bytes]:
+    cabecera = serializar_json(campos)[:-1]  # sin la llave de cierre
+    separador = b"," if campos else b""
+    yield cabecera + separador + json.dumps(clave).encode() + b":"
+
+    for inicio in range(0, len(json_crudo), TAMANO_FRAGMENTO):
+        yield json_crudo[inicio:inicio + TAMANO_FRAGMENTO].encode()
+
+    yield b"}"
+
+
+def respuesta_json_con_crudo(campos: dict, clave: str, json_crudo: Optional[str]) -> StreamingResponse:
+    """
+    Respuesta `{**campos, clave: <json_crudo>}` enviada en fragmentos.
+
+    Args:
+        campos: Campos pequeños del documento (se serializan normalmente)
+        clave: Nombre del campo cuyo valor es `json_crudo`
+        json_crudo: Texto JSON válido (None se envía como null)
+    """
+    return StreamingResponse(
+        _fragmentos(campos, clave, json_crudo if json_crudo is not None else "null"),
+        media_type="application/json"
+    )
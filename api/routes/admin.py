@@ -0,0 +1,82 @@
+"""
+Endpoints de diagnóstico del sistema (solo ROOT)
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+
+from database.models import Usuario
+from database.consultas_lentas import registro_consultas_lentas
+from services.perfilador import PerfiladorMuestreo, PerfiladorOcupado
+from api.middleware.jwt_auth import get_current_user
+from api.permissions import tiene_permiso
+
+router = APIRouter()
+
+
+def usuario_diagnostico(current_user: Usuario = Depends(get_current_user)) -> Usuario:
+    """Dependency que exige permiso de diagnóstico del sistema"""
+    if not tiene_permiso(current_user, "sistema.diagnostico"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tiene permiso para: sistema.diagnostico"
+        )
+    return current_user
+
+
+@router.get("/consultas-lentas", summary="Consultas lentas recientes")
+async def listar_consultas_lentas(
+    limit: int = Query(50, ge=1, le=1000),
+    agrupar: bool = Query(False, description="Agrupar por SQL normalizado"),
+    current_user: Usuario = Depends(usuario_diagnostico)
+):
+    """
+    Consultas que superaron SLOW_QUERY_MS en este worker.
+
+    Cada worker de uvicorn tiene su propio buffer: en despliegues con varios
+    workers la respuesta refleja solo el que atendió la request.
+    """
+    return {
+        "umbral_ms": registro_consultas_lentas.umbral_ms,
+        "muestreo_explain": registro_consultas_lentas.muestreo_explain,
+        "items": registro_consultas_lentas.resumen()[:limit] if agrupar
+        else registro_consultas_lentas.listar(limit)
+    }
+
+
+@router.delete("/consultas-lentas", status_code=status.HTTP_204_NO_CONTENT, summary="Vaciar consultas lentas")
+async def limpiar_consultas_lentas(current_user: Usuario = Depends(usuario_diagnostico)):
+    """Vaciar el buffer de consultas lentas de este worker"""
+    registro_consultas_lentas.limpiar()
+
+
+@router.post("/perfilador", response_class=PlainTextResponse, summary="Perfilar worker")
+async def perfilar_worker(
+    segundos: float = Query(10, gt=0, le=120, description="Duración del muestreo"),
+    intervalo_ms: float = Query(5, ge=1, le=1000, description="Intervalo entre muestras"),
+    incluir_inactivos: bool = Query(False, description="Incluir hilos esperando trabajo (pools, event loop, colas)"),
+    current_user: Usuario = Depends(usuario_diagnostico)
+):
+    """
+    Perfila por muestreo el worker que atiende la request durante N segundos.
+
+    Devuelve las pilas en formato collapsed stacks, para visualizar con
+    speedscope o `flamegraph.pl perfil.txt > perfil.svg`. El muestreo corre en
+    un hilo del threadpool, por lo que el worker sigue atendiendo requests
+    (incluido el ingest o recálculo que se quiere observar). La lectura de
+    Excel en el pool de procesos no se muestrea (ver services/perfilador.py).
+    """
+    perfilador = PerfiladorMuestreo(intervalo_ms / 1000, incluir_inactivos)
+
+    try:
+        await run_in_threadpool(perfilador.ejecutar, segundos)
+    except PerfiladorOcupado as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    return PlainTextResponse(
+        perfilador.colapsado(),
+        headers={
+            "X-Profile-Samples": str(perfilador.total_muestras),
+            "X-Profile-Duration": f"{perfilador.duracion:.3f}"
+        }
+    )
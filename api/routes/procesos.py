@@ -1,7 +1,9 @@
 """
 Endpoints para gestión de Procesos MRV
 """
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from database.connection import get_db
@@ -15,28 +17,45 @@ from api.schemas.procesos import (
     ProcesoListItem
 )
 from api.middleware.jwt_auth import get_current_user
+from api.middleware.replica import get_db_lectura
 from api.permissions import tiene_permiso
+from api.http_cache import (
+    cache_procesos, etag_debil, no_modificado, respuesta_cacheable, invalidar_procesos
+)
+from api.services.esquemas_service import cambiar_esquema_proceso
+from api.services.template_service import obtener_base, plantilla_empresa
+from excel.generator import completar_plantilla, nombre_plantilla
+
+MEDIA_TYPE_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
 
 router = APIRouter()
 
 
 @router.get("/procesos", response_model=ProcesoList, summary="Listar procesos")
 async def listar_procesos(
+    request: Request,
     pais: Optional[str] = Query(None, description="Filtrar por código ISO país (ej: PE, CO)"),
     estado: Optional[EstadoProceso] = Query(None, description="Filtrar por estado"),
     tipo: Optional[TipoProceso] = Query(None, description="Filtrar por tipo de proceso"),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_lectura),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
     Listar procesos MRV disponibles
 
+    Soporta GET condicional: responde 304 si `If-None-Match` coincide con el ETag.
+
     **Uso típico**:
     - Frontend país lista procesos activos: `?pais=PE&estado=activo`
     - Admin FICEM lista todos: sin filtros
     """
+    clave = ("listar", pais and pais.upper(), estado, tipo, limit, offset)
+    cacheado = cache_procesos.get(clave)
+    if cacheado is not None:
+        return respuesta_cacheable(request, *cacheado)
+
     query = db.query(ProcesoMRV)
 
     # Aplicar filtros
@@ -49,36 +68,65 @@ async def listar_procesos(
     if tipo:
         query = query.filter(ProcesoMRV.tipo == tipo)
 
-    # Total
-    total = query.count()
+    # Total y última modificación en una consulta: definen la versión del listado
+    total, ultima_modificacion = query.with_entities(
+        func.count(ProcesoMRV.id), func.max(ProcesoMRV.updated_at)
+    ).one()
+
+    etag = etag_debil(*clave, total, ultima_modificacion)
+    respuesta = no_modificado(request, etag)
+    if respuesta is not None:
+        return respuesta
 
     # Paginación
     procesos = query.order_by(ProcesoMRV.created_at.desc()).offset(offset).limit(limit).all()
 
-    return ProcesoList(
+    cuerpo = ProcesoList(
         total=total,
         items=[ProcesoListItem.model_validate(p) for p in procesos]
-    )
+    ).model_dump_json().encode()
+
+    cache_procesos.set(clave, (etag, cuerpo))
+    return respuesta_cacheable(request, etag, cuerpo)
 
 
 @router.get("/procesos/{proceso_id}", response_model=ProcesoResponse, summary="Obtener proceso")
 async def obtener_proceso(
     proceso_id: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_db_lectura),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
     Obtener detalle completo de un proceso (incluye config)
+
+    El ETag se deriva de `updated_at`: si coincide con `If-None-Match` se
+    responde 304 sin cargar el config.
     """
-    proceso = db.query(ProcesoMRV).filter(ProcesoMRV.id == proceso_id).first()
+    clave = ("proceso", proceso_id)
+    cacheado = cache_procesos.get(clave)
+    if cacheado is not None:
+        return respuesta_cacheable(request, *cacheado)
 
-    if not proceso:
+    updated_at = db.query(ProcesoMRV.updated_at).filter(ProcesoMRV.id == proceso_id).scalar()
+
+    if updated_at is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Proceso '{proceso_id}' no encontrado"
         )
 
-    return ProcesoResponse.model_validate(proceso)
+    etag = etag_debil(*clave, updated_at.isoformat())
+    respuesta = no_modificado(request, etag)
+    if respuesta is not None:
+        return respuesta
+
+    proceso = db.query(ProcesoMRV).filter(ProcesoMRV.id == proceso_id).first()
+
+    cuerpo = ProcesoResponse.model_validate(proceso).model_dump_json().encode()
+
+    cache_procesos.set(clave, (etag, cuerpo))
+    return respuesta_cacheable(request, etag, cuerpo)
 
 
 @router.post("/procesos", response_model=ProcesoResponse, status_code=status.HTTP_201_CREATED, summary="Crear proceso")
@@ -123,6 +171,7 @@ async def crear_proceso(
     db.add(nuevo_proceso)
     db.commit()
     db.refresh(nuevo_proceso)
+    invalidar_procesos()
 
     return ProcesoResponse.model_validate(nuevo_proceso)
 
@@ -161,10 +210,17 @@ async def actualizar_proceso(
         proceso.descripcion = proceso_data.descripcion
 
     if proceso_data.config:
+        anterior = (proceso.config or {}).get("esquema_bd")
         proceso.config = proceso_data.config.model_dump()
+        if proceso_data.config.esquema_bd != anterior:
+            # Las filas ya extraídas acompañan al proceso al esquema nuevo
+            await run_in_threadpool(
+                cambiar_esquema_proceso, db, proceso_id, anterior, proceso_data.config.esquema_bd
+            )
 
     db.commit()
     db.refresh(proceso)
+    invalidar_procesos()
 
     return ProcesoResponse.model_validate(proceso)
 
@@ -199,6 +255,7 @@ async def cambiar_estado_proceso(
 
     db.commit()
     db.refresh(proceso)
+    invalidar_procesos()
 
     return ProcesoResponse.model_validate(proceso)
 
@@ -237,21 +294,29 @@ async def eliminar_proceso(
 
     db.delete(proceso)
     db.commit()
+    invalidar_procesos()
 
     return None
 
 
 @router.get("/procesos/{proceso_id}/template", summary="Descargar template Excel")
 async def descargar_template(
+    request: Request,
     proceso_id: str,
     empresa_id: Optional[int] = Query(None, description="Pre-poblar con datos de esta empresa"),
-    db: Session = Depends(get_db),
+    planta_id: Optional[int] = Query(None, description="Con empresa_id: solo las filas de esta planta"),
+    db: Session = Depends(get_db_lectura),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
     Descargar plantilla Excel para un proceso
 
-    **TODO**: Implementar generación de Excel dinámico
+    Las hojas salen de `config.hojas_requeridas` y el nombre del archivo de
+    `config.template_version`. Con `empresa_id` se pre-pobla con las filas del
+    último submission de la empresa que tenga datos; si no tiene, se entrega la
+    plantilla vacía (header `X-Template-Origen` indica el submission usado).
+
+    La plantilla vacía soporta GET condicional (`If-None-Match`).
     """
     proceso = db.query(ProcesoMRV).filter(ProcesoMRV.id == proceso_id).first()
 
@@ -261,9 +326,25 @@ async def descargar_template(
             detail=f"Proceso '{proceso_id}' no encontrado"
         )
 
-    # TODO: Generar Excel basado en proceso.config.template_version
-    # Por ahora retornar error
-    raise HTTPException(
-        status_code=status.HTTP_501_NOT_IMPLEMENTED,
-        detail="Generación de templates aún no implementada. Ver /api/plantillas/{tipo}"
-    )
\ No newline at end of file
+    nombre = nombre_plantilla(proceso.id, proceso.config)
+    headers = {}
+    previa, filas = None, {}
+
+    if empresa_id is not None:
+        previa, filas = plantilla_empresa(db, proceso, empresa_id, current_user, planta_id)
+
+    if previa is None:
+        etag = etag_debil("template", proceso.id, proceso.updated_at)
+        respuesta = no_modificado(request, etag)
+        if respuesta is not None:
+            return respuesta
+        headers["ETag"] = etag
+    else:
+        nombre = f"{nombre.removesuffix('.xlsx')}_empresa_{empresa_id}.xlsx"
+        headers["X-Template-Origen"] = str(previa.id)
+
+    base = await run_in_threadpool(obtener_base, proceso)
+    contenido = await run_in_threadpool(completar_plantilla, base, filas) if filas else base.contenido
+
+    headers["Content-Disposition"] = f'attachment; filename="{nombre}"'
+    return Response(content=contenido, media_type=MEDIA_TYPE_XLSX, headers=headers)
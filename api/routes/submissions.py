@@ -2,7 +2,10 @@
 Endpoints para gestión de Submissions (Envíos)
 """
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, cast, Text
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import List, Optional
 from datetime import datetime
 from database.connection import get_db
@@ -18,6 +21,9 @@ from database.models import (
 from api.schemas.procesos import (
     SubmissionCreate,
     SubmissionResponse,
+    SubmissionDetalleResponse,
+    DatosHojasResponse,
+    DatosHojaPagina,
     SubmissionList,
     SubmissionListItem,
     SubmissionValidateResponse,
@@ -26,14 +32,65 @@ from api.schemas.procesos import (
     SubmissionReviewResponse,
     ComentarioCreate,
     ComentarioResponse,
-    ValidacionResult
+    ValidacionResult,
+    DuracionEstadoItem
 )
 from api.middleware.jwt_auth import get_current_user
-from api.permissions import tiene_permiso
+from api.middleware.replica import get_db_lectura
+from api.permissions import tiene_permiso, alcance_visibilidad, predicado_visibilidad
+from api.respuestas import RespuestaJSON, respuesta_json_con_crudo
+from api.campos import resolver_campos, opciones_carga
+from api.services.datos_service import (
+    contar_filas_hojas,
+    leer_pagina_hoja,
+    guardar_filas_extraidas,
+    eliminar_filas_planta
+)
+from api.services.archivos_service import (
+    guardar_archivo,
+    url_archivo,
+    ruta_archivo,
+    eliminar_archivo as eliminar_archivo_guardado
+)
+from api.services.validacion_service import registrar_lectura, validar_archivos
+from api.services.historico_service import registrar_historico, validar_historico
+from api.services.calculos_service import ejecutar_calculos, huella_actual
+from api.services.esquemas_service import usar_esquema_proceso
+from excel.procesamiento import procesar_archivos
+from excel.schemas import obtener_hoja
+from api.services.workflow_service import (
+    registrar_transicion,
+    confirmar_cambios,
+    verificar_version,
+    subconsulta_entrada_estado,
+    calcular_dias_en_estado,
+    obtener_duracion_estados
+)
 import uuid
 
 router = APIRouter()
 
+# Campos seleccionables con fields=/include=; las columnas JSONB pesadas solo con include=
+CAMPOS_OPCIONALES = ("datos_extraidos", "resultados_calculos")
+CAMPOS_DETALLE = list(SubmissionDetalleResponse.model_fields)
+CAMPOS_DETALLE_DEFECTO = [c for c in CAMPOS_DETALLE if c != "datos_extraidos"]
+CAMPOS_LISTA = list(SubmissionListItem.model_fields)
+CAMPOS_LISTA_DEFECTO = [c for c in CAMPOS_LISTA if c not in CAMPOS_OPCIONALES]
+
+
+def _consulta_enriquecida(db: Session, *columnas):
+    """
+    Consulta base de lectura: Submission con nombre de empresa y planta.
+
+    Incluye el join con Empresa que requiere predicado_visibilidad, de modo
+    que autorizar y enriquecer no necesitan consultas adicionales.
+    """
+    return db.query(Submission, Empresa.nombre, Planta.nombre, *columnas).join(
+        Empresa, Empresa.id == Submission.empresa_id
+    ).outerjoin(
+        Planta, Planta.id == Submission.planta_id
+    )
+
 
 @router.post("/procesos/{proceso_id}/submissions", response_model=SubmissionResponse, status_code=status.HTTP_201_CREATED)
 async def crear_submission(
@@ -101,20 +158,19 @@ async def crear_submission(
         planta_id=submission_data.planta_id,
         usuario_id=current_user.id,
         estado_actual=EstadoSubmission.BORRADOR,
-        workflow_history=[{
-            "estado": "borrador",
-            "fecha": datetime.utcnow().isoformat(),
-            "user_id": current_user.id,
-            "user_nombre": current_user.nombre
-        }],
+        workflow_history=[],
         validaciones=[],
         comentarios=[]
     )
 
     db.add(nuevo_submission)
-    db.commit()
+    registrar_transicion(db, nuevo_submission, EstadoSubmission.BORRADOR, current_user)
+    confirmar_cambios(db, nuevo_submission)
     db.refresh(nuevo_submission)
 
+    # Recién creado no tiene resultados: evita la carga de la columna diferida
+    set_committed_value(nuevo_submission, "resultados_calculos", None)
+
     return SubmissionResponse.model_validate(nuevo_submission)
 
 
@@ -125,97 +181,198 @@ async def listar_submissions(
     estado: Optional[EstadoSubmission] = Query(None),
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma (ej: estado_actual,submitted_at)"),
+    include: Optional[str] = Query(None, description="Campos opcionales: datos_extraidos, resultados_calculos"),
+    db: Session = Depends(get_db_lectura),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
     Listar submissions de un proceso
+
+    Solo se leen de la base las columnas de los campos devueltos.
     """
-    query = db.query(Submission).filter(Submission.proceso_id == proceso_id)
-
-    # Filtrar según permisos del usuario
-    if tiene_permiso(current_user, "submissions.ver_todos"):
-        # ROOT, ADMIN_PROCESO, EJECUTIVO_FICEM ven todo
-        if empresa_id:
-            query = query.filter(Submission.empresa_id == empresa_id)
-    elif tiene_permiso(current_user, "submissions.ver_pais"):
-        # COORDINADOR_PAIS ve submissions de su país
-        query = query.join(Empresa).filter(Empresa.pais == current_user.pais)
-        if empresa_id:
-            query = query.filter(Submission.empresa_id == empresa_id)
-    elif tiene_permiso(current_user, "submissions.ver_empresa"):
-        # Usuarios de empresa solo ven su empresa
-        query = query.filter(Submission.empresa_id == current_user.empresa_id)
+    campos = resolver_campos(fields, include, CAMPOS_LISTA, CAMPOS_LISTA_DEFECTO)
+
+    # Visibilidad, nombres y fecha de entrada al estado en la misma consulta
+    alcance = alcance_visibilidad(current_user)
+    entrada_estado = subconsulta_entrada_estado().label("entrada_estado")
+
+    query = _consulta_enriquecida(db, entrada_estado).filter(
+        Submission.proceso_id == proceso_id,
+        predicado_visibilidad(current_user, alcance)
+    )
+
+    if empresa_id:
+        query = query.filter(Submission.empresa_id == empresa_id)
 
     if estado:
         query = query.filter(Submission.estado_actual == estado)
 
-    total = query.count()
-    submissions = query.order_by(Submission.created_at.desc()).offset(offset).limit(limit).all()
+    total = query.with_entities(func.count(Submission.id)).scalar()
+    filas = query.options(
+        opciones_carga(Submission, campos)
+    ).order_by(Submission.created_at.desc()).offset(offset).limit(limit).all()
 
-    # Enriquecer con datos de empresa
     items = []
-    for s in submissions:
-        empresa = db.query(Empresa).filter(Empresa.id == s.empresa_id).first()
-        planta = db.query(Planta).filter(Planta.id == s.planta_id).first() if s.planta_id else None
+    for s, empresa_nombre, planta_nombre, fecha_entrada in filas:
+        calculados = {
+            "empresa_nombre": empresa_nombre,
+            "planta_nombre": planta_nombre,
+            "dias_en_estado": calcular_dias_en_estado(fecha_entrada),
+        }
+        items.append({c: calculados[c] if c in calculados else getattr(s, c) for c in campos})
+
+    return RespuestaJSON({"total": total, "items": items})
 
-        item = SubmissionListItem(
-            id=s.id,
-            proceso_id=s.proceso_id,
-            empresa_id=s.empresa_id,
-            empresa_nombre=empresa.nombre if empresa else None,
-            planta_nombre=planta.nombre if planta else None,
-            estado_actual=s.estado_actual,
-            submitted_at=s.submitted_at,
-            dias_en_estado=None  # TODO: calcular
+
+@router.get("/procesos/{proceso_id}/submissions/duracion-estados", response_model=List[DuracionEstadoItem])
+async def duracion_estados(
+    proceso_id: str,
+    db: Session = Depends(get_db_lectura),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Tiempo de permanencia por estado (SLA) agregado por país
+
+    Lee el resumen precalculado sobre submission_eventos. Coordinadores de país
+    solo ven su país.
+    """
+    if tiene_permiso(current_user, "dashboard.estadisticas_globales"):
+        pais = None
+    elif tiene_permiso(current_user, "dashboard.estadisticas_pais"):
+        pais = current_user.pais
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tiene permiso para ver estadísticas de submissions"
         )
-        items.append(item)
 
-    return SubmissionList(total=total, items=items)
+    filas = obtener_duracion_estados(db, proceso_id, pais=pais)
+    return [DuracionEstadoItem(**fila) for fila in filas]
 
 
-@router.get("/submissions/{submission_id}", response_model=SubmissionResponse)
+@router.get("/submissions/{submission_id}", response_model=SubmissionDetalleResponse)
 async def obtener_submission(
     submission_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Campos a devolver, separados por coma (ej: estado_actual,archivos_excel)"),
+    include: Optional[str] = Query(None, description="Campos opcionales: datos_extraidos"),
+    db: Session = Depends(get_db_lectura),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
     Obtener detalle completo de un submission
+
+    - **fields**: limita la respuesta a esos campos (`id` siempre se incluye)
+    - **include**: agrega `datos_extraidos`, que no se devuelve por defecto
+
+    Solo se leen de la base las columnas de los campos devueltos.
     """
-    submission = db.query(Submission).filter(Submission.id == submission_id).first()
+    campos = resolver_campos(fields, include, CAMPOS_DETALLE, CAMPOS_DETALLE_DEFECTO)
 
-    if not submission:
+    # Autorización y nombres de empresa/planta en una sola consulta
+    fila = _consulta_enriquecida(
+        db,
+        predicado_visibilidad(current_user).label("visible")
+    ).options(
+        opciones_carga(Submission, campos)
+    ).filter(Submission.id == submission_id).first()
+
+    if not fila:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Submission {submission_id} no encontrado"
         )
 
-    # Verificar permisos de visibilidad
-    puede_ver = False
-    if tiene_permiso(current_user, "submissions.ver_todos"):
-        puede_ver = True
-    elif tiene_permiso(current_user, "submissions.ver_pais"):
-        empresa = db.query(Empresa).filter(Empresa.id == submission.empresa_id).first()
-        puede_ver = empresa and empresa.pais == current_user.pais
-    elif tiene_permiso(current_user, "submissions.ver_empresa"):
-        puede_ver = submission.empresa_id == current_user.empresa_id
+    submission, empresa_nombre, planta_nombre, visible = fila
 
-    if not puede_ver:
+    if not visible:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="No tiene permisos para ver este submission"
         )
 
-    # Enriquecer con nombres
-    empresa = db.query(Empresa).filter(Empresa.id == submission.empresa_id).first()
-    planta = db.query(Planta).filter(Planta.id == submission.planta_id).first() if submission.planta_id else None
+    # Solo atributos cargados: acceder a otros dispararía consultas adicionales.
+    # Serialización directa a bytes (los JSONB pueden pesar varios MB)
+    calculados = {"empresa_nombre": empresa_nombre, "planta_nombre": planta_nombre}
+    return RespuestaJSON({c: calculados[c] if c in calculados else getattr(submission, c) for c in campos})
 
-    response = SubmissionResponse.model_validate(submission)
-    response.empresa_nombre = empresa.nombre if empresa else None
-    response.planta_nombre = planta.nombre if planta else None
 
-    return response
+def _verificar_visible(db: Session, submission_id: uuid.UUID, current_user: Usuario) -> None:
+    """
+    404 si el submission no existe, 403 si el usuario no puede verlo.
+
+    Deja la sesión en el esquema de datos del proceso del submission.
+    """
+    fila = db.query(
+        Submission.proceso_id,
+        predicado_visibilidad(current_user).label("visible")
+    ).join(
+        Empresa, Empresa.id == Submission.empresa_id
+    ).filter(Submission.id == submission_id).first()
+
+    if fila is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Submission {submission_id} no encontrado"
+        )
+
+    if not fila.visible:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tiene permisos para ver este submission"
+        )
+
+    usar_esquema_proceso(db, fila.proceso_id)
+
+
+@router.get("/submissions/{submission_id}/datos", response_model=DatosHojasResponse)
+async def listar_hojas_datos(
+    submission_id: uuid.UUID,
+    db: Session = Depends(get_db_lectura),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Hojas de datos extraídos disponibles y cantidad de filas de cada una
+    """
+    _verificar_visible(db, submission_id, current_user)
+
+    return DatosHojasResponse(submission_id=submission_id, hojas=contar_filas_hojas(db, submission_id))
+
+
+@router.get("/submissions/{submission_id}/datos/{hoja}", response_model=DatosHojaPagina)
+async def leer_datos_hoja(
+    submission_id: uuid.UUID,
+    hoja: str,
+    cursor: int = Query(0, ge=0, description="Valor de siguiente_cursor de la página anterior (0 = inicio)"),
+    limit: int = Query(500, ge=1, le=5000),
+    db: Session = Depends(get_db_lectura),
+    current_user: Usuario = Depends(get_current_user)
+):
+    """
+    Filas de una hoja de datos extraídos (cemento, concreto, clinker), paginadas
+
+    Recorrer con `cursor=siguiente_cursor` hasta que `siguiente_cursor` sea null.
+    """
+    definicion = obtener_hoja(hoja)
+
+    if definicion is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Hoja '{hoja}' no existe"
+        )
+
+    _verificar_visible(db, submission_id, current_user)
+
+    total, filas, siguiente_cursor = leer_pagina_hoja(db, submission_id, definicion, cursor, limit)
+
+    return RespuestaJSON({
+        "submission_id": submission_id,
+        "hoja": definicion.clave,
+        "total": total,
+        "cursor": cursor,
+        "filas": filas,
+        "siguiente_cursor": siguiente_cursor,
+    })
 
 
 @router.post("/submissions/{submission_id}/upload")
@@ -232,7 +389,7 @@ async def subir_archivo(
     - **planta_id**: ID de la planta a la que corresponde este archivo
     - Si ya existe un archivo para esa planta, se reemplaza
 
-    **TODO**: Implementar almacenamiento real (S3, filesystem)
+    El archivo se guarda en UPLOAD_DIR y se lee en el pool de procesos de Excel.
     """
     submission = db.query(Submission).filter(Submission.id == submission_id).first()
 
@@ -283,38 +440,67 @@ async def subir_archivo(
             detail=f"Planta {planta_id} no encontrada o no pertenece a la empresa"
         )
 
-    # TODO: Guardar archivo en S3 o filesystem
-    # Por ahora solo simulamos
-    file_url = f"s3://ficem-uploads/{submission.proceso_id}/{submission_id}/{planta_id}_{archivo.filename}"
-
-    nuevo_archivo = {
-        "planta_id": planta_id,
-        "planta_nombre": planta.nombre,
-        "url": file_url,
-        "filename": archivo.filename,
-        "size_bytes": 0,  # TODO: calcular tamaño real
-        "uploaded_at": datetime.utcnow().isoformat()
-    }
+    contenido = await archivo.read()
+    ruta, sha256 = await run_in_threadpool(
+        guardar_archivo, submission.proceso_id, submission_id, planta_id, contenido
+    )
 
-    # Obtener array actual o inicializar
-    archivos = submission.archivos_excel or []
+    # Copia del array actual: JSONB no detecta mutaciones en el mismo objeto
+    archivos = list(submission.archivos_excel or [])
+    ruta_anterior = next((ruta_archivo(a) for a in archivos if a.get("planta_id") == planta_id), None)
 
-    # Buscar si ya existe archivo para esta planta y reemplazar
-    archivo_existente = False
-    for i, arch in enumerate(archivos):
-        if arch.get("planta_id") == planta_id:
-            archivos[i] = nuevo_archivo
-            archivo_existente = True
-            break
+    # Si la carga falla (archivo ilegible, celdas fuera de rango de la tabla,
+    # conflicto de versión) el archivo recién guardado no queda huérfano
+    try:
+        # Extraer y validar las hojas (CPU: en el pool de procesos); la validación
+        # queda guardada con el sha256 y /validate no vuelve a leer este archivo
+        config = db.query(ProcesoMRV.config).filter(ProcesoMRV.id == submission.proceso_id).scalar()
+        resultado, = await procesar_archivos([ruta], config)
 
-    if not archivo_existente:
-        archivos.append(nuevo_archivo)
+        if resultado.error:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=resultado.error
+            )
 
-    submission.archivos_excel = archivos
+        nuevo_archivo = registrar_lectura({
+            "planta_id": planta_id,
+            "planta_nombre": planta.nombre,
+            "url": url_archivo(ruta),
+            "sha256": sha256,
+            "filename": archivo.filename,
+            "size_bytes": len(contenido),
+            "uploaded_at": datetime.utcnow().isoformat()
+        }, resultado, config)
+
+        # Buscar si ya existe archivo para esta planta y reemplazar
+        archivo_existente = False
+        for i, arch in enumerate(archivos):
+            if arch.get("planta_id") == planta_id:
+                archivos[i] = nuevo_archivo
+                archivo_existente = True
+                break
+
+        if not archivo_existente:
+            archivos.append(nuevo_archivo)
+
+        submission.archivos_excel = archivos
+
+        # Filas a las tablas por hoja (COPY) y resumen en datos_extraidos
+        usar_esquema_proceso(db, submission.proceso_id, bloquear=True)
+        guardar_filas_extraidas(db, submission, planta_id, resultado.leido)
+
+        confirmar_cambios(db, submission)
+    except Exception:
+        if ruta != ruta_anterior:
+            eliminar_archivo_guardado(ruta)
+        raise
 
-    db.commit()
     db.refresh(submission)
 
+    if ruta_anterior != ruta:
+        eliminar_archivo_guardado(ruta_anterior)
+
     return {
         "id": str(submission.id),
         "archivos_excel": submission.archivos_excel,
@@ -372,8 +558,14 @@ async def eliminar_archivo(
         )
 
     submission.archivos_excel = archivos_filtrados
+    usar_esquema_proceso(db, submission.proceso_id, bloquear=True)
+    eliminar_filas_planta(db, submission, planta_id)
+
+    confirmar_cambios(db, submission)
 
-    db.commit()
+    for a in archivos:
+        if a.get("planta_id") == planta_id:
+            eliminar_archivo_guardado(ruta_archivo(a))
 
     return {
         "id": str(submission.id),
@@ -391,7 +583,14 @@ async def validar_submission(
     """
     Ejecutar validaciones en un submission
 
-    **TODO**: Implementar validaciones reales según config del proceso
+    Aplica las validaciones de `config.validaciones` del proceso. Solo se leen
+    (en paralelo, en el pool de procesos) los archivos cuya validación guardada
+    no corresponde a su sha256 o a las reglas actuales; el resto reutiliza su
+    resultado. Las reglas entre plantas usan los agregados de cada archivo, y
+    las reglas interanual y de atípicos el índice agregados_historicos.
+
+    Guarda el resultado (y puede volver a extraer filas), por lo que exige los
+    mismos permisos que el upload y solo aplica en estado borrador.
     """
     submission = db.query(Submission).filter(Submission.id == submission_id).first()
 
@@ -401,6 +600,26 @@ async def validar_submission(
             detail=f"Submission {submission_id} no encontrado"
         )
 
+    # Verificar permisos - solo puede validar quien puede editar y es de la misma empresa
+    if not tiene_permiso(current_user, "submissions.editar"):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tiene permiso para validar submissions"
+        )
+
+    if current_user.rol.value in ["INFORMANTE_EMPRESA", "SUPERVISOR_EMPRESA"]:
+        if submission.empresa_id != current_user.empresa_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="No tiene permisos para validar este submission"
+            )
+
+    if submission.estado_actual != EstadoSubmission.BORRADOR:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Solo se pueden validar submissions en estado borrador"
+        )
+
     # Verificar que tenga al menos un archivo
     if not submission.archivos_excel or len(submission.archivos_excel) == 0:
         raise HTTPException(
@@ -408,17 +627,21 @@ async def validar_submission(
             detail="Debe subir al menos un archivo antes de validar"
         )
 
-    # TODO: Ejecutar validaciones reales
-    # Por ahora retornamos validaciones dummy
-    validaciones = [
-        ValidacionResult(tipo="estructura", status="ok", mensaje="Estructura correcta"),
-        ValidacionResult(tipo="rangos", status="ok", mensaje="Rangos válidos"),
-        ValidacionResult(tipo="consistencia", status="warning", mensaje="Producción 15% mayor que año anterior", detalles=["Revisar si es correcto"])
-    ]
+    proceso = db.query(
+        ProcesoMRV.config, ProcesoMRV.tipo, ProcesoMRV.ciclo, Empresa.pais
+    ).join(
+        Empresa, Empresa.id == submission.empresa_id
+    ).filter(ProcesoMRV.id == submission.proceso_id).one()
+
+    usar_esquema_proceso(db, submission.proceso_id, bloquear=True)
+    resultados, revalidados = await validar_archivos(db, submission, proceso.config)
+    resultados += validar_historico(db, submission, proceso.pais, proceso.tipo, proceso.ciclo, proceso.config)
+
+    validaciones = [ValidacionResult(**v) for v in resultados]
 
     # Guardar validaciones
     submission.validaciones = [v.model_dump() for v in validaciones]
-    db.commit()
+    confirmar_cambios(db, submission)
 
     errores = [v.mensaje for v in validaciones if v.status == "error"]
     advertencias = [v.mensaje for v in validaciones if v.status == "warning"]
@@ -428,7 +651,8 @@ async def validar_submission(
         valido=len(errores) == 0,
         errores=errores,
         advertencias=advertencias,
-        validaciones=validaciones
+        validaciones=validaciones,
+        archivos_revalidados=revalidados
     )
 
 
@@ -492,27 +716,18 @@ async def enviar_submission(
             detail="No se puede enviar con errores de validación"
         )
 
-    # Cambiar estado
-    submission.estado_actual = EstadoSubmission.ENVIADO
+    # Cambiar estado y registrar en el historial
+    registrar_transicion(db, submission, EstadoSubmission.ENVIADO, current_user)
     submission.submitted_at = datetime.utcnow()
 
-    # Agregar al historial
-    history = submission.workflow_history or []
-    history.append({
-        "estado": "enviado",
-        "fecha": datetime.utcnow().isoformat(),
-        "user_id": current_user.id,
-        "user_nombre": current_user.nombre
-    })
-    submission.workflow_history = history
-
-    db.commit()
+    confirmar_cambios(db, submission)
     db.refresh(submission)
 
     return SubmissionSubmitResponse(
         id=submission.id,
         estado_actual=submission.estado_actual,
         submitted_at=submission.submitted_at,
+        version=submission.version,
         proximos_pasos="Su envío será revisado por el coordinador nacional en los próximos 7 días"
     )
 
@@ -550,6 +765,8 @@ async def aprobar_empresa(
                 detail="Solo puede aprobar submissions de su empresa"
             )
 
+    verificar_version(submission, review_data.version)
+
     # Verificar estado - solo ENVIADO puede ser aprobado por empresa
     if submission.estado_actual != EstadoSubmission.ENVIADO:
         raise HTTPException(
@@ -566,25 +783,15 @@ async def aprobar_empresa(
 
     # Cambiar estado
     if review_data.accion == "aprobar":
-        submission.estado_actual = EstadoSubmission.APROBADO_EMPRESA
+        nuevo_estado = EstadoSubmission.APROBADO_EMPRESA
         proximos_pasos = "El submission será revisado por FICEM"
     else:
-        submission.estado_actual = EstadoSubmission.RECHAZADO_EMPRESA
+        nuevo_estado = EstadoSubmission.RECHAZADO_EMPRESA
         proximos_pasos = "Corrija los datos y vuelva a enviar"
 
+    registrar_transicion(db, submission, nuevo_estado, current_user, review_data.comentario)
     submission.reviewed_at = datetime.utcnow()
 
-    # Agregar al historial
-    history = submission.workflow_history or []
-    history.append({
-        "estado": submission.estado_actual.value,
-        "fecha": datetime.utcnow().isoformat(),
-        "user_id": current_user.id,
-        "user_nombre": current_user.nombre,
-        "comentario": review_data.comentario
-    })
-    submission.workflow_history = history
-
     # Agregar comentario
     if review_data.comentario:
         comentarios = submission.comentarios or []
@@ -596,17 +803,25 @@ async def aprobar_empresa(
         })
         submission.comentarios = comentarios
 
-    db.commit()
+    confirmar_cambios(db, submission)
     db.refresh(submission)
 
     return SubmissionReviewResponse(
         id=submission.id,
         estado_actual=submission.estado_actual,
         reviewed_at=submission.reviewed_at,
+        version=submission.version,
         proximos_pasos=proximos_pasos
     )
 
 
+def _registrar_aprobacion(db: Session, submission: Submission) -> None:
+    """Indicadores por planta al índice histórico y resultados de cálculos (sin commit)"""
+    usar_esquema_proceso(db, submission.proceso_id, bloquear=True)
+    registrar_historico(db, submission)
+    ejecutar_calculos(db, submission, submission.empresa.pais)
+
+
 @router.post("/submissions/{submission_id}/aprobar-ficem", response_model=SubmissionReviewResponse)
 async def aprobar_ficem(
     submission_id: uuid.UUID,
@@ -632,6 +847,8 @@ async def aprobar_ficem(
             detail=f"Submission {submission_id} no encontrado"
         )
 
+    verificar_version(submission, review_data.version)
+
     # Verificar estado - solo APROBADO_EMPRESA o EN_REVISION_FICEM pueden ser aprobados por FICEM
     if submission.estado_actual not in [EstadoSubmission.APROBADO_EMPRESA, EstadoSubmission.EN_REVISION_FICEM]:
         raise HTTPException(
@@ -648,29 +865,21 @@ async def aprobar_ficem(
 
     # Cambiar estado
     if review_data.accion == "aprobar":
-        submission.estado_actual = EstadoSubmission.APROBADO_FICEM
+        nuevo_estado = EstadoSubmission.APROBADO_FICEM
         submission.approved_at = datetime.utcnow()
-        proximos_pasos = "Los cálculos se ejecutarán automáticamente"
+        proximos_pasos = "Resultados de cálculos disponibles"
+        # Índice histórico y cálculos leen todas las filas: fuera del event loop
+        await run_in_threadpool(_registrar_aprobacion, db, submission)
     elif review_data.accion == "en_revision":
-        submission.estado_actual = EstadoSubmission.EN_REVISION_FICEM
+        nuevo_estado = EstadoSubmission.EN_REVISION_FICEM
         proximos_pasos = "El submission está siendo revisado por FICEM"
     else:
-        submission.estado_actual = EstadoSubmission.RECHAZADO_FICEM
+        nuevo_estado = EstadoSubmission.RECHAZADO_FICEM
         proximos_pasos = "Corrija los datos y vuelva a enviar"
 
+    registrar_transicion(db, submission, nuevo_estado, current_user, review_data.comentario)
     submission.reviewed_at = datetime.utcnow()
 
-    # Agregar al historial
-    history = submission.workflow_history or []
-    history.append({
-        "estado": submission.estado_actual.value,
-        "fecha": datetime.utcnow().isoformat(),
-        "user_id": current_user.id,
-        "user_nombre": current_user.nombre,
-        "comentario": review_data.comentario
-    })
-    submission.workflow_history = history
-
     # Agregar comentario
     if review_data.comentario:
         comentarios = submission.comentarios or []
@@ -682,13 +891,14 @@ async def aprobar_ficem(
         })
         submission.comentarios = comentarios
 
-    db.commit()
+    confirmar_cambios(db, submission)
     db.refresh(submission)
 
     return SubmissionReviewResponse(
         id=submission.id,
         estado_actual=submission.estado_actual,
         reviewed_at=submission.reviewed_at,
+        version=submission.version,
         proximos_pasos=proximos_pasos
     )
 
@@ -723,7 +933,7 @@ async def agregar_comentario(
     comentarios.append(nuevo_comentario)
     submission.comentarios = comentarios
 
-    db.commit()
+    confirmar_cambios(db, submission)
 
     return ComentarioResponse(
         id=nuevo_comentario["id"],
@@ -738,40 +948,61 @@ async def agregar_comentario(
 @router.get("/submissions/{submission_id}/results")
 async def obtener_resultados(
     submission_id: uuid.UUID,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_lectura),
     current_user: Usuario = Depends(get_current_user)
 ):
     """
     Obtener resultados de cálculos de un submission
 
-    **TODO**: Implementar motor de cálculos
+    Solo lectura: los resultados se calculan al aprobar a nivel FICEM y se
+    recalculan con scripts/recalcular_resultados.py cuando cambian factores,
+    bandas o el motor. `vigentes` indica si la huella guardada coincide con la
+    de los insumos actuales.
     """
-    submission = db.query(Submission).filter(Submission.id == submission_id).first()
-
-    if not submission:
+    # resultados_calculos se lee como texto: se envía tal cual sin parsear el JSONB
+    fila = db.query(
+        Submission.id,
+        Submission.estado_actual,
+        Submission.archivos_excel,
+        Empresa.pais,
+        cast(Submission.resultados_calculos, Text).label("resultados_json"),
+        Submission.resultados_calculos["huella"].astext.label("huella"),
+        predicado_visibilidad(current_user).label("visible")
+    ).join(
+        Empresa, Empresa.id == Submission.empresa_id
+    ).filter(Submission.id == submission_id).first()
+
+    if not fila:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Submission {submission_id} no encontrado"
         )
 
+    if not fila.visible:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tiene permisos para ver este submission"
+        )
+
     # Verificar que esté aprobado por FICEM
-    if submission.estado_actual not in [EstadoSubmission.APROBADO_FICEM, EstadoSubmission.PUBLICADO]:
+    if fila.estado_actual not in [EstadoSubmission.APROBADO_FICEM, EstadoSubmission.PUBLICADO]:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Resultados no disponibles. Estado actual: {submission.estado_actual.value}"
+            detail=f"Resultados no disponibles. Estado actual: {fila.estado_actual.value}"
         )
 
-    # TODO: Ejecutar cálculos si no existen
-    if not submission.resultados_calculos:
-        # Por ahora retornamos error
+    if fila.resultados_json is None:
         return {
-            "submission_id": str(submission.id),
-            "estado": submission.estado_actual.value,
-            "mensaje": "Cálculos aún no ejecutados. Motor de cálculos en desarrollo."
+            "submission_id": str(fila.id),
+            "estado": fila.estado_actual.value,
+            "mensaje": "Cálculos aún no ejecutados: se ejecutan con scripts/recalcular_resultados.py"
         }
 
-    return {
-        "submission_id": str(submission.id),
-        "estado": submission.estado_actual.value,
-        "resultados_calculos": submission.resultados_calculos
-    }
\ No newline at end of file
+    # Solo se compara la huella: el JSONB se envía sin parsear
+    huella = huella_actual(db, fila.archivos_excel, fila.pais)
+
+    return respuesta_json_con_crudo(
+        {"submission_id": str(fila.id), "estado": fila.estado_actual.value, "vigentes": huella == fila.huella},
+        "resultados_calculos",
+        fila.resultados_json
+    )
\ No newline at end of file
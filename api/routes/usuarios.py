@@ -9,6 +9,7 @@ from pydantic import BaseModel, EmailStr
 from database.connection import get_db
 from database.models import Usuario, UserRole
 from api.middleware.jwt_auth import get_current_user
+from api.middleware.replica import get_db_lectura
 from passlib.context import CryptContext
 
 router = APIRouter()
@@ -54,7 +55,7 @@ async def listar_usuarios(
     rol: Optional[str] = Query(None, description="Filtrar por rol"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo"),
     current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_lectura)
 ):
     """
     Listar usuarios con filtros opcionales.
@@ -106,7 +107,7 @@ async def listar_usuarios(
 async def obtener_usuario(
     usuario_id: int,
     current_user: Usuario = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db_lectura)
 ):
     """
     Obtener un usuario por ID.
@@ -65,7 +65,7 @@ class ConfigProceso(BaseModel):
     deadline_envio: Optional[str] = None
     deadline_revision: Optional[str] = None
     calculos_habilitados: List[str] = ["gcca", "bandas"]
-    esquema_bd: Optional[str] = None
+    esquema_bd: Optional[str] = Field(None, pattern=r"^[a-z_][a-z0-9_]{0,62}$", description="Esquema de datos del país (ej: peru_data)")
 
 
 # Esquemas para Procesos
@@ -202,11 +202,33 @@ class SubmissionResponse(BaseModel):
     submitted_at: Optional[datetime]
     reviewed_at: Optional[datetime]
     approved_at: Optional[datetime]
+    version: int = 1
 
     class Config:
         from_attributes = True
 
 
+class SubmissionDetalleResponse(SubmissionResponse):
+    """Detalle de un submission; datos_extraidos solo con `include=datos_extraidos`"""
+    datos_extraidos: Optional[Dict[str, Any]] = None
+
+
+class DatosHojasResponse(BaseModel):
+    """Hojas de datos_extraidos con su cantidad de filas"""
+    submission_id: UUID4
+    hojas: Dict[str, Optional[int]]
+
+
+class DatosHojaPagina(BaseModel):
+    """Página de filas de una hoja de datos_extraidos"""
+    submission_id: UUID4
+    hoja: str
+    total: int
+    cursor: int
+    filas: List[Any]
+    siguiente_cursor: Optional[int] = None
+
+
 class SubmissionListItem(BaseModel):
     """Item de lista de submissions"""
     id: UUID4
@@ -217,6 +239,9 @@ class SubmissionListItem(BaseModel):
     estado_actual: EstadoSubmission
     submitted_at: Optional[datetime]
     dias_en_estado: Optional[int] = None
+    # Solo con include=
+    datos_extraidos: Optional[Dict[str, Any]] = None
+    resultados_calculos: Optional[Dict[str, Any]] = None
 
     class Config:
         from_attributes = True
@@ -228,6 +253,19 @@ class SubmissionList(BaseModel):
     items: List[SubmissionListItem]
 
 
+class DuracionEstadoItem(BaseModel):
+    """Tiempo de permanencia en un estado, agregado por proceso y país"""
+    proceso_id: str
+    pais: str
+    estado: EstadoSubmission
+    tramos_cerrados: int
+    en_curso: int
+    dias_promedio: Optional[float] = None
+    dias_p50: Optional[float] = None
+    dias_p90: Optional[float] = None
+    dias_max_en_curso: Optional[float] = None
+
+
 class SubmissionValidateResponse(BaseModel):
     """Respuesta de validación de submission"""
     submission_id: UUID4
@@ -235,6 +273,7 @@ class SubmissionValidateResponse(BaseModel):
     errores: List[str]
     advertencias: List[str]
     validaciones: List[ValidacionResult]
+    archivos_revalidados: Optional[int] = Field(None, description="Archivos leídos en esta validación (el resto reutilizó su resultado)")
 
 
 class SubmissionSubmitResponse(BaseModel):
@@ -242,6 +281,7 @@ class SubmissionSubmitResponse(BaseModel):
     id: UUID4
     estado_actual: EstadoSubmission
     submitted_at: datetime
+    version: int
     proximos_pasos: str
 
 
@@ -249,6 +289,7 @@ class SubmissionReviewRequest(BaseModel):
     """Request para revisar submission"""
     accion: str  # aprobar | rechazar
     comentario: str
+    version: Optional[int] = Field(None, description="Versión del submission vista por el revisor (control de concurrencia)")
 
 
 class SubmissionReviewResponse(BaseModel):
@@ -256,6 +297,7 @@ class SubmissionReviewResponse(BaseModel):
     id: UUID4
     estado_actual: EstadoSubmission
     reviewed_at: datetime
+    version: int
     proximos_pasos: str
 
 
@@ -0,0 +1,56 @@
+"""
+Almacenamiento de los Excel subidos en el filesystem (UPLOAD_DIR)
+
+Cada archivo se guarda como {UPLOAD_DIR}/{proceso_id}/{submission_id}/
+{planta_id}_{sha256[:16]}.xlsx: reemplazar el archivo de una planta escribe uno
+nuevo y el anterior se elimina recién después del commit, por lo que un
+upload fallido no pierde el archivo vigente.
+"""
+import hashlib
+import os
+from typing import Optional, Tuple
+
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", "./uploads")
+
+_PREFIJO = "file://"
+
+
+def guardar_archivo(proceso_id: str, submission_id, planta_id: int, contenido: bytes) -> Tuple[str, str]:
+    """
+    Escribir el archivo de una planta.
+
+    Returns:
+        (ruta absoluta, sha256 hex del contenido)
+    """
+    sha256 = hashlib.sha256(contenido).hexdigest()
+    directorio = os.path.abspath(os.path.join(UPLOAD_DIR, proceso_id, str(submission_id)))
+    os.makedirs(directorio, exist_ok=True)
+
+    ruta = os.path.join(directorio, f"{planta_id}_{sha256[:16]}.xlsx")
+    if not os.path.exists(ruta):
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, "wb") as f:
+            f.write(contenido)
+        os.replace(temporal, ruta)
+
+    return ruta, sha256
+
+
+def url_archivo(ruta: str) -> str:
+    return f"{_PREFIJO}{ruta}"
+
+
+def ruta_archivo(archivo: dict) -> Optional[str]:
+    """Ruta local de una entrada de archivos_excel (None si no está en el filesystem)"""
+    url = archivo.get("url") or ""
+    return url[len(_PREFIJO):] if url.startswith(_PREFIJO) else None
+
+
+def eliminar_archivo(ruta: Optional[str]) -> None:
+    """Eliminar un archivo guardado; ignora los que ya no existen"""
+    if not ruta:
+        return
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
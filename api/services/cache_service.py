@@ -0,0 +1,82 @@
+"""
+Caché en memoria con expiración (TTL), local a cada worker
+"""
+import threading
+import time
+from typing import Any, Hashable, Optional
+
+
+_AUSENTE = object()
+
+
+class CacheTTL:
+    """
+    Diccionario thread-safe con expiración por entrada.
+
+    Cada worker de uvicorn mantiene su propia copia, por lo que el TTL acota
+    cuánto puede quedar desactualizado un worker que no recibió la invalidación.
+
+    Args:
+        ttl_segundos: Tiempo de vida por defecto de cada entrada (0 desactiva la caché)
+        max_entradas: Límite de entradas; al superarlo se descartan las más antiguas
+    """
+
+    def __init__(self, ttl_segundos: float, max_entradas: int = 1024):
+        self.ttl_segundos = ttl_segundos
+        self.max_entradas = max_entradas
+        self._datos = {}
+        self._lock = threading.Lock()
+
+    @property
+    def habilitada(self) -> bool:
+        return self.ttl_segundos > 0
+
+    def get(self, clave: Hashable, default: Any = None) -> Any:
+        """Obtener valor vigente o `default` si no existe o expiró"""
+        with self._lock:
+            entrada = self._datos.get(clave, _AUSENTE)
+            if entrada is _AUSENTE:
+                return default
+
+            expira, valor = entrada
+            if expira < time.monotonic():
+                del self._datos[clave]
+                return default
+
+            return valor
+
+    def set(self, clave: Hashable, valor: Any, ttl: Optional[float] = None) -> None:
+        """Guardar valor con el TTL por defecto o uno específico"""
+        ttl = self.ttl_segundos if ttl is None else ttl
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._datos.pop(clave, None)
+            self._datos[clave] = (time.monotonic() + ttl, valor)
+
+            if len(self._datos) > self.max_entradas:
+                self._purgar()
+
+    def invalidar(self, clave: Hashable) -> None:
+        """Eliminar una entrada"""
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def limpiar(self) -> None:
+        """Eliminar todas las entradas"""
+        with self._lock:
+            self._datos.clear()
+
+    def _purgar(self) -> None:
+        """Descartar expirados y, si no alcanza, las entradas más antiguas"""
+        ahora = time.monotonic()
+        for clave in [c for c, (expira, _) in self._datos.items() if expira < ahora]:
+            del self._datos[clave]
+
+        # dict conserva orden de inserción: las primeras son las más antiguas
+        while len(self._datos) > self.max_entradas:
+            del self._datos[next(iter(self._datos))]
+
+    def __len__(self) -> int:
+        return len(self._datos)
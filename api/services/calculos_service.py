@@ -0,0 +1,229 @@
+"""
+Servicio de ejecución de cálculos con memoización por huella
+
+Cada planta de resultados_calculos guarda la huella de sus insumos:
+sha256 del archivo de la planta, versión de los factores que rigen para el
+país, versión del registro de bandas y VERSION_MOTOR. Los archivos subidos
+antes de guardar el sha256 reciben uno la primera vez que se calculan: el del
+archivo si sigue en UPLOAD_DIR o, si no, una huella de sus filas tipadas
+("huella_datos"), que se guarda en archivos_excel. Al recalcular solo se
+procesan las plantas cuya huella cambió; si no cambió ninguna (la huella del
+submission coincide) no se lee ni escribe nada.
+
+Como la versión de factores es la de la subtabla del país, actualizar factores
+de un país solo invalida los resultados de ese país (y los globales, a todos).
+
+Estructura de resultados_calculos:
+    {
+        "ejecutado": "2024-11-25T15:00:00",
+        "huella": "4be1c0...",                 # de todas las plantas
+        "versiones": {"motor": 1, "bandas": "...", "factores": "..."},
+        "factores": {...},                     # TablaFactores.a_dict() del país
+        "plantas": {"12": {"huella": "...", "sha256": "...", "gcca": {...}, ...}}
+    }
+"""
+import hashlib
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import text, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from database.models import Submission, Empresa, EstadoSubmission
+from api.services.archivos_service import ruta_archivo
+from api.services.factores_service import tabla_vigente
+from api.services.historico_service import indicadores_submission
+from calculos.motor import VERSION_MOTOR, calcular_planta, registro_bandas
+
+# Estados con resultados publicables (los que se recalculan en bloque)
+ESTADOS_CALCULADOS = (EstadoSubmission.APROBADO_FICEM, EstadoSubmission.PUBLICADO)
+
+SQL_CONCRETO_RESISTENCIA = """
+    SELECT planta_id, resistencia_mpa,
+           SUM(volumen_m3) AS volumen_m3,
+           SUM(co2_kg_m3 * volumen_m3) / NULLIF(SUM(volumen_m3) FILTER (WHERE co2_kg_m3 IS NOT NULL), 0) AS co2_kg_m3
+    FROM datos_concreto
+    WHERE submission_id = :submission_id AND planta_id = ANY(:plantas)
+    GROUP BY planta_id, resistencia_mpa
+    ORDER BY planta_id, resistencia_mpa
+"""
+
+# Huella de las filas tipadas de cada planta, para archivos sin sha256
+SQL_HUELLA_FILAS = """
+    SELECT planta_id, md5(string_agg(fila, '|' ORDER BY fila)) AS huella
+    FROM (
+        SELECT planta_id, 'cemento:' || t::text AS fila FROM datos_cemento t
+        WHERE submission_id = :submission_id AND planta_id = ANY(:plantas)
+        UNION ALL
+        SELECT planta_id, 'clinker:' || t::text FROM datos_clinker t
+        WHERE submission_id = :submission_id AND planta_id = ANY(:plantas)
+        UNION ALL
+        SELECT planta_id, 'concreto:' || t::text FROM datos_concreto t
+        WHERE submission_id = :submission_id AND planta_id = ANY(:plantas)
+    ) filas
+    GROUP BY planta_id
+"""
+
+
+def insumo_archivo(archivo: dict) -> Optional[str]:
+    """sha256 del archivo o, en archivos anteriores al sha256, la huella de sus filas"""
+    return archivo.get("sha256") or archivo.get("huella_datos")
+
+
+def huella_planta(insumo: Optional[str], version_factores: str, version_bandas: str) -> Optional[str]:
+    """Huella de los insumos de una planta (None si el archivo aún no tiene huella)"""
+    if not insumo:
+        return None
+    return hashlib.sha1(f"{insumo}|{version_factores}|{version_bandas}|{VERSION_MOTOR}".encode()).hexdigest()[:16]
+
+
+def huellas_esperadas(archivos: Optional[list], version_factores: str, version_bandas: str) -> Dict[str, Optional[str]]:
+    """planta_id (str) → huella de sus insumos actuales"""
+    return {
+        str(a["planta_id"]): huella_planta(insumo_archivo(a), version_factores, version_bandas)
+        for a in archivos or [] if a.get("planta_id") is not None
+    }
+
+
+def huella_submission(huellas: Dict[str, Optional[str]]) -> Optional[str]:
+    """Huella conjunta de las plantas (None si alguna no tiene huella)"""
+    if None in huellas.values():
+        return None
+    return hashlib.sha1("|".join(f"{p}:{h}" for p, h in sorted(huellas.items())).encode()).hexdigest()[:16]
+
+
+def huella_actual(db: Session, archivos: Optional[list], pais: str) -> Optional[str]:
+    """Huella que tendrían los resultados calculados hoy (sin calcularlos)"""
+    factores = tabla_vigente(db).de_pais(pais)
+    return huella_submission(huellas_esperadas(archivos, factores.version, registro_bandas().version))
+
+
+def completar_huellas_archivos(db: Session, submission: Submission) -> int:
+    """
+    Asignar huella a los archivos sin sha256 y guardarla en archivos_excel.
+
+    Se hace una sola vez por archivo, con un UPDATE directo (no incrementa la
+    versión del submission). Las tablas de datos se leen en el esquema activo
+    de la sesión (usar_esquema_proceso). No hace commit.
+
+    Returns:
+        Archivos a los que se asignó huella
+    """
+    archivos = [dict(a) for a in submission.archivos_excel or []]
+    sin_huella = [a for a in archivos if a.get("planta_id") is not None and not insumo_archivo(a)]
+    if not sin_huella:
+        return 0
+
+    por_filas = []
+    for archivo in sin_huella:
+        ruta = ruta_archivo(archivo)
+        if ruta and os.path.exists(ruta):
+            with open(ruta, "rb") as f:
+                archivo["sha256"] = hashlib.sha256(f.read()).hexdigest()
+        else:
+            por_filas.append(archivo)
+
+    if por_filas:
+        huellas = dict(db.execute(
+            text(SQL_HUELLA_FILAS),
+            {"submission_id": submission.id, "plantas": [a["planta_id"] for a in por_filas]}
+        ).all())
+        for archivo in por_filas:
+            # Una planta sin filas también tiene huella fija: no se recalcula en cada corrida
+            archivo["huella_datos"] = huellas.get(archivo["planta_id"]) or "sin_filas"
+
+    db.execute(update(Submission).where(Submission.id == submission.id).values(archivos_excel=archivos))
+    set_committed_value(submission, "archivos_excel", archivos)
+
+    return len(sin_huella)
+
+
+def _concreto_por_planta(db: Session, submission_id, plantas: List[int]) -> Dict[int, List[dict]]:
+    por_planta: Dict[int, List[dict]] = {}
+    filas = db.execute(text(SQL_CONCRETO_RESISTENCIA), {"submission_id": submission_id, "plantas": plantas}).mappings()
+    for fila in filas:
+        por_planta.setdefault(fila["planta_id"], []).append(
+            {"resistencia_mpa": fila["resistencia_mpa"], "volumen_m3": fila["volumen_m3"], "co2_kg_m3": fila["co2_kg_m3"]}
+        )
+    return por_planta
+
+
+def ejecutar_calculos(db: Session, submission: Submission, pais: str, forzar: bool = False) -> int:
+    """
+    Calcular los resultados del submission reutilizando las plantas vigentes.
+
+    resultados_calculos se escribe con un UPDATE directo: no incrementa la
+    versión del submission, por lo que un recálculo no invalida la versión que
+    tienen los clientes. Las tablas de datos se leen en el esquema activo de
+    la sesión (usar_esquema_proceso). No hace commit.
+
+    Returns:
+        Plantas calculadas (0 si los resultados guardados siguen vigentes)
+    """
+    completar_huellas_archivos(db, submission)
+    factores = tabla_vigente(db).de_pais(pais)
+    registro = registro_bandas()
+
+    esperadas = huellas_esperadas(submission.archivos_excel, factores.version, registro.version)
+    huella = huella_submission(esperadas)
+    previos = submission.resultados_calculos or {}
+    if not forzar and huella is not None and previos.get("huella") == huella:
+        return 0
+
+    plantas_previas = previos.get("plantas") or {}
+    plantas = {
+        p: plantas_previas[p] for p, h in esperadas.items()
+        if not forzar and h is not None and (plantas_previas.get(p) or {}).get("huella") == h
+    }
+    pendientes = [int(p) for p in esperadas if p not in plantas]
+
+    if pendientes:
+        indicadores = indicadores_submission(db, submission.id)
+        concreto = _concreto_por_planta(db, submission.id, pendientes)
+        insumo_por_planta = {str(a["planta_id"]): insumo_archivo(a) for a in submission.archivos_excel or []}
+        for planta_id in pendientes:
+            clave = str(planta_id)
+            plantas[clave] = {
+                "huella": esperadas[clave],
+                "sha256": insumo_por_planta.get(clave),
+                **calcular_planta(indicadores.get(planta_id, {}), concreto.get(planta_id, []), factores, pais, registro),
+            }
+
+    resultados = {
+        "ejecutado": datetime.utcnow().isoformat(timespec="seconds"),
+        "huella": huella,
+        "versiones": {"motor": VERSION_MOTOR, "bandas": registro.version, "factores": factores.version},
+        "factores": factores.a_dict(),
+        "plantas": plantas,
+    }
+    db.execute(
+        update(Submission).where(Submission.id == submission.id).values(resultados_calculos=resultados)
+    )
+
+    return len(pendientes)
+
+
+def submissions_por_recalcular(db: Session, pais: Optional[str] = None) -> List:
+    """
+    Submissions aprobados cuya huella guardada no coincide con la actual.
+
+    Compara solo la huella de resultados_calculos, sin leer el resto del JSONB.
+    Los que tienen archivos sin huella se incluyen una sola vez: al calcularlos
+    se les asigna (completar_huellas_archivos) y la corrida siguiente ya los
+    compara.
+    """
+    consulta = db.query(
+        Submission.id,
+        Submission.archivos_excel,
+        Empresa.pais,
+        Submission.resultados_calculos["huella"].astext.label("huella")
+    ).join(
+        Empresa, Empresa.id == Submission.empresa_id
+    ).filter(Submission.estado_actual.in_(ESTADOS_CALCULADOS))
+
+    if pais:
+        consulta = consulta.filter(Empresa.pais == pais)
+
+    return [fila.id for fila in consulta if fila.huella is None or fila.huella != huella_actual(db, fila.archivos_excel, fila.pais)]
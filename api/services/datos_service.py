@@ -0,0 +1,163 @@
+"""
+Servicio de datos extraídos del Excel
+
+Las filas de cada hoja (cemento, concreto, clinker) se guardan en tablas
+tipadas (datos_cemento, datos_concreto, datos_clinker) cargadas con COPY;
+submissions.datos_extraidos conserva solo un resumen por hoja y planta.
+"""
+import csv
+import io
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database.models import Submission
+from excel.parser import ExcelLeido
+from excel.schemas import HOJAS, Hoja
+
+# Columnas de origen comunes a las tres tablas, antes de las de la hoja
+COLUMNAS_ORIGEN = ("submission_id", "proceso_id", "empresa_id", "planta_id", "fila")
+
+
+def _copiar_filas(db: Session, tabla: str, columnas: Tuple[str, ...], filas: Iterable[tuple]) -> None:
+    """
+    COPY ... FROM STDIN en la transacción de la sesión.
+
+    Usa la API de copia de psycopg 3 si está disponible y, si no, CSV con
+    copy_expert de psycopg2.
+    """
+    sql = f"COPY {tabla} ({', '.join(columnas)}) FROM STDIN"
+    dbapi = db.connection().connection.dbapi_connection
+    cursor = dbapi.cursor()
+
+    try:
+        if hasattr(cursor, "copy"):
+            with cursor.copy(sql) as copia:
+                for fila in filas:
+                    copia.write_row(fila)
+        else:
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(filas)
+            buffer.seek(0)
+            cursor.copy_expert(f"{sql} WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def guardar_filas_extraidas(db: Session, submission: Submission, planta_id: int, leido: ExcelLeido) -> dict:
+    """
+    Reemplaza las filas de una planta con las del Excel leído y actualiza el
+    resumen en datos_extraidos. No hace commit.
+
+    Returns:
+        Resumen actualizado de todo el submission
+    """
+    for hoja in HOJAS.values():
+        db.execute(
+            text(f"DELETE FROM {hoja.tabla} WHERE submission_id = :submission_id AND planta_id = :planta_id"),
+            {"submission_id": submission.id, "planta_id": planta_id}
+        )
+
+        leida = leido.hojas.get(hoja.clave)
+        if leida is None or not leida.filas:
+            continue
+
+        origen = (submission.id, submission.proceso_id, submission.empresa_id, planta_id)
+        _copiar_filas(
+            db,
+            hoja.tabla,
+            COLUMNAS_ORIGEN + hoja.nombres_columnas,
+            (origen + (numero,) + fila for numero, fila in enumerate(leida.filas, start=1))
+        )
+
+    return actualizar_resumen(db, submission)
+
+
+def eliminar_filas_planta(db: Session, submission: Submission, planta_id: int) -> dict:
+    """Elimina las filas de una planta y actualiza el resumen. No hace commit."""
+    for hoja in HOJAS.values():
+        db.execute(
+            text(f"DELETE FROM {hoja.tabla} WHERE submission_id = :submission_id AND planta_id = :planta_id"),
+            {"submission_id": submission.id, "planta_id": planta_id}
+        )
+
+    return actualizar_resumen(db, submission)
+
+
+def actualizar_resumen(db: Session, submission: Submission) -> dict:
+    """Recalcula datos_extraidos (filas por hoja y por planta) desde las tablas"""
+    conteos = " UNION ALL ".join(
+        f"SELECT '{hoja.clave}' AS hoja, planta_id, COUNT(*) AS filas "
+        f"FROM {hoja.tabla} WHERE submission_id = :submission_id GROUP BY planta_id"
+        for hoja in HOJAS.values()
+    )
+
+    resumen = {}
+    for fila in db.execute(text(conteos), {"submission_id": submission.id}):
+        hoja = resumen.setdefault(fila.hoja, {"filas": 0, "por_planta": {}})
+        hoja["filas"] += fila.filas
+        hoja["por_planta"][str(fila.planta_id)] = fila.filas
+
+    submission.datos_extraidos = resumen
+    return resumen
+
+
+def contar_filas_hojas(db: Session, submission_id) -> dict:
+    """Cantidad de filas de cada hoja del submission"""
+    conteos = " UNION ALL ".join(
+        f"SELECT '{hoja.clave}' AS hoja, COUNT(*) AS filas FROM {hoja.tabla} WHERE submission_id = :submission_id"
+        for hoja in HOJAS.values()
+    )
+    return {fila.hoja: fila.filas for fila in db.execute(text(conteos), {"submission_id": submission_id})}
+
+
+def leer_pagina_hoja(
+    db: Session,
+    submission_id,
+    hoja: Hoja,
+    cursor: int = 0,
+    limite: int = 500
+) -> Tuple[int, List[dict], Optional[int]]:
+    """
+    Página de filas de una hoja después de `cursor` (id de la última fila ya
+    leída, 0 para empezar), recorrida por el índice (submission_id, id).
+
+    Returns:
+        (total, filas, siguiente_cursor); siguiente_cursor es None en la última página
+    """
+    columnas = ", ".join(("id", "planta_id", "fila") + hoja.nombres_columnas)
+    params = {"submission_id": submission_id, "cursor": cursor, "limite": limite + 1}
+
+    # Se pide una fila extra para saber si hay página siguiente
+    filas = db.execute(text(f"""
+        SELECT {columnas}
+        FROM {hoja.tabla}
+        WHERE submission_id = :submission_id AND id > :cursor
+        ORDER BY id
+        LIMIT :limite
+    """), params).mappings().all()
+
+    total = db.execute(
+        text(f"SELECT COUNT(*) FROM {hoja.tabla} WHERE submission_id = :submission_id"), params
+    ).scalar()
+
+    hay_mas = len(filas) > limite
+    filas = [dict(f) for f in filas[:limite]]
+    siguiente_cursor = filas[-1]["id"] if hay_mas else None
+
+    for fila in filas:
+        del fila["id"]
+
+    return total, filas, siguiente_cursor
+
+
+def filas_hoja(db: Session, submission_id, hoja: Hoja, planta_id: Optional[int] = None) -> List[tuple]:
+    """Filas de una hoja en el orden de `hoja.columnas`, por planta y orden de carga"""
+    filtro_planta = " AND planta_id = :planta_id" if planta_id is not None else ""
+    return [tuple(fila) for fila in db.execute(text(f"""
+        SELECT {', '.join(hoja.nombres_columnas)}
+        FROM {hoja.tabla}
+        WHERE submission_id = :submission_id{filtro_planta}
+        ORDER BY planta_id, id
+    """), {"submission_id": submission_id, "planta_id": planta_id})]
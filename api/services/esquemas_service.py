@@ -0,0 +1,115 @@
+"""
+Servicio de esquemas de datos por país
+
+Cada proceso puede declarar en config["esquema_bd"] el esquema donde viven
+las filas extraídas de sus submissions (datos_cemento, datos_concreto,
+datos_clinker), creado con scripts/migrate_esquemas_pais.py. Los procesos
+sin esquema usan public.
+
+El esquema de un proceso se lee de la base en cada uso (búsqueda por clave
+primaria), sin caché local: así todos los workers ven un cambio de esquema
+apenas se confirma. Cambiar el esquema de un proceso con datos mueve sus
+filas en la misma transacción (cambiar_esquema_proceso), para que no dejen
+de verse hasta la próxima migración.
+"""
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database.connection import usar_esquema_datos
+from database.models import ProcesoMRV
+
+TABLAS_DATOS = ("datos_cemento", "datos_concreto", "datos_clinker")
+
+
+def esquema_proceso(db: Session, proceso_id: str, bloquear: bool = False) -> Optional[str]:
+    """
+    esquema_bd del proceso (None = public).
+
+    Con `bloquear` toma FOR SHARE sobre el proceso hasta el fin de la
+    transacción: si otra transacción está cambiando su esquema, espera a que
+    confirme y devuelve el esquema nuevo (solo en el primario).
+    """
+    consulta = db.query(ProcesoMRV.config["esquema_bd"].astext).filter(ProcesoMRV.id == proceso_id)
+    if bloquear:
+        consulta = consulta.with_for_update(read=True)
+    return consulta.scalar()
+
+
+def usar_esquema_proceso(db: Session, proceso_id: str, bloquear: bool = False) -> None:
+    """
+    Resolver las tablas de datos de la sesión en el esquema del proceso.
+
+    Las rutas que escriben filas de datos pasan `bloquear=True`, para no
+    escribir en el esquema anterior mientras cambiar_esquema_proceso mueve
+    las filas.
+    """
+    usar_esquema_datos(db, esquema_proceso(db, proceso_id, bloquear))
+
+
+def tiene_tablas_datos(conn, esquema: str) -> bool:
+    """El esquema existe y tiene las tablas de datos (`conn`: Session o Connection)"""
+    return bool(conn.execute(text("""
+        SELECT 1 FROM information_schema.tables WHERE table_schema = :esquema AND table_name = 'datos_cemento'
+    """), {"esquema": esquema}).scalar())
+
+
+def crear_tablas_esquema(conn, esquema: str) -> None:
+    """
+    Crear el esquema con sus tablas de datos (mismas columnas e índices que en
+    public). Idempotente. `esquema` debe venir validado (ProcesoConfig.esquema_bd).
+    """
+    conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {esquema}"))
+
+    for tabla in TABLAS_DATOS:
+        # LIKE copia columnas, defaults (secuencia de public) e índices;
+        # las claves foráneas se agregan aparte
+        conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {esquema}.{tabla}
+            (LIKE public.{tabla} INCLUDING DEFAULTS INCLUDING INDEXES)
+        """))
+        for columna, referencia in (("submission_id", "submissions"), ("planta_id", "plantas")):
+            conn.execute(text(f"""
+                DO $$ BEGIN
+                    ALTER TABLE {esquema}.{tabla}
+                    ADD CONSTRAINT fk_{tabla}_{columna}
+                    FOREIGN KEY ({columna}) REFERENCES public.{referencia}(id) ON DELETE CASCADE;
+                EXCEPTION WHEN duplicate_object THEN NULL;
+                END $$
+            """))
+
+
+def mover_filas(conn, procesos: list, origen: str, destino: str) -> Dict[str, int]:
+    """Mover las filas de datos de `procesos` entre esquemas; tabla → filas movidas"""
+    movidas = {}
+    for tabla in TABLAS_DATOS:
+        resultado = conn.execute(text(f"""
+            WITH movidas AS (
+                DELETE FROM {origen}.{tabla} WHERE proceso_id = ANY(:procesos) RETURNING *
+            )
+            INSERT INTO {destino}.{tabla} SELECT * FROM movidas
+        """), {"procesos": procesos})
+        movidas[tabla] = resultado.rowcount
+    return movidas
+
+
+def cambiar_esquema_proceso(db: Session, proceso_id: str, anterior: Optional[str], nuevo: Optional[str]) -> int:
+    """
+    Mover las filas del proceso al esquema nuevo (None = public).
+
+    Crea las tablas del esquema nuevo si faltan. Las filas se buscan en el
+    esquema anterior solo si ya tiene tablas (si no, siguen en public). No
+    hace commit.
+
+    Returns:
+        Filas movidas
+    """
+    origen = anterior if anterior and tiene_tablas_datos(db, anterior) else "public"
+    destino = nuevo or "public"
+    if origen == destino:
+        return 0
+
+    if destino != "public":
+        crear_tablas_esquema(db, destino)
+    return sum(mover_filas(db, [proceso_id], origen, destino).values())
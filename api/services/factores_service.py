@@ -0,0 +1,117 @@
+"""
+Servicio de factores de emisión: caché versionada de la TablaFactores activa
+
+Los factores activos se cargan una vez por worker. Pasado
+FACTORES_CACHE_TTL_SECONDS se verifica con una consulta liviana (cantidad y
+último updated_at) si cambiaron en otro proceso, y solo entonces se recargan.
+Las escrituras de FactorEmision por el ORM en este proceso invalidan la caché
+al hacer commit.
+
+Un cálculo obtiene la tabla una vez (`tabla_vigente`), resuelve todas sus
+líneas en memoria y guarda `tabla.a_dict()` con sus resultados; para
+reproducirlo, `tabla_fijada` devuelve esa misma foto.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from database.models import FactorEmision
+from calculos.factores import TablaFactores, factores_desde_filas
+
+FACTORES_CACHE_TTL_SECONDS = float(os.getenv("FACTORES_CACHE_TTL_SECONDS", "60"))
+
+# Fotos fijadas que se conservan reconstruidas (por versión)
+MAX_FOTOS = 32
+
+_lock = threading.Lock()
+_tabla: Optional[TablaFactores] = None
+_marca = None            # (cantidad, max(updated_at)) de la carga actual
+_verificada_en = 0.0     # time.monotonic() de la última verificación de _marca
+_fotos: "OrderedDict[str, TablaFactores]" = OrderedDict()
+
+# Marca en Session.info de que la transacción modifica factores
+_FACTORES_MODIFICADOS = "factores_modificados"
+
+
+def _marca_actual(db: Session):
+    fila = db.query(func.count(FactorEmision.id), func.max(FactorEmision.updated_at)).one()
+    return tuple(fila)
+
+
+def _cargar(db: Session) -> TablaFactores:
+    filas = db.query(FactorEmision).filter(FactorEmision.activo.is_(True)).all()
+    return TablaFactores(factores_desde_filas(filas))
+
+
+def _recordar(tabla: TablaFactores) -> None:
+    _fotos[tabla.version] = tabla
+    _fotos.move_to_end(tabla.version)
+    while len(_fotos) > MAX_FOTOS:
+        _fotos.popitem(last=False)
+
+
+def tabla_vigente(db: Session) -> TablaFactores:
+    """Factores activos con precedencia país > global, desde la caché si sigue vigente"""
+    global _tabla, _marca, _verificada_en
+
+    with _lock:
+        if _tabla is not None and time.monotonic() - _verificada_en < FACTORES_CACHE_TTL_SECONDS:
+            return _tabla
+
+        marca = _marca_actual(db)
+        if _tabla is None or marca != _marca:
+            _tabla = _cargar(db)
+            _marca = marca
+            _recordar(_tabla)
+
+        _verificada_en = time.monotonic()
+        return _tabla
+
+
+def tabla_fijada(foto: dict) -> TablaFactores:
+    """
+    Tabla de una foto guardada con un cálculo (`TablaFactores.a_dict()`).
+
+    Raises:
+        ValueError si la foto no coincide con su versión
+    """
+    with _lock:
+        tabla = _fotos.get(foto.get("version"))
+        if tabla is not None:
+            return tabla
+
+    tabla = TablaFactores.desde_dict(foto)
+    with _lock:
+        _recordar(tabla)
+    return tabla
+
+
+def invalidar_factores() -> None:
+    """Forzar la verificación de la marca en el próximo uso"""
+    global _verificada_en
+
+    with _lock:
+        _verificada_en = 0.0
+
+
+@event.listens_for(Session, "after_flush")
+def _marcar_factores_modificados(session: Session, contexto) -> None:
+    if any(isinstance(o, FactorEmision) for o in (*session.new, *session.dirty, *session.deleted)):
+        session.info[_FACTORES_MODIFICADOS] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidar_al_confirmar(session: Session) -> None:
+    # Después del commit: una recarga anterior leería los factores sin el cambio
+    if session.info.pop(_FACTORES_MODIFICADOS, False):
+        invalidar_factores()
+
+
+@event.listens_for(Session, "after_rollback")
+def _descartar_marca(session: Session) -> None:
+    session.info.pop(_FACTORES_MODIFICADOS, None)
@@ -0,0 +1,153 @@
+"""
+Servicio del índice histórico de indicadores por planta (agregados_historicos)
+
+Al aprobar un submission a nivel FICEM se calculan sus indicadores por planta
+desde datos_cemento, datos_clinker y datos_concreto y se guardan por ciclo.
+Las validaciones interanual y de atípicos comparan los indicadores del
+submission en curso con el ciclo anterior del mismo país y tipo de proceso
+con una sola consulta al índice.
+"""
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database.models import AgregadoHistorico, Submission, TipoProceso
+from excel.validaciones import INDICADORES, configuradas, validar_atipicos, validar_interanual
+
+def sql_indicadores(filtro: str) -> str:
+    """
+    Indicadores por submission y planta de las filas que cumplen `filtro`.
+
+    Los promedios se ponderan por producción (o volumen) considerando solo las
+    filas con ambos valores. `filtro` es una condición SQL sobre las columnas
+    de las tablas de datos (ej: "submission_id = :submission_id"); el
+    backfill de scripts/migrate_agregados_historicos.py usa la misma consulta
+    sobre todos los submissions.
+    """
+    return f"""
+    WITH cemento AS (
+        SELECT submission_id, planta_id,
+               SUM(produccion_t) AS produccion_cemento_t,
+               SUM(factor_clinker * produccion_t) / NULLIF(SUM(produccion_t) FILTER (WHERE factor_clinker IS NOT NULL), 0) AS factor_clinker,
+               SUM(co2_kg_t * produccion_t) / NULLIF(SUM(produccion_t) FILTER (WHERE co2_kg_t IS NOT NULL), 0) AS co2_cemento_kg_t
+        FROM datos_cemento WHERE {filtro} GROUP BY submission_id, planta_id
+    ), clinker AS (
+        SELECT submission_id, planta_id,
+               SUM(produccion_t) AS produccion_clinker_t,
+               SUM(combustible_gj) / NULLIF(SUM(produccion_t) FILTER (WHERE combustible_gj IS NOT NULL), 0) AS intensidad_termica_gj_t,
+               SUM(co2_kg_t * produccion_t) / NULLIF(SUM(produccion_t) FILTER (WHERE co2_kg_t IS NOT NULL), 0) AS co2_clinker_kg_t
+        FROM datos_clinker WHERE {filtro} GROUP BY submission_id, planta_id
+    ), concreto AS (
+        SELECT submission_id, planta_id,
+               SUM(volumen_m3) AS volumen_concreto_m3,
+               SUM(co2_kg_m3 * volumen_m3) / NULLIF(SUM(volumen_m3) FILTER (WHERE co2_kg_m3 IS NOT NULL), 0) AS co2_concreto_kg_m3
+        FROM datos_concreto WHERE {filtro} GROUP BY submission_id, planta_id
+    )
+    SELECT COALESCE(ce.submission_id, cl.submission_id, co.submission_id) AS submission_id,
+           COALESCE(ce.planta_id, cl.planta_id, co.planta_id) AS planta_id,
+           produccion_cemento_t, factor_clinker, co2_cemento_kg_t,
+           produccion_clinker_t, intensidad_termica_gj_t, co2_clinker_kg_t,
+           volumen_concreto_m3, co2_concreto_kg_m3
+    FROM cemento ce
+    FULL JOIN clinker cl ON cl.submission_id = ce.submission_id AND cl.planta_id = ce.planta_id
+    FULL JOIN concreto co ON co.submission_id = COALESCE(ce.submission_id, cl.submission_id)
+                         AND co.planta_id = COALESCE(ce.planta_id, cl.planta_id)
+"""
+
+
+# Indicadores por planta de un submission
+SQL_INDICADORES = sql_indicadores("submission_id = :submission_id")
+
+TIPOS_HISTORICOS = ("interanual", "atipicos")
+
+
+def indicadores_submission(db: Session, submission_id) -> Dict[int, dict]:
+    """Indicadores de cada planta del submission (planta_id → indicador → valor)"""
+    return {
+        fila["planta_id"]: {i: fila[i] for i in INDICADORES}
+        for fila in db.execute(text(SQL_INDICADORES), {"submission_id": submission_id}).mappings()
+    }
+
+
+def registrar_historico(db: Session, submission: Submission) -> int:
+    """
+    Guardar (o reemplazar) los indicadores por planta del submission en su ciclo.
+
+    Procesos sin ciclo no se registran. No hace commit.
+
+    Returns:
+        Plantas registradas
+    """
+    columnas = ", ".join(INDICADORES)
+    actualizar = ", ".join(f"{c} = EXCLUDED.{c}" for c in ("empresa_id", "proceso_id", "submission_id") + INDICADORES)
+
+    resultado = db.execute(text(f"""
+        INSERT INTO agregados_historicos
+            (pais, tipo_proceso, ciclo, empresa_id, planta_id, proceso_id, submission_id, {columnas}, updated_at)
+        SELECT e.pais, p.tipo, p.ciclo, s.empresa_id, i.planta_id, s.proceso_id, s.id, {columnas}, now()
+        FROM ({SQL_INDICADORES}) i
+        CROSS JOIN submissions s
+        JOIN empresas e ON e.id = s.empresa_id
+        JOIN procesos_mrv p ON p.id = s.proceso_id
+        WHERE s.id = :submission_id AND p.ciclo IS NOT NULL
+        ON CONFLICT (planta_id, tipo_proceso, ciclo) DO UPDATE
+        SET {actualizar}, updated_at = EXCLUDED.updated_at
+    """), {"submission_id": submission.id})
+
+    return resultado.rowcount
+
+
+def historico_previo(db: Session, pais: str, tipo: TipoProceso, ciclo: str) -> List[AgregadoHistorico]:
+    """Plantas del país en el último ciclo registrado anterior a `ciclo`"""
+    anterior = db.query(AgregadoHistorico.ciclo).filter(
+        AgregadoHistorico.pais == pais,
+        AgregadoHistorico.tipo_proceso == tipo,
+        AgregadoHistorico.ciclo < ciclo
+    ).order_by(AgregadoHistorico.ciclo.desc()).limit(1).scalar_subquery()
+
+    return db.query(AgregadoHistorico).filter(
+        AgregadoHistorico.pais == pais,
+        AgregadoHistorico.tipo_proceso == tipo,
+        AgregadoHistorico.ciclo == anterior
+    ).all()
+
+
+def validar_historico(
+    db: Session,
+    submission: Submission,
+    pais: str,
+    tipo: TipoProceso,
+    ciclo: Optional[str],
+    config: Optional[dict]
+) -> List[dict]:
+    """
+    Validaciones interanual y de atípicos configuradas en el proceso.
+
+    Sin ciclo o sin historial del ciclo anterior se informan como ok.
+    """
+    validaciones = [v for v in configuradas(config) if v.get("tipo") in TIPOS_HISTORICOS]
+    if not validaciones:
+        return []
+
+    actuales = indicadores_submission(db, submission.id)
+    previos = historico_previo(db, pais, tipo, ciclo) if ciclo else []
+
+    nombres = {a.get("planta_id"): a.get("planta_nombre") for a in submission.archivos_excel or []}
+    actuales = {nombres.get(p) or f"Planta {p}": valores for p, valores in actuales.items()}
+    ciclo_previo = previos[0].ciclo if previos else None
+    propios = {
+        nombres.get(h.planta_id) or f"Planta {h.planta_id}": {i: getattr(h, i) for i in INDICADORES}
+        for h in previos if h.empresa_id == submission.empresa_id
+    }
+    pares = [{i: getattr(h, i) for i in INDICADORES} for h in previos if h.empresa_id != submission.empresa_id]
+
+    resultados = []
+    for validacion in validaciones:
+        nivel, params = validacion.get("nivel", "warning"), validacion.get("params") or {}
+        if validacion["tipo"] == "interanual":
+            resultados.append(validar_interanual(actuales, propios, ciclo_previo, nivel, params))
+        else:
+            resultados.append(validar_atipicos(actuales, pares, ciclo_previo, nivel, params))
+
+    return resultados
@@ -0,0 +1,103 @@
+"""
+Servicio de plantillas Excel por proceso
+
+La plantilla base de cada proceso se genera una vez y queda en caché por
+(proceso_id, updated_at): editar el proceso cambia la clave, por lo que no hace
+falta invalidarla. Las descargas pre-pobladas reutilizan esa base y solo
+agregan las filas de la empresa (ver excel/generator.py).
+"""
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from database.models import Empresa, ProcesoMRV, Submission, Usuario
+from api.permissions import predicado_visibilidad
+from api.services.cache_service import CacheTTL
+from api.services.datos_service import filas_hoja
+from api.services.esquemas_service import usar_esquema_proceso
+from excel.generator import PlantillaBase, generar_base, hojas_plantilla
+
+cache_plantillas = CacheTTL(
+    ttl_segundos=float(os.getenv("TEMPLATE_CACHE_TTL_SECONDS", "3600")),
+    max_entradas=64
+)
+
+# Evita que muchas descargas simultáneas de un proceso sin caché generen la base a la vez
+_lock_generacion = threading.Lock()
+
+
+def obtener_base(proceso: ProcesoMRV) -> PlantillaBase:
+    """Plantilla base del proceso, desde la caché o recién generada"""
+    clave = (proceso.id, proceso.updated_at)
+
+    base = cache_plantillas.get(clave)
+    if base is not None:
+        return base
+
+    with _lock_generacion:
+        base = cache_plantillas.get(clave)
+        if base is None:
+            base = generar_base(proceso.id, proceso.nombre, proceso.config)
+            cache_plantillas.set(clave, base)
+
+    return base
+
+
+def submission_previa(db: Session, empresa_id: int, usuario: Usuario):
+    """
+    Último submission de la empresa con datos extraídos (fila con id y proceso_id).
+
+    Raises:
+        HTTPException 403 si existe pero el usuario no puede ver los datos de la empresa
+    """
+    fila = db.query(
+        Submission.id,
+        Submission.proceso_id,
+        predicado_visibilidad(usuario).label("visible")
+    ).join(
+        Empresa, Empresa.id == Submission.empresa_id
+    ).filter(
+        Submission.empresa_id == empresa_id,
+        Submission.datos_extraidos.isnot(None),
+        Submission.datos_extraidos != {}
+    ).order_by(Submission.created_at.desc()).first()
+
+    if fila is None:
+        return None
+
+    if not fila.visible:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tiene permisos para ver los datos de esta empresa"
+        )
+
+    return fila
+
+
+def plantilla_empresa(
+    db: Session,
+    proceso: ProcesoMRV,
+    empresa_id: int,
+    usuario: Usuario,
+    planta_id: Optional[int] = None
+) -> Tuple[Optional[Any], Dict[str, List[tuple]]]:
+    """
+    Filas de la empresa con que pre-poblar la plantilla del proceso.
+
+    Returns:
+        (submission previo o None, clave de hoja → filas); sin submission previo
+        no hay filas y la descarga es la plantilla base
+    """
+    previa = submission_previa(db, empresa_id, usuario)
+    if previa is None:
+        return None, {}
+
+    usar_esquema_proceso(db, previa.proceso_id)
+    filas = {
+        hoja.clave: filas_hoja(db, previa.id, hoja, planta_id)
+        for hoja in hojas_plantilla(proceso.config)
+    }
+    return previa, filas
@@ -0,0 +1,97 @@
+"""
+Servicio de validación incremental de submissions
+
+El resultado de validar el archivo de cada planta se guarda en su entrada de
+archivos_excel bajo "validacion", con el sha256 del archivo y la huella de las
+reglas del proceso. Al validar el submission solo se leen los archivos cuyo
+resultado no está vigente (archivo reemplazado o reglas cambiadas); las reglas
+entre plantas usan los agregados guardados de cada archivo.
+
+Estructura de archivos_excel[i]["validacion"]:
+    {
+        "sha256": "9a9d60f8...",       # archivo validado
+        "huella": "1c0e5b7a...",       # huella_validaciones(config)
+        "resultados": [{"tipo": "estructura", "status": "ok", ...}],
+        "agregados": {"cemento": {"filas": 120, "meses": [1, 2, ...]}}
+    }
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from database.models import Submission
+from api.services.archivos_service import ruta_archivo
+from api.services.datos_service import guardar_filas_extraidas
+from excel.procesamiento import ResultadoArchivo, procesar_archivos
+from excel.validaciones import combinar_validaciones, huella_validaciones, validar_entre_plantas
+
+
+def registrar_lectura(archivo: dict, resultado: ResultadoArchivo, config: Optional[dict]) -> dict:
+    """Entrada de archivos_excel con el resumen de la lectura y su validación"""
+    leido = resultado.leido
+    return {
+        **archivo,
+        "hojas": leido.resumen(),
+        "errores": [e for h in leido.hojas.values() for e in h.errores],
+        "hojas_desconocidas": leido.hojas_desconocidas,
+        "validacion": {
+            "sha256": archivo.get("sha256"),
+            "huella": huella_validaciones(config),
+            "resultados": resultado.validaciones,
+            "agregados": resultado.agregados,
+        },
+    }
+
+
+def validacion_vigente(archivo: dict, huella: str) -> bool:
+    """El resultado guardado corresponde al archivo actual y a las reglas actuales"""
+    validacion = archivo.get("validacion") or {}
+    return (
+        bool(archivo.get("sha256"))
+        and validacion.get("sha256") == archivo["sha256"]
+        and validacion.get("huella") == huella
+    )
+
+
+async def validar_archivos(db: Session, submission: Submission, config: Optional[dict]) -> Tuple[List[dict], int]:
+    """
+    Validar el submission leyendo solo los archivos sin resultado vigente.
+
+    Los archivos leídos actualizan su entrada en archivos_excel; sus filas solo
+    se vuelven a extraer si no provienen de este mismo archivo (el upload ya
+    las extrae). No hace commit.
+
+    Returns:
+        (validaciones combinadas, cantidad de archivos leídos)
+    """
+    huella = huella_validaciones(config)
+    archivos = list(submission.archivos_excel or [])
+
+    pendientes = [i for i, a in enumerate(archivos) if not validacion_vigente(a, huella)]
+    resultados = await procesar_archivos([ruta_archivo(archivos[i]) or "" for i in pendientes], config)
+
+    errores = {}
+    for i, resultado in zip(pendientes, resultados):
+        if resultado.error:
+            errores[i] = resultado.error
+            continue
+        filas_vigentes = (archivos[i].get("validacion") or {}).get("sha256") == archivos[i].get("sha256")
+        archivos[i] = registrar_lectura(archivos[i], resultado, config)
+        if not filas_vigentes or not archivos[i].get("sha256"):
+            guardar_filas_extraidas(db, submission, archivos[i]["planta_id"], resultado.leido)
+
+    por_planta, agregados = [], []
+    for i, archivo in enumerate(archivos):
+        planta = archivo.get("planta_nombre") or f"Planta {archivo.get('planta_id')}"
+
+        if i in errores:
+            por_planta.append((planta, [{"tipo": "estructura", "status": "error", "mensaje": errores[i]}]))
+            agregados.append((planta, archivo.get("sha256"), None))
+        else:
+            validacion = archivo["validacion"]
+            por_planta.append((planta, validacion["resultados"]))
+            agregados.append((planta, archivo.get("sha256"), validacion["agregados"]))
+
+    submission.archivos_excel = archivos
+
+    return combinar_validaciones(por_planta) + validar_entre_plantas(config, agregados), len(pendientes)
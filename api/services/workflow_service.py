@@ -0,0 +1,165 @@
+"""
+Servicio de workflow de submissions: transiciones de estado y log de eventos
+"""
+from datetime import datetime
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from database.models import Submission, SubmissionEvento, EstadoSubmission, Usuario
+from api.permissions import invalidar_tareas_pendientes
+
+# Marca en Session.info de que la transacción incluye un cambio de estado
+_TRANSICION_PENDIENTE = "transicion_pendiente"
+
+
+def registrar_transicion(
+    db: Session,
+    submission: Submission,
+    estado: EstadoSubmission,
+    usuario: Usuario,
+    comentario: Optional[str] = None
+) -> SubmissionEvento:
+    """
+    Registra un cambio de estado en el historial JSONB y en submission_eventos.
+
+    No hace commit: el evento se persiste en la misma transacción que el
+    cambio de estado del submission.
+
+    Args:
+        db: Sesión de BD
+        submission: Submission que cambia de estado
+        estado: Nuevo estado
+        usuario: Usuario que ejecuta la transición
+        comentario: Comentario opcional asociado a la transición
+
+    Returns:
+        SubmissionEvento agregado a la sesión
+    """
+    fecha = datetime.utcnow()
+    submission.estado_actual = estado
+
+    entrada = {
+        "estado": estado.value,
+        "fecha": fecha.isoformat(),
+        "user_id": usuario.id,
+        "user_nombre": usuario.nombre
+    }
+    if comentario is not None:
+        entrada["comentario"] = comentario
+
+    # Reasignar la lista para que SQLAlchemy detecte el cambio en el JSONB
+    submission.workflow_history = (submission.workflow_history or []) + [entrada]
+
+    evento = SubmissionEvento(
+        submission_id=submission.id,
+        estado=estado,
+        fecha=fecha,
+        user_id=usuario.id
+    )
+    db.add(evento)
+    db.info[_TRANSICION_PENDIENTE] = True
+
+    return evento
+
+
+def _conflicto_version(estado_actual: Optional[EstadoSubmission], version: Optional[int]) -> HTTPException:
+    """HTTP 409 con el estado vigente del submission"""
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail={
+            "mensaje": "El submission fue modificado por otro usuario. Recargue y vuelva a intentar.",
+            "estado_actual": estado_actual.value if estado_actual else None,
+            "version": version
+        }
+    )
+
+
+def verificar_version(submission: Submission, version_esperada: Optional[int]) -> None:
+    """
+    Rechaza la operación si el cliente trabajó sobre una versión anterior.
+
+    Permite detectar el conflicto antes de ejecutar la transición cuando el
+    frontend envía la versión que tenía en pantalla.
+    """
+    if version_esperada is not None and version_esperada != submission.version:
+        raise _conflicto_version(submission.estado_actual, submission.version)
+
+
+def confirmar_cambios(db: Session, submission: Submission) -> None:
+    """
+    Hace commit de los cambios de un submission con control optimista.
+
+    El UPDATE se emite como `UPDATE submissions ... WHERE id = ? AND version = ?`;
+    si otra request confirmó antes una transición sobre el mismo submission no
+    se actualiza ninguna fila, se revierte la transacción (incluidos los eventos
+    registrados) y se responde HTTP 409 con el estado vigente.
+
+    Si la transacción incluía una transición, invalida la caché de tareas
+    pendientes una vez confirmada.
+    """
+    submission_id = submission.id
+    hubo_transicion = db.info.pop(_TRANSICION_PENDIENTE, False)
+
+    try:
+        db.commit()
+    except StaleDataError:
+        db.rollback()
+        actual = db.query(Submission.estado_actual, Submission.version).filter(
+            Submission.id == submission_id
+        ).first()
+        if actual is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Submission {submission_id} no encontrado"
+            )
+        raise _conflicto_version(actual.estado_actual, actual.version)
+
+    if hubo_transicion:
+        invalidar_tareas_pendientes()
+
+
+def subconsulta_entrada_estado():
+    """
+    Subconsulta correlacionada con la fecha de entrada al estado actual.
+
+    Se agrega como columna a las consultas sobre Submission y se resuelve con
+    el índice (submission_id, fecha) de submission_eventos.
+    """
+    return select(func.max(SubmissionEvento.fecha)).where(
+        SubmissionEvento.submission_id == Submission.id
+    ).correlate(Submission).scalar_subquery()
+
+
+def calcular_dias_en_estado(fecha_entrada: Optional[datetime], ahora: Optional[datetime] = None) -> Optional[int]:
+    """Días completos transcurridos desde la entrada al estado actual"""
+    if fecha_entrada is None:
+        return None
+    ahora = ahora or datetime.utcnow()
+    return max((ahora - fecha_entrada).days, 0)
+
+
+def obtener_duracion_estados(db: Session, proceso_id: str, pais: Optional[str] = None) -> List[dict]:
+    """
+    Lee el resumen precalculado de duración por estado (mv_duracion_estados).
+
+    La vista se refresca con `python scripts/migrate_submission_eventos.py --refresh`.
+    """
+    sql = """
+        SELECT proceso_id, pais, estado, tramos_cerrados, en_curso,
+               dias_promedio, dias_p50, dias_p90, dias_max_en_curso
+        FROM mv_duracion_estados
+        WHERE proceso_id = :proceso_id
+    """
+    params = {"proceso_id": proceso_id}
+
+    if pais:
+        sql += " AND pais = :pais"
+        params["pais"] = pais
+
+    sql += " ORDER BY pais, estado"
+
+    return [dict(fila) for fila in db.execute(text(sql), params).mappings().all()]
@@ -0,0 +1,13 @@
+"""
+Benchmarks de rendimiento de 4C FICEM CORE
+
+- benchmarks.api: rutas críticas de la API sobre un dataset sintético
+- benchmarks.datos_sinteticos: generación reproducible del dataset
+
+benchmarks/baseline_api.json es la referencia de `benchmarks.api --baseline`
+(dataset por defecto); se regenera con --guardar-baseline al cambiar de
+máquina o cuando un cambio de rendimiento es intencional.
+
+Requieren una base PostgreSQL dedicada en BENCH_DATABASE_URL (se recrea el
+esquema completo en cada corrida).
+"""
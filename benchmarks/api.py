@@ -0,0 +1,261 @@
+"""
+Benchmark de rutas críticas de la API
+
+Genera el dataset sintético en BENCH_DATABASE_URL y ejecuta la app en proceso
+con httpx.ASGITransport (sin red ni uvicorn), midiendo por escenario la
+latencia (p50/p95/p99) y las consultas SQL por request (header X-DB-Queries
+del middleware de métricas).
+
+Uso:
+    export BENCH_DATABASE_URL=postgresql://localhost/ficem_bench
+    python -m benchmarks.api --iteraciones 200 --salida benchmarks/resultados/api.json
+    python -m benchmarks.api --guardar-baseline benchmarks/baseline_api.json
+    python -m benchmarks.api --baseline benchmarks/baseline_api.json   # exit 1 si hay regresión
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.datos_sinteticos import ConfigDataset, url_bench, excel_sintetico
+from benchmarks.estadisticas import resumir_latencias, guardar_json, cargar_json, comparar_con_baseline
+
+
+class Medidor:
+    """Ejecuta requests y acumula latencia y consultas por escenario"""
+
+    def __init__(self, cliente):
+        self.cliente = cliente
+        self.latencias = defaultdict(list)
+        self.consultas = defaultdict(list)
+        self.errores = defaultdict(int)
+        self.registrar = True
+
+    async def request(self, escenario: str, metodo: str, url: str, esperado=(200,), **kwargs):
+        inicio = time.perf_counter()
+        respuesta = await self.cliente.request(metodo, url, **kwargs)
+        duracion_ms = (time.perf_counter() - inicio) * 1000
+
+        if self.registrar:
+            self.latencias[escenario].append(duracion_ms)
+            self.consultas[escenario].append(int(respuesta.headers.get("x-db-queries", 0)))
+            if respuesta.status_code not in esperado:
+                self.errores[escenario] += 1
+
+        return respuesta
+
+    def resultados(self) -> dict:
+        resultado = {}
+        for escenario, latencias in sorted(self.latencias.items()):
+            consultas = self.consultas[escenario]
+            resultado[escenario] = {
+                **resumir_latencias(latencias),
+                "consultas_media": round(sum(consultas) / len(consultas), 2),
+                "consultas_max": max(consultas),
+                "errores": self.errores[escenario],
+            }
+        return resultado
+
+
+async def _token(cliente, email: str, password: str) -> dict:
+    respuesta = await cliente.post("/api/v1/auth/login", json={"email": email, "password": password})
+    respuesta.raise_for_status()
+    return {"Authorization": f"Bearer {respuesta.json()['access_token']}"}
+
+
+async def escenarios_lectura(medidor: Medidor, manifiesto: dict, tokens: dict, rng: random.Random, iteraciones: int):
+    """Listados, detalle, bandeja de tareas y resultados"""
+    pais = rng.choice(list(manifiesto["coordinadores"]))
+    submissions = manifiesto["submissions"]
+    aprobados = [s for s in submissions if s["estado"] in ("APROBADO_FICEM", "PUBLICADO")]
+
+    for _ in range(iteraciones):
+        empresa = rng.choice(manifiesto["empresas"])
+        proceso = manifiesto["procesos_activos"][empresa["pais"]]
+
+        await medidor.request(
+            "submissions.listar_admin", "GET", f"/api/v1/procesos/{proceso}/submissions",
+            params={"limit": 50}, headers=tokens["admin"]
+        )
+        await medidor.request(
+            "submissions.listar_coordinador", "GET",
+            f"/api/v1/procesos/{manifiesto['procesos_activos'][pais]}/submissions",
+            params={"limit": 50}, headers=tokens["coordinador"]
+        )
+        await medidor.request(
+            "submissions.detalle", "GET", f"/api/v1/submissions/{rng.choice(submissions)['id']}",
+            headers=tokens["admin"]
+        )
+        await medidor.request("auth.mis_tareas", "GET", "/api/v1/auth/mis-tareas", headers=tokens["supervisor"])
+
+        if aprobados:
+            await medidor.request(
+                "submissions.resultados", "GET", f"/api/v1/submissions/{rng.choice(aprobados)['id']}/results",
+                headers=tokens["admin"]
+            )
+
+
+async def escenario_login(medidor: Medidor, manifiesto: dict, rng: random.Random, iteraciones: int):
+    for _ in range(iteraciones):
+        empresa = rng.choice(manifiesto["empresas"])
+        await medidor.request(
+            "auth.login", "POST", "/api/v1/auth/login",
+            json={"email": empresa["informante"], "password": manifiesto["password"]}
+        )
+
+
+async def escenario_flujo(medidor: Medidor, manifiesto: dict, tokens: dict, iteraciones: int):
+    """
+    Flujo completo por empresa: crear → upload → validate → submit →
+    aprobar-empresa → aprobar-ficem. Cada empresa admite un solo submission
+    activo por proceso, por lo que las iteraciones se limitan a las empresas.
+    """
+    archivo = excel_sintetico()
+    cliente = medidor.cliente
+
+    for empresa in manifiesto["empresas"][:iteraciones]:
+        proceso = manifiesto["procesos_flujo"][empresa["pais"]]
+        informante = await _token(cliente, empresa["informante"], manifiesto["password"])
+        supervisor = await _token(cliente, empresa["supervisor"], manifiesto["password"])
+
+        respuesta = await medidor.request(
+            "flujo.crear", "POST", f"/api/v1/procesos/{proceso}/submissions", esperado=(201,),
+            json={"empresa_id": empresa["id"], "planta_id": empresa["plantas"][0]}, headers=informante
+        )
+        if respuesta.status_code != 201:
+            continue
+        submission_id = respuesta.json()["id"]
+
+        for planta_id in empresa["plantas"]:
+            await medidor.request(
+                "flujo.upload", "POST", f"/api/v1/submissions/{submission_id}/upload",
+                params={"planta_id": planta_id}, headers=informante,
+                files={"archivo": (f"planta_{planta_id}.xlsx", archivo,
+                                   "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")}
+            )
+
+        await medidor.request("flujo.validar", "POST", f"/api/v1/submissions/{submission_id}/validate", headers=informante)
+        await medidor.request("flujo.enviar", "POST", f"/api/v1/submissions/{submission_id}/submit", headers=informante)
+        await medidor.request(
+            "flujo.aprobar_empresa", "POST", f"/api/v1/submissions/{submission_id}/aprobar-empresa",
+            json={"accion": "aprobar", "comentario": "OK empresa"}, headers=supervisor
+        )
+        await medidor.request(
+            "flujo.aprobar_ficem", "POST", f"/api/v1/submissions/{submission_id}/aprobar-ficem",
+            json={"accion": "aprobar", "comentario": "OK FICEM"}, headers=tokens["admin"]
+        )
+
+
+async def ejecutar(iteraciones: int, calentamiento: int, semilla: int, config: ConfigDataset) -> dict:
+    import httpx
+    from database.connection import engine
+    from benchmarks.datos_sinteticos import generar_dataset
+    from api.main import app
+
+    print("Generando dataset sintético...")
+    manifiesto = generar_dataset(engine, config)
+    print(f"  - {manifiesto['conteos']}")
+
+    rng = random.Random(semilla)
+    transporte = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as cliente:
+        medidor = Medidor(cliente)
+        pais = rng.choice(list(manifiesto["coordinadores"]))
+        empresa = rng.choice(manifiesto["empresas"])
+        tokens = {
+            "admin": await _token(cliente, manifiesto["admin"], manifiesto["password"]),
+            "coordinador": await _token(cliente, manifiesto["coordinadores"][pais], manifiesto["password"]),
+            "supervisor": await _token(cliente, empresa["supervisor"], manifiesto["password"]),
+        }
+
+        print(f"Calentamiento ({calentamiento} iteraciones)...")
+        medidor.registrar = False
+        await escenarios_lectura(medidor, manifiesto, tokens, rng, calentamiento)
+        medidor.registrar = True
+
+        print(f"Midiendo ({iteraciones} iteraciones)...")
+        await escenario_login(medidor, manifiesto, rng, max(iteraciones // 10, 5))
+        await escenarios_lectura(medidor, manifiesto, tokens, rng, iteraciones)
+        await escenario_flujo(medidor, manifiesto, tokens, iteraciones)
+
+    return {
+        "fecha": datetime.utcnow().isoformat(),
+        "iteraciones": iteraciones,
+        "dataset": manifiesto["config"],
+        "conteos": manifiesto["conteos"],
+        "escenarios": medidor.resultados(),
+    }
+
+
+def imprimir(resultado: dict) -> None:
+    print(f"\n{'Escenario':<34}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'consultas':>11}{'errores':>9}")
+    for escenario, r in resultado["escenarios"].items():
+        print(f"{escenario:<34}{r['n']:>6}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}"
+              f"{r['consultas_media']:>11.1f}{r['errores']:>9}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Benchmark de rutas críticas de la API')
+    parser.add_argument('--iteraciones', type=int, default=100)
+    parser.add_argument('--calentamiento', type=int, default=10)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--paises', type=int, default=4)
+    parser.add_argument('--empresas', type=int, default=10, help='Empresas por país')
+    parser.add_argument('--plantas', type=int, default=3, help='Plantas por empresa')
+    parser.add_argument('--ciclos', type=int, default=3, help='Procesos por país')
+    parser.add_argument('--filas', type=int, default=60, help='Filas de datos por submission')
+    parser.add_argument('--remitos', type=int, default=5000, help='Remitos de concreto')
+    parser.add_argument('--salida', help='Guardar resultados en JSON')
+    parser.add_argument('--baseline', help='Comparar contra un baseline JSON (exit 1 si hay regresión)')
+    parser.add_argument('--guardar-baseline', help='Guardar esta corrida como baseline')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='Tolerancia de latencia p95 (0.25 = 25%%)')
+
+    args = parser.parse_args()
+
+    url_bench()
+    # Métricas activas para obtener X-DB-Queries
+    os.environ["METRICS_ENABLED"] = "True"
+    # Los archivos subidos no quedan en el UPLOAD_DIR del repo
+    os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="ficem-bench-"))
+
+    resultado = asyncio.run(ejecutar(
+        args.iteraciones, args.calentamiento, args.semilla,
+        ConfigDataset(
+            paises=args.paises, empresas_por_pais=args.empresas, plantas_por_empresa=args.plantas,
+            ciclos=args.ciclos, filas_por_submission=args.filas, remitos=args.remitos, semilla=args.semilla
+        )
+    ))
+    imprimir(resultado)
+
+    if args.salida:
+        guardar_json(args.salida, resultado)
+    if args.guardar_baseline:
+        guardar_json(args.guardar_baseline, resultado)
+        print(f"\n✅ Baseline guardado en {args.guardar_baseline}")
+
+    fallas = [f"{e}: {r['errores']} respuestas con error" for e, r in resultado["escenarios"].items() if r["errores"]]
+
+    if args.baseline:
+        # Consultas por request sin tolerancia: un N+1 es una regresión aunque sea rápido
+        fallas += comparar_con_baseline(
+            resultado["escenarios"],
+            cargar_json(args.baseline)["escenarios"],
+            {"p95_ms": args.tolerancia, "consultas_max": 0.0}
+        )
+
+    if fallas:
+        print("\n❌ Regresiones:")
+        for falla in fallas:
+            print(f"  - {falla}")
+        sys.exit(1)
+
+    print("\n✅ Sin regresiones")
@@ -0,0 +1,151 @@
+"""
+Benchmark de arranque: tiempo de import de la API y de los scripts
+
+Importa cada módulo en un intérprete nuevo con `python -X importtime` y
+reporta la mediana del tiempo de import, los módulos que más pesan
+(tiempo acumulado) y qué dependencias pesadas (pandas, numpy, openpyxl,
+xlsxwriter) quedaron cargadas. Ninguna de ellas debería cargarse al
+arrancar: se importan con el primer cálculo, lectura o generación de Excel.
+
+Uso:
+    python -m benchmarks.arranque
+    python -m benchmarks.arranque --modulo api.main --repeticiones 10 --top 20
+    python -m benchmarks.arranque --salida benchmarks/resultados/arranque.json
+    python -m benchmarks.arranque --baseline benchmarks/baseline_arranque.json   # exit 1 si hay regresión
+"""
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.estadisticas import guardar_json, cargar_json, comparar_con_baseline
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+MODULOS_DEFECTO = ["api.main", "database.connection", "api.services.calculos_service"]
+DEPENDENCIAS_PESADAS = ["pandas", "numpy", "openpyxl", "xlsxwriter"]
+
+# "import time:       237 |      29818 |     certifi.core"
+_LINEA_IMPORTTIME = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)$")
+
+
+def _entorno() -> Dict[str, str]:
+    entorno = dict(os.environ)
+    # La configuración exige JWT_SECRET_KEY al importar la API
+    entorno.setdefault("JWT_SECRET_KEY", "benchmark-arranque")
+    entorno["PYTHONPATH"] = os.pathsep.join(filter(None, [RAIZ, entorno.get("PYTHONPATH")]))
+    return entorno
+
+
+def importar(modulo: str) -> Tuple[Dict[str, int], List[str]]:
+    """
+    Importa `modulo` en un intérprete nuevo.
+
+    Returns:
+        (módulo → microsegundos acumulados, dependencias pesadas cargadas)
+    """
+    codigo = (
+        f"import {modulo}, sys; "
+        f"print(','.join(m for m in {DEPENDENCIAS_PESADAS!r} if m in sys.modules))"
+    )
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=RAIZ, env=_entorno(), capture_output=True, text=True
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {modulo}:\n{proceso.stderr[-2000:]}")
+
+    acumulados = {}
+    for linea in proceso.stderr.splitlines():
+        coincidencia = _LINEA_IMPORTTIME.match(linea)
+        if coincidencia:
+            # Un módulo aparece una sola vez (la primera vez que se importa)
+            acumulados[coincidencia.group(4)] = int(coincidencia.group(2))
+
+    cargadas = [m for m in proceso.stdout.strip().split(",") if m]
+    return acumulados, cargadas
+
+
+def medir(modulo: str, repeticiones: int, top: int) -> dict:
+    """Mediana del tiempo de import de `modulo` y sus módulos más pesados"""
+    corridas = [importar(modulo) for _ in range(repeticiones)]
+
+    totales = [acumulados.get(modulo, 0) / 1000 for acumulados, _ in corridas]
+    medianas = {
+        nombre: statistics.median(acumulados.get(nombre, 0) for acumulados, _ in corridas) / 1000
+        for nombre in corridas[0][0]
+        if nombre != modulo
+    }
+    # Solo raíces de paquete: los submódulos ya suman dentro de su paquete
+    raices = {n: ms for n, ms in medianas.items() if "." not in n or n.split(".")[0] == modulo.split(".")[0]}
+    pesados = sorted(raices.items(), key=lambda par: par[1], reverse=True)[:top]
+
+    return {
+        "modulo": modulo,
+        "repeticiones": repeticiones,
+        "ms_min": round(min(totales), 1),
+        "ms_mediana": round(statistics.median(totales), 1),
+        "modulos_cargados": len(corridas[0][0]),
+        "dependencias_pesadas": corridas[0][1],
+        "mas_pesados": [{"modulo": n, "ms": round(ms, 1)} for n, ms in pesados],
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Tiempo de import de la API y los scripts')
+    parser.add_argument('--modulo', action='append', help=f'Módulos a medir (defecto: {", ".join(MODULOS_DEFECTO)})')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='Módulos más pesados a listar')
+    parser.add_argument('--salida', help='Guardar resultados en JSON')
+    parser.add_argument('--baseline', help='Comparar contra un baseline JSON (exit 1 si hay regresión)')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='Tolerancia de tiempo (0.25 = 25%%)')
+
+    args = parser.parse_args()
+
+    resultados = []
+    for modulo in args.modulo or MODULOS_DEFECTO:
+        resultado = medir(modulo, args.repeticiones, args.top)
+        resultados.append(resultado)
+
+        pesadas = ", ".join(resultado["dependencias_pesadas"]) or "ninguna"
+        print(f"\n{modulo}: {resultado['ms_mediana']:.0f} ms (mediana de {args.repeticiones}), "
+              f"{resultado['modulos_cargados']} módulos, dependencias pesadas: {pesadas}")
+        for fila in resultado["mas_pesados"]:
+            print(f"  {fila['modulo']:<48}{fila['ms']:>10.1f} ms")
+
+    salida = {
+        "fecha": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }
+
+    if args.salida:
+        guardar_json(args.salida, salida)
+        print(f"\n✅ Resultados guardados en {args.salida}")
+
+    if args.baseline:
+        actuales = {r["modulo"]: r for r in resultados}
+        base = {r["modulo"]: r for r in cargar_json(args.baseline)["resultados"] if r["modulo"] in actuales}
+        regresiones = comparar_con_baseline(actuales, base, {"ms_mediana": args.tolerancia})
+
+        for modulo, referencia in base.items():
+            nuevas = set(actuales[modulo]["dependencias_pesadas"]) - set(referencia["dependencias_pesadas"])
+            if nuevas:
+                regresiones.append(f"{modulo}: ahora carga {', '.join(sorted(nuevas))} al importar")
+
+        if regresiones:
+            print("\n❌ Regresiones:")
+            for regresion in regresiones:
+                print(f"  - {regresion}")
+            sys.exit(1)
+
+        print("\n✅ Sin regresiones")
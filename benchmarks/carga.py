@@ -0,0 +1,440 @@
+"""
+Generador de carga por escenarios de cierre de ciclo
+
+Simula usuarios virtuales por rol recorriendo los endpoints reales del
+workflow contra un stack local (uvicorn + PostgreSQL), para dimensionar
+workers y el pool de conexiones antes de `deadline_envio`:
+
+- INFORMANTE_EMPRESA: bandeja, crea su submission, sube un Excel por planta,
+  valida y envía
+- SUPERVISOR_EMPRESA: bandeja, lista los ENVIADO de su empresa y los aprueba
+- COORDINADOR_PAIS: listados paginados de su país, detalle y SLA por estado
+- ADMIN_PROCESO: lista los APROBADO_EMPRESA y los aprueba a nivel FICEM
+
+Reporta throughput, tasa de error y percentiles de latencia por operación y
+por rol. Los 409 (otro usuario transicionó primero) se cuentan como
+conflictos; cualquier otro 4xx (incluidos los 400 de validación o de estado)
+es un error. Para que el generador no provoque esos 400 por sí mismo, cada
+empresa tiene a lo sumo un informante que carga (los sobrantes solo
+consultan) y supervisores y administradores no aprueban un submission cuyo
+detalle ya muestra otro estado.
+
+Uso:
+    # 1. Dataset en la misma base que usa el servidor
+    BENCH_DATABASE_URL=... python -m benchmarks.datos_sinteticos --empresas 50 --manifiesto /tmp/manifiesto.json
+    # 2. Servidor: DATABASE_URL=... uvicorn api.main:app --workers 4
+    # 3. Carga
+    python -m benchmarks.carga --manifiesto /tmp/manifiesto.json --usuarios 100 --duracion 120 --escenario cierre
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.datos_sinteticos import excel_sintetico
+from benchmarks.estadisticas import resumir_latencias, guardar_json, cargar_json
+
+# Mezclas de roles predefinidas (pesos relativos)
+ESCENARIOS = {
+    # Semana previa a deadline_envio: todos los informantes cargan y envían
+    "cierre": {"INFORMANTE_EMPRESA": 70, "SUPERVISOR_EMPRESA": 15, "COORDINADOR_PAIS": 10, "ADMIN_PROCESO": 5},
+    # Posterior al cierre: revisión y aprobaciones
+    "revision": {"INFORMANTE_EMPRESA": 10, "SUPERVISOR_EMPRESA": 35, "COORDINADOR_PAIS": 25, "ADMIN_PROCESO": 30},
+    "normal": {"INFORMANTE_EMPRESA": 30, "SUPERVISOR_EMPRESA": 20, "COORDINADOR_PAIS": 40, "ADMIN_PROCESO": 10},
+}
+
+# Solo la concurrencia optimista es esperable bajo carga; un 400 es un error real
+CONFLICTOS = {409}
+TIPO_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class Estadisticas:
+    """Latencias y resultados por operación y por rol"""
+
+    def __init__(self):
+        self.latencias = defaultdict(list)
+        self.por_rol = defaultdict(list)
+        self.errores = defaultdict(int)
+        self.conflictos = defaultdict(int)
+        self.detalle_errores = defaultdict(int)
+
+    def registrar(self, rol: str, operacion: str, duracion_ms: float, status: Optional[int], excepcion: str = ""):
+        self.latencias[operacion].append(duracion_ms)
+        self.por_rol[rol].append(duracion_ms)
+        if status is None or status >= 500 or (status >= 400 and status not in CONFLICTOS):
+            self.errores[operacion] += 1
+            self.detalle_errores[f"{operacion} -> {status or excepcion or 'sin respuesta'}"] += 1
+        elif status in CONFLICTOS:
+            self.conflictos[operacion] += 1
+
+    def reporte(self, segundos: float) -> dict:
+        total = sum(len(v) for v in self.latencias.values())
+        errores = sum(self.errores.values())
+        todas = [l for valores in self.latencias.values() for l in valores]
+        return {
+            "requests": total,
+            "duracion_s": round(segundos, 1),
+            "throughput_rps": round(total / segundos, 1) if segundos else 0,
+            "tasa_error": round(errores / total, 4) if total else 0,
+            "latencia": resumir_latencias(todas),
+            "operaciones": {
+                operacion: {
+                    **resumir_latencias(latencias),
+                    "rps": round(len(latencias) / segundos, 2),
+                    "errores": self.errores[operacion],
+                    "conflictos": self.conflictos[operacion],
+                }
+                for operacion, latencias in sorted(self.latencias.items())
+            },
+            "roles": {rol: resumir_latencias(latencias) for rol, latencias in sorted(self.por_rol.items())},
+            "errores": dict(self.detalle_errores),
+        }
+
+
+class UsuarioVirtual:
+    """Usuario que repite el recorrido de su rol hasta que termina la prueba"""
+
+    def __init__(self, cliente, stats: Estadisticas, rol: str, email: str, password: str,
+                 contexto: dict, espera: float, rng: random.Random):
+        self.cliente = cliente
+        self.stats = stats
+        self.rol = rol
+        self.email = email
+        self.password = password
+        self.contexto = contexto
+        self.espera = espera
+        self.rng = rng
+        self.headers = {}
+
+    async def request(self, operacion: str, metodo: str, url: str, **kwargs):
+        inicio = time.perf_counter()
+        status = None
+        respuesta = None
+        excepcion = ""
+        try:
+            respuesta = await self.cliente.request(metodo, url, headers=self.headers, **kwargs)
+            status = respuesta.status_code
+        except Exception as e:
+            excepcion = type(e).__name__
+        self.stats.registrar(self.rol, operacion, (time.perf_counter() - inicio) * 1000, status, excepcion)
+        return respuesta
+
+    async def pensar(self):
+        # Tiempo de espera exponencial alrededor de la media configurada
+        if self.espera > 0:
+            await asyncio.sleep(self.rng.expovariate(1 / self.espera))
+
+    async def login(self) -> bool:
+        respuesta = await self.request("auth.login", "POST", "/api/v1/auth/login",
+                                       json={"email": self.email, "password": self.password})
+        if respuesta is None or respuesta.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {respuesta.json()['access_token']}"}
+        return True
+
+    async def ejecutar(self, fin: float):
+        if not await self.login():
+            return
+
+        recorrido = {
+            "INFORMANTE_EMPRESA": self.recorrido_informante,
+            "SUPERVISOR_EMPRESA": self.recorrido_supervisor,
+            "COORDINADOR_PAIS": self.recorrido_coordinador,
+            "ADMIN_PROCESO": self.recorrido_admin,
+        }[self.rol]
+
+        while time.monotonic() < fin:
+            await recorrido()
+            await self.pensar()
+
+    async def _submissions(self, operacion: str, proceso: str, **params) -> list:
+        respuesta = await self.request(operacion, "GET", f"/api/v1/procesos/{proceso}/submissions",
+                                       params={"limit": 50, **params})
+        if respuesta is None or respuesta.status_code != 200:
+            return []
+        return respuesta.json()["items"]
+
+    async def recorrido_informante(self):
+        empresa = self.contexto["empresa"]
+        proceso = self.contexto["proceso_flujo"]
+
+        await self.request("auth.mis_tareas", "GET", "/api/v1/auth/mis-tareas")
+
+        if proceso is None:
+            # Sin borradores pendientes: solo consulta el estado de sus envíos
+            await self._submissions("submissions.listar", self.rng.choice(self.contexto["procesos_pais"]),
+                                    empresa_id=empresa["id"])
+            return
+
+        submission_id = self.contexto.get("submission_id")
+        if submission_id is None:
+            respuesta = await self.request("submissions.crear", "POST", f"/api/v1/procesos/{proceso}/submissions",
+                                           json={"empresa_id": empresa["id"], "planta_id": empresa["plantas"][0]})
+            if respuesta is not None and respuesta.status_code == 201:
+                submission_id = respuesta.json()["id"]
+            else:
+                # Ya existe (corrida anterior sobre el mismo dataset)
+                propios = await self._submissions("submissions.listar", proceso, empresa_id=empresa["id"])
+                borradores = [s for s in propios if s["estado_actual"] == "BORRADOR"]
+                if not borradores:
+                    self._siguiente_proceso(proceso)
+                    return
+                submission_id = borradores[0]["id"]
+            self.contexto["submission_id"] = submission_id
+
+        for planta_id in empresa["plantas"]:
+            await self.pensar()
+            await self.request(
+                "submissions.upload", "POST", f"/api/v1/submissions/{submission_id}/upload",
+                params={"planta_id": planta_id},
+                files={"archivo": (f"planta_{planta_id}.xlsx", self.contexto["excel"], TIPO_XLSX)}
+            )
+
+        await self.request("submissions.validar", "POST", f"/api/v1/submissions/{submission_id}/validate")
+        respuesta = await self.request("submissions.enviar", "POST", f"/api/v1/submissions/{submission_id}/submit")
+
+        if respuesta is not None and respuesta.status_code == 200:
+            self._siguiente_proceso(proceso)
+        else:
+            # Error real (ya contado): la próxima vuelta vuelve a buscar el borrador
+            self.contexto["submission_id"] = None
+
+    def _siguiente_proceso(self, actual: str):
+        self.contexto["submission_id"] = None
+        self.contexto.setdefault("procesos_hechos", set()).add(actual)
+        pendientes = [p for p in self.contexto["procesos_pais"] if p not in self.contexto["procesos_hechos"]]
+        self.contexto["proceso_flujo"] = pendientes[0] if pendientes else None
+
+    async def recorrido_supervisor(self):
+        empresa = self.contexto["empresa"]
+        await self.request("auth.mis_tareas", "GET", "/api/v1/auth/mis-tareas")
+
+        for proceso in self.contexto["procesos_pais"]:
+            enviados = await self._submissions("submissions.listar", proceso,
+                                               empresa_id=empresa["id"], estado="ENVIADO")
+            for submission in enviados[:3]:
+                await self._aprobar(submission["id"], "ENVIADO", "aprobar_empresa", "aprobar-empresa", "Aprobado")
+
+    async def recorrido_coordinador(self):
+        proceso = self.rng.choice(self.contexto["procesos_pais"])
+        items = await self._submissions("submissions.listar", proceso)
+        await self._submissions("submissions.listar", proceso, offset=50)
+
+        for submission in self.rng.sample(items, min(3, len(items))):
+            await self.request("submissions.detalle", "GET", f"/api/v1/submissions/{submission['id']}")
+
+        await self.request("submissions.duracion_estados", "GET",
+                           f"/api/v1/procesos/{proceso}/submissions/duracion-estados")
+
+    async def recorrido_admin(self):
+        await self.request("auth.mis_tareas", "GET", "/api/v1/auth/mis-tareas")
+        proceso = self.rng.choice(self.contexto["procesos"])
+        pendientes = await self._submissions("submissions.listar", proceso, estado="APROBADO_EMPRESA")
+
+        for submission in pendientes[:3]:
+            await self._aprobar(submission["id"], "APROBADO_EMPRESA", "aprobar_ficem", "aprobar-ficem", "Aprobado FICEM")
+
+    async def _aprobar(self, submission_id: str, estado: str, operacion: str, ruta: str, comentario: str):
+        """
+        Aprobar con la versión del detalle, solo si sigue en `estado`: si otro
+        VU lo transicionó después del listado no se envía (sería un 400 del
+        propio generador); si lo hace después del detalle, la versión da 409.
+        """
+        detalle = await self.request("submissions.detalle", "GET", f"/api/v1/submissions/{submission_id}")
+        if detalle is None or detalle.status_code != 200:
+            return
+        datos = detalle.json()
+        if datos["estado_actual"] != estado:
+            return
+
+        await self.pensar()
+        await self.request(
+            f"submissions.{operacion}", "POST", f"/api/v1/submissions/{submission_id}/{ruta}",
+            json={"accion": "aprobar", "comentario": comentario, "version": datos["version"]}
+        )
+
+
+def _repartir(total: int, mezcla: Dict[str, float]) -> Dict[str, int]:
+    """Cantidad de usuarios por rol según los pesos (método del mayor resto)"""
+    suma = sum(mezcla.values())
+    exactos = {rol: total * peso / suma for rol, peso in mezcla.items()}
+    cantidades = {rol: int(valor) for rol, valor in exactos.items()}
+    for rol in sorted(exactos, key=lambda r: exactos[r] - cantidades[r], reverse=True)[:total - sum(cantidades.values())]:
+        cantidades[rol] += 1
+    return cantidades
+
+
+def crear_usuarios(cliente, stats, manifiesto: dict, mezcla: Dict[str, float], total: int,
+                   espera: float, rng: random.Random) -> list:
+    """Asigna a cada VU una cuenta real del dataset según su rol"""
+    excel = excel_sintetico()
+    procesos_pais = defaultdict(list)
+    for pais, proceso in manifiesto["procesos_flujo"].items():
+        procesos_pais[pais].append(proceso)
+    for pais, proceso in manifiesto["procesos_activos"].items():
+        procesos_pais[pais].append(proceso)
+    todos = [p for procesos in procesos_pais.values() for p in procesos]
+
+    empresas = manifiesto["empresas"]
+    paises = list(manifiesto["coordinadores"])
+    usuarios = []
+
+    for rol, cantidad in _repartir(total, mezcla).items():
+        for i in range(cantidad):
+            empresa = empresas[i % len(empresas)]
+            # Un solo informante por empresa recorre el flujo de carga
+            carga = rol != "INFORMANTE_EMPRESA" or i < len(empresas)
+            if rol == "INFORMANTE_EMPRESA":
+                email, pais = empresa["informante"], empresa["pais"]
+            elif rol == "SUPERVISOR_EMPRESA":
+                email, pais = empresa["supervisor"], empresa["pais"]
+            elif rol == "COORDINADOR_PAIS":
+                pais = paises[i % len(paises)]
+                email = manifiesto["coordinadores"][pais]
+            else:
+                email, pais = manifiesto["admin"], None
+
+            contexto = {
+                "empresa": empresa,
+                "procesos_pais": procesos_pais[pais] if pais else todos,
+                "procesos": todos,
+                "proceso_flujo": manifiesto["procesos_flujo"].get(pais) if carga else None,
+                "excel": excel,
+            }
+            usuarios.append(UsuarioVirtual(
+                cliente, stats, rol, email, manifiesto["password"], contexto, espera,
+                random.Random(rng.random())
+            ))
+
+    return usuarios
+
+
+async def ejecutar(cliente, manifiesto: dict, mezcla: Dict[str, float], usuarios: int,
+                   duracion: float, rampa: float, espera: float, semilla: int) -> dict:
+    stats = Estadisticas()
+    rng = random.Random(semilla)
+    vus = crear_usuarios(cliente, stats, manifiesto, mezcla, usuarios, espera, rng)
+    rng.shuffle(vus)
+
+    inicio = time.monotonic()
+    fin = inicio + duracion
+
+    async def arrancar(indice: int, vu: UsuarioVirtual):
+        # Rampa lineal: los VU se incorporan escalonados durante `rampa` segundos
+        await asyncio.sleep(rampa * indice / max(len(vus), 1))
+        await vu.ejecutar(fin)
+
+    await asyncio.gather(*(arrancar(i, vu) for i, vu in enumerate(vus)))
+    return stats.reporte(time.monotonic() - inicio)
+
+
+def imprimir(reporte: dict) -> None:
+    print(f"\nRequests: {reporte['requests']}  Throughput: {reporte['throughput_rps']} req/s  "
+          f"Tasa de error: {reporte['tasa_error']:.2%}")
+    lat = reporte["latencia"]
+    print(f"Latencia global: p50 {lat['p50_ms']} ms  p95 {lat['p95_ms']} ms  p99 {lat['p99_ms']} ms")
+
+    print(f"\n{'Operación':<34}{'n':>7}{'rps':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'err':>6}{'conf':>6}")
+    for operacion, r in reporte["operaciones"].items():
+        print(f"{operacion:<34}{r['n']:>7}{r['rps']:>8.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+              f"{r['p99_ms']:>9.1f}{r['errores']:>6}{r['conflictos']:>6}")
+
+    print(f"\n{'Rol':<34}{'n':>7}{'p50':>17}{'p95':>9}{'p99':>9}")
+    for rol, r in reporte["roles"].items():
+        print(f"{rol:<34}{r['n']:>7}{r['p50_ms']:>17.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}")
+
+    if reporte["errores"]:
+        print("\nErrores:")
+        for detalle, cantidad in sorted(reporte["errores"].items(), key=lambda x: -x[1]):
+            print(f"  - {detalle}: {cantidad}")
+
+
+def _parsear_mezcla(texto: str) -> Dict[str, float]:
+    """'INFORMANTE_EMPRESA=60,SUPERVISOR_EMPRESA=20' -> {rol: peso}"""
+    mezcla = {}
+    for parte in texto.split(","):
+        rol, peso = parte.split("=")
+        rol = rol.strip().upper()
+        if rol not in ESCENARIOS["normal"]:
+            raise ValueError(f"Rol no soportado: {rol}")
+        mezcla[rol] = float(peso)
+    return mezcla
+
+
+async def _main(args):
+    import httpx
+
+    mezcla = _parsear_mezcla(args.mezcla) if args.mezcla else ESCENARIOS[args.escenario]
+
+    if args.asgi:
+        # Prueba rápida en proceso: genera el dataset y no requiere servidor
+        from benchmarks.datos_sinteticos import url_bench, generar_dataset, ConfigDataset
+        url_bench()
+        # Los archivos subidos no quedan en el UPLOAD_DIR del repo
+        os.environ.setdefault("UPLOAD_DIR", tempfile.mkdtemp(prefix="ficem-bench-"))
+        from database.connection import engine
+        from api.main import app
+
+        manifiesto = generar_dataset(engine, ConfigDataset(semilla=args.semilla))
+        transporte = httpx.ASGITransport(app=app)
+        cliente = httpx.AsyncClient(transport=transporte, base_url="http://carga")
+    else:
+        manifiesto = cargar_json(args.manifiesto)
+        limites = httpx.Limits(max_connections=args.usuarios, max_keepalive_connections=args.usuarios)
+        cliente = httpx.AsyncClient(base_url=args.url, limits=limites, timeout=args.timeout)
+
+    print(f"Carga: {args.usuarios} usuarios, {args.duracion}s, rampa {args.rampa}s, mezcla {mezcla}")
+
+    async with cliente:
+        reporte = await ejecutar(cliente, manifiesto, mezcla, args.usuarios, args.duracion,
+                                 args.rampa, args.espera, args.semilla)
+
+    reporte.update({
+        "fecha": datetime.utcnow().isoformat(),
+        "url": "asgi" if args.asgi else args.url,
+        "usuarios": args.usuarios,
+        "mezcla": mezcla,
+    })
+    return reporte
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generador de carga por roles')
+    parser.add_argument('--url', default=os.getenv("API_URL", "http://localhost:8000"), help='URL del stack local')
+    parser.add_argument('--manifiesto', help='Manifiesto del dataset (benchmarks.datos_sinteticos --manifiesto)')
+    parser.add_argument('--asgi', action='store_true', help='Ejecutar la app en proceso sobre BENCH_DATABASE_URL')
+    parser.add_argument('--usuarios', type=int, default=50, help='Usuarios virtuales concurrentes')
+    parser.add_argument('--duracion', type=float, default=60, help='Segundos de prueba')
+    parser.add_argument('--rampa', type=float, default=10, help='Segundos para incorporar todos los usuarios')
+    parser.add_argument('--espera', type=float, default=1.0, help='Tiempo medio de espera entre acciones (s)')
+    parser.add_argument('--escenario', choices=sorted(ESCENARIOS), default='cierre')
+    parser.add_argument('--mezcla', help='Pesos por rol, ej: INFORMANTE_EMPRESA=60,ADMIN_PROCESO=40')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--salida', help='Guardar reporte en JSON')
+    parser.add_argument('--max-tasa-error', type=float, help='Exit 1 si la tasa de error la supera (ej: 0.01)')
+
+    args = parser.parse_args()
+
+    if not args.asgi and not args.manifiesto:
+        parser.error("Indique --manifiesto (stack local) o --asgi")
+
+    reporte = asyncio.run(_main(args))
+    imprimir(reporte)
+
+    if args.salida:
+        guardar_json(args.salida, reporte)
+        print(f"\n✅ Reporte guardado en {args.salida}")
+
+    if args.max_tasa_error is not None and reporte["tasa_error"] > args.max_tasa_error:
+        print(f"\n❌ Tasa de error {reporte['tasa_error']:.2%} > {args.max_tasa_error:.2%}")
+        sys.exit(1)
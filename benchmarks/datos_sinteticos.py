@@ -0,0 +1,462 @@
+"""
+Generación de un dataset sintético reproducible para benchmarks
+
+Crea N países × empresas × plantas, procesos por ciclo, usuarios por rol y
+submissions distribuidos en todos los estados del workflow (con su historial,
+eventos, datos extraídos y resultados), M remitos de concreto con sus
+emisiones por componente (sql/create_remitos_unificados.sql), más un proceso
+activo vacío por país para ejercitar el flujo completo desde la creación.
+
+Uso:
+    BENCH_DATABASE_URL=postgresql://localhost/ficem_bench \\
+        python -m benchmarks.datos_sinteticos --paises 6 --empresas 20 --remitos 50000
+"""
+import io
+import os
+import random
+import sys
+import uuid
+from dataclasses import dataclass, asdict
+from datetime import datetime, timedelta
+from typing import Optional
+
+PASSWORD_BENCH = "bench-ficem"
+
+PAISES = [
+    ("peru", "PE"), ("colombia", "CO"), ("argentina", "AR"), ("chile", "CL"),
+    ("mexico", "MX"), ("ecuador", "EC"), ("brasil", "BR"), ("bolivia", "BO"),
+    ("paraguay", "PY"), ("uruguay", "UY"), ("guatemala", "GT"), ("honduras", "HN"),
+]
+
+HOJAS = ["Cemento", "Concreto", "Clinker"]
+
+RUTA_SQL_REMITOS = os.path.join(os.path.dirname(__file__), '..', 'sql', 'create_remitos_unificados.sql')
+
+# Componentes de emisión de cada remito: (alcance, categoría, componente, fracción del total)
+COMPONENTES_REMITO = [
+    ("A1", "Cemento", "co2_cem_descarbonatacion_clinker", 0.55),
+    ("A1", "Cemento", "co2_cem_combustion", 0.25),
+    ("A1", "Agregados", "co2_agregados", 0.06),
+    ("A2", "Agregados", "co2_transporte_materias_primas", 0.06),
+    ("A3", "Planta", "co2_planta_concreto", 0.03),
+    ("A4", "Planta", "co2_transporte_concreto", 0.05),
+]
+
+# Recorrido del workflow hasta cada estado final
+RECORRIDOS = {
+    "BORRADOR": ["BORRADOR"],
+    "ENVIADO": ["BORRADOR", "ENVIADO"],
+    "RECHAZADO_EMPRESA": ["BORRADOR", "ENVIADO", "RECHAZADO_EMPRESA"],
+    "APROBADO_EMPRESA": ["BORRADOR", "ENVIADO", "APROBADO_EMPRESA"],
+    "EN_REVISION_FICEM": ["BORRADOR", "ENVIADO", "APROBADO_EMPRESA", "EN_REVISION_FICEM"],
+    "RECHAZADO_FICEM": ["BORRADOR", "ENVIADO", "APROBADO_EMPRESA", "RECHAZADO_FICEM"],
+    "APROBADO_FICEM": ["BORRADOR", "ENVIADO", "APROBADO_EMPRESA", "APROBADO_FICEM"],
+    "PUBLICADO": ["BORRADOR", "ENVIADO", "APROBADO_EMPRESA", "APROBADO_FICEM", "PUBLICADO"],
+}
+
+# Distribución de estados en ciclos cerrados y en el ciclo en curso
+PESOS_HISTORICO = {"APROBADO_FICEM": 35, "PUBLICADO": 55, "RECHAZADO_FICEM": 5, "EN_REVISION_FICEM": 5}
+PESOS_EN_CURSO = {
+    "BORRADOR": 30, "ENVIADO": 20, "RECHAZADO_EMPRESA": 5, "APROBADO_EMPRESA": 15,
+    "EN_REVISION_FICEM": 10, "RECHAZADO_FICEM": 5, "APROBADO_FICEM": 10, "PUBLICADO": 5,
+}
+
+
+@dataclass
+class ConfigDataset:
+    """Tamaño del dataset sintético"""
+    paises: int = 4
+    empresas_por_pais: int = 10
+    plantas_por_empresa: int = 3
+    ciclos: int = 3                     # Procesos (y submissions por empresa) por país
+    filas_por_submission: int = 60      # Filas de datos extraídos repartidas entre hojas
+    remitos: int = 5000                 # Remitos de concreto repartidos entre plantas
+    semilla: int = 42
+
+
+def url_bench() -> str:
+    """
+    URL de la base de benchmarks.
+
+    Se exige una variable dedicada porque el dataset recrea el esquema completo.
+    Debe llamarse antes de importar database.connection: redirige DATABASE_URL.
+    """
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        print("❌ Defina BENCH_DATABASE_URL (base dedicada: se borra en cada corrida)")
+        sys.exit(1)
+
+    os.environ["DATABASE_URL"] = url
+    return url
+
+
+def _filas_hoja(rng: random.Random, hoja: str, cantidad: int, plantas: list) -> list:
+    filas = []
+    for i in range(cantidad):
+        planta = plantas[i % len(plantas)]
+        fila = {"planta_id": planta, "mes": i % 12 + 1}
+        if hoja == "Clinker":
+            fila.update({
+                "produccion_t": round(rng.uniform(20_000, 120_000), 1),
+                "combustible_gj": round(rng.uniform(60_000, 400_000), 1),
+                "co2_kg_t": round(rng.uniform(780, 900), 2),
+            })
+        elif hoja == "Cemento":
+            fila.update({
+                "tipo": rng.choice(["CPN", "CPC", "CPP", "CPE"]),
+                "produccion_t": round(rng.uniform(15_000, 150_000), 1),
+                "factor_clinker": round(rng.uniform(0.55, 0.95), 3),
+                "resistencia_mpa": rng.choice([25, 32.5, 42.5, 52.5]),
+                "co2_kg_t": round(rng.uniform(450, 850), 2),
+            })
+        else:
+            fila.update({
+                "resistencia_mpa": rng.choice([17, 21, 25, 28, 35, 40]),
+                "volumen_m3": round(rng.uniform(1_000, 30_000), 1),
+                "cemento_kg_m3": round(rng.uniform(250, 450), 1),
+                "co2_kg_m3": round(rng.uniform(180, 420), 2),
+            })
+        filas.append(fila)
+    return filas
+
+
+def _datos_extraidos(rng: random.Random, filas: int, plantas: list) -> dict:
+    por_hoja = max(filas // len(HOJAS), 1)
+    return {hoja.lower(): _filas_hoja(rng, hoja, por_hoja, plantas) for hoja in HOJAS}
+
+
+def _resultados(rng: random.Random, fecha: datetime) -> dict:
+    return {
+        "ejecutado": fecha.isoformat(),
+        "gcca": {"a1_clinker": round(rng.uniform(800, 880), 2), "a2_cemento": round(rng.uniform(500, 800), 2)},
+        "bandas": {"clase": rng.choice(["AA", "A", "B", "C", "D", "E", "F"])},
+        "benchmarking": {"percentil_pais": rng.randint(1, 100)},
+    }
+
+
+def _remitos(rng: random.Random, cantidad: int, empresas: list, plantas: list, ahora: datetime, ciclos: int):
+    """Filas de remitos y de sus componentes (remito_id = posición + 1)"""
+    nombres_empresa = {e["id"]: (e["nombre"], e["pais"]) for e in empresas}
+    remitos, componentes = [], []
+
+    for i in range(cantidad):
+        planta = plantas[i % len(plantas)]
+        empresa, pais = nombres_empresa[planta["empresa_id"]]
+        fecha = (ahora - timedelta(days=rng.randint(0, 365 * ciclos - 1))).date()
+        volumen = round(rng.uniform(1, 12), 1)
+        co2_kg_m3 = round(rng.uniform(180, 420), 2)
+        co2_total = round(co2_kg_m3 * volumen, 2)
+        por_alcance = {}
+        for alcance, categoria, componente, fraccion in COMPONENTES_REMITO:
+            valor = round(co2_total * fraccion, 3)
+            por_alcance[alcance] = por_alcance.get(alcance, 0) + valor
+            componentes.append({
+                "remito_id": i + 1, "alcance": alcance, "categoria": categoria,
+                "componente": componente, "valor_co2": valor,
+            })
+
+        remitos.append({
+            "id": i + 1, "id_remito": f"R{i + 1:08d}", "origen": "bench", "empresa": empresa, "pais": pais,
+            "fecha": fecha, "anio": fecha.year, "mes": fecha.month, "trimestre": (fecha.month - 1) // 3 + 1,
+            "planta": planta["nombre"], "producto": rng.choice(["H-25", "H-30", "H-35", "H-40"]),
+            "resistencia_mpa": rng.choice([17, 21, 25, 28, 35, 40]), "volumen": volumen,
+            "slump": rng.choice([8, 10, 12, 15]), "tipo_cemento": rng.choice(["CPN", "CPC", "CPP", "CPE"]),
+            "contenido_cemento": round(rng.uniform(250, 450), 1),
+            "factor_clinker": round(rng.uniform(0.55, 0.95), 3),
+            "coprocesamiento": round(rng.uniform(0, 30), 1),
+            "co2_total": co2_total, "co2_kg_m3": co2_kg_m3,
+            **{f"{a.lower()}_total": round(por_alcance.get(a, 0), 3) for a in ("A1", "A2", "A3", "A4", "A5")},
+        })
+
+    return remitos, componentes
+
+
+def excel_sintetico(filas: int = 30, semilla: int = 0) -> bytes:
+    """Archivo .xlsx con las hojas requeridas, para los escenarios de carga"""
+    from openpyxl import Workbook
+
+    rng = random.Random(semilla)
+    libro = Workbook()
+    libro.remove(libro.active)
+
+    for hoja in HOJAS:
+        datos = _filas_hoja(rng, hoja, filas, [1])
+        ws = libro.create_sheet(hoja)
+        ws.append(list(datos[0].keys()))
+        for fila in datos:
+            ws.append(list(fila.values()))
+
+    buffer = io.BytesIO()
+    libro.save(buffer)
+    return buffer.getvalue()
+
+
+def generar_dataset(engine, config: Optional[ConfigDataset] = None) -> dict:
+    """
+    Recrea el esquema en `engine` y carga el dataset.
+
+    Las migraciones complementarias (vistas materializadas) se ejecutan sobre
+    database.connection.engine, por lo que `engine` debe ser ese mismo engine
+    (ver url_bench).
+
+    Returns:
+        Manifiesto con credenciales por rol, procesos e IDs de muestra que usan
+        los escenarios de benchmark.
+    """
+    from sqlalchemy import insert, text
+    from database.models import (
+        Base, Usuario, Empresa, Planta, ProcesoMRV, Submission, SubmissionEvento
+    )
+    from api.services.auth_service import get_password_hash
+
+    config = config or ConfigDataset()
+    rng = random.Random(config.semilla)
+    ahora = datetime.utcnow().replace(microsecond=0)
+    password_hash = get_password_hash(PASSWORD_BENCH)
+    anio_actual = ahora.year
+
+    with engine.begin() as conn:
+        # La vista materializada depende de submissions/submission_eventos
+        conn.execute(text("DROP MATERIALIZED VIEW IF EXISTS mv_duracion_estados"))
+        conn.execute(text("DROP TABLE IF EXISTS remitos_emisiones_componentes, remitos"))
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+    # Remitos: esquema del SQL del repo (no tiene modelo ORM)
+    with open(RUTA_SQL_REMITOS, encoding="utf-8") as f:
+        sql_remitos = f.read()
+    with engine.begin() as conn:
+        # Cursor del driver sin parámetros: el script trae '%' en los comentarios
+        conn.connection.cursor().execute(sql_remitos)
+
+    paises = [PAISES[i % len(PAISES)] if i < len(PAISES) else (f"pais{i}", f"Z{i % 10}")
+              for i in range(config.paises)]
+
+    usuarios, empresas, plantas, procesos = [], [], [], []
+    submissions, eventos = [], []
+    manifiesto = {
+        "password": PASSWORD_BENCH,
+        "config": asdict(config),
+        "root": "root@bench.ficem.org",
+        "admin": "admin@bench.ficem.org",
+        "coordinadores": {},
+        "empresas": [],
+        "procesos_activos": {},
+        "procesos_flujo": {},
+        "submissions": [],
+    }
+
+    usuario_id = 0
+
+    def nuevo_usuario(email, rol, pais, empresa_id=None):
+        nonlocal usuario_id
+        usuario_id += 1
+        usuarios.append({
+            "id": usuario_id, "email": email, "password_hash": password_hash,
+            "nombre": email.split("@")[0], "rol": rol, "pais": pais,
+            "empresa_id": empresa_id, "activo": True,
+            "created_at": ahora, "updated_at": ahora,
+        })
+        return usuario_id
+
+    root_id = nuevo_usuario(manifiesto["root"], "ROOT", "regional")
+    admin_id = nuevo_usuario(manifiesto["admin"], "ADMIN_PROCESO", "regional")
+
+    empresa_id = planta_id = 0
+    empresas_por_pais = {}
+
+    for pais, iso in paises:
+        email = f"coord-{pais}@bench.ficem.org"
+        nuevo_usuario(email, "COORDINADOR_PAIS", pais)
+        manifiesto["coordinadores"][pais] = email
+
+        for ciclo in range(config.ciclos):
+            anio = anio_actual - (config.ciclos - 1 - ciclo)
+            en_curso = ciclo == config.ciclos - 1
+            proceso_id = f"produce-{pais}-{anio}"
+            procesos.append({
+                "id": proceso_id, "pais_iso": iso, "tipo": "PRODUCE",
+                "nombre": f"PRODUCE {pais.title()} {anio}", "ciclo": str(anio),
+                "estado": "ACTIVO" if en_curso else "CERRADO",
+                "config": {
+                    "template_version": "v1", "hojas_requeridas": HOJAS,
+                    "validaciones": [], "workflow_steps": [],
+                    "deadline_envio": f"{anio + 1}-03-31",
+                },
+                "created_by": root_id, "created_at": ahora, "updated_at": ahora,
+            })
+            if en_curso:
+                manifiesto["procesos_activos"][pais] = proceso_id
+
+        # Proceso activo sin submissions para recorrer el flujo desde la creación
+        flujo_id = f"flujo-{pais}-bench"
+        procesos.append({
+            "id": flujo_id, "pais_iso": iso, "tipo": "OTRO", "nombre": f"Flujo benchmark {pais}",
+            "ciclo": str(anio_actual), "estado": "ACTIVO",
+            "config": {"template_version": "v1", "hojas_requeridas": HOJAS, "validaciones": [], "workflow_steps": []},
+            "created_by": root_id, "created_at": ahora, "updated_at": ahora,
+        })
+        manifiesto["procesos_flujo"][pais] = flujo_id
+
+        for _ in range(config.empresas_por_pais):
+            empresa_id += 1
+            empresas.append({
+                "id": empresa_id, "nombre": f"Cementera {empresa_id} {pais.title()}", "pais": pais,
+                "perfil_planta": "INTEGRADA", "activo": True, "created_at": ahora, "updated_at": ahora,
+            })
+            ids_plantas = []
+            for _ in range(config.plantas_por_empresa):
+                planta_id += 1
+                ids_plantas.append(planta_id)
+                plantas.append({
+                    "id": planta_id, "empresa_id": empresa_id, "nombre": f"Planta {planta_id}",
+                    "tipo": "INTEGRADA", "activo": True, "created_at": ahora, "updated_at": ahora,
+                })
+
+            informante = f"inf-{empresa_id}@bench.ficem.org"
+            supervisor = f"sup-{empresa_id}@bench.ficem.org"
+            informante_id = nuevo_usuario(informante, "INFORMANTE_EMPRESA", pais, empresa_id)
+            supervisor_id = nuevo_usuario(supervisor, "SUPERVISOR_EMPRESA", pais, empresa_id)
+
+            manifiesto["empresas"].append({
+                "id": empresa_id, "pais": pais, "plantas": ids_plantas,
+                "informante": informante, "supervisor": supervisor,
+            })
+            empresas_por_pais.setdefault(pais, []).append(
+                (empresa_id, ids_plantas, informante_id, supervisor_id)
+            )
+
+    # Submissions: uno por empresa y ciclo
+    for proceso in procesos:
+        if proceso["tipo"] != "PRODUCE":
+            continue
+        pais = next(p for p, iso in paises if iso == proceso["pais_iso"])
+        en_curso = proceso["estado"] == "ACTIVO"
+        pesos = PESOS_EN_CURSO if en_curso else PESOS_HISTORICO
+
+        for empresa_id_s, ids_plantas, informante_id, supervisor_id in empresas_por_pais[pais]:
+            estado = rng.choices(list(pesos), weights=list(pesos.values()))[0]
+            submission_id = uuid.uuid4()
+            fecha = ahora - timedelta(days=rng.randint(30, 330) + (0 if en_curso else 365))
+            historial = []
+
+            for paso in RECORRIDOS[estado]:
+                autor = {
+                    "BORRADOR": informante_id, "ENVIADO": informante_id,
+                    "APROBADO_EMPRESA": supervisor_id, "RECHAZADO_EMPRESA": supervisor_id,
+                }.get(paso, admin_id)
+                historial.append({"estado": paso, "fecha": fecha.isoformat(), "user_id": autor})
+                eventos.append({"submission_id": submission_id, "estado": paso, "fecha": fecha, "user_id": autor})
+                fecha += timedelta(days=rng.randint(1, 20), hours=rng.randint(0, 23))
+
+            con_datos = estado != "BORRADOR"
+            aprobado = estado in ("APROBADO_FICEM", "PUBLICADO")
+            submissions.append({
+                "id": submission_id, "proceso_id": proceso["id"], "empresa_id": empresa_id_s,
+                "planta_id": ids_plantas[0], "usuario_id": informante_id,
+                "estado_actual": estado, "workflow_history": historial,
+                "archivos_excel": [
+                    {"planta_id": p, "url": f"file://bench/{submission_id}/{p}.xlsx",
+                     "filename": f"{p}.xlsx", "size_bytes": 0}
+                    for p in ids_plantas
+                ] if con_datos else [],
+                "datos_extraidos": _datos_extraidos(rng, config.filas_por_submission, ids_plantas) if con_datos else None,
+                "validaciones": [{"tipo": "estructura", "status": "ok", "mensaje": "Estructura correcta"}] if con_datos else [],
+                "comentarios": [],
+                "resultados_calculos": _resultados(rng, fecha) if aprobado else None,
+                "created_at": fecha - timedelta(days=1),
+                "submitted_at": fecha if con_datos else None,
+                "version": len(historial),
+            })
+
+            if len(manifiesto["submissions"]) < 500:
+                manifiesto["submissions"].append({
+                    "id": str(submission_id), "pais": pais, "empresa_id": empresa_id_s,
+                    "proceso_id": proceso["id"], "estado": estado,
+                })
+
+    with engine.begin() as conn:
+        conn.execute(insert(Empresa), empresas)
+        conn.execute(insert(Planta), plantas)
+        conn.execute(insert(Usuario), usuarios)
+        conn.execute(insert(ProcesoMRV), procesos)
+
+        for inicio in range(0, len(submissions), 1000):
+            conn.execute(insert(Submission), submissions[inicio:inicio + 1000])
+        for inicio in range(0, len(eventos), 5000):
+            conn.execute(insert(SubmissionEvento), eventos[inicio:inicio + 5000])
+
+        remitos, componentes = _remitos(rng, config.remitos, empresas, plantas, ahora, config.ciclos)
+        insertar_remito = text("""
+            INSERT INTO remitos (id, id_remito, origen, empresa, pais, fecha, "año", mes, trimestre,
+                planta, producto, resistencia_mpa, volumen, slump, tipo_cemento, contenido_cemento,
+                factor_clinker, coprocesamiento, co2_total, co2_kg_m3,
+                a1_total, a2_total, a3_total, a4_total, a5_total, archivo_origen)
+            VALUES (:id, :id_remito, :origen, :empresa, :pais, :fecha, :anio, :mes, :trimestre,
+                :planta, :producto, :resistencia_mpa, :volumen, :slump, :tipo_cemento, :contenido_cemento,
+                :factor_clinker, :coprocesamiento, :co2_total, :co2_kg_m3,
+                :a1_total, :a2_total, :a3_total, :a4_total, :a5_total, 'benchmark')
+        """)
+        insertar_componente = text("""
+            INSERT INTO remitos_emisiones_componentes (remito_id, alcance, categoria, componente, valor_co2)
+            VALUES (:remito_id, :alcance, :categoria, :componente, :valor_co2)
+        """)
+        for inicio in range(0, len(remitos), 5000):
+            conn.execute(insertar_remito, remitos[inicio:inicio + 5000])
+        for inicio in range(0, len(componentes), 5000):
+            conn.execute(insertar_componente, componentes[inicio:inicio + 5000])
+
+        # IDs explícitos: alinear las secuencias para los INSERT de los escenarios
+        for tabla in ("usuarios", "empresas", "plantas", "remitos"):
+            conn.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{tabla}', 'id'), (SELECT MAX(id) FROM {tabla}))"
+            ))
+        conn.execute(text("ANALYZE"))
+
+    # Resumen de duración por estado (endpoint duracion-estados), filas de
+    # datos_extraidos a las tablas por hoja e índice histórico de los ciclos
+    # aprobados, por el mismo camino que producción
+    from scripts.migrate_submission_eventos import migrate as migrar_eventos
+    from scripts.migrate_datos_extraidos_tablas import migrate as migrar_datos
+    from scripts.migrate_agregados_historicos import migrate as migrar_historico
+    migrar_eventos()
+    migrar_datos()
+    migrar_historico()
+
+    manifiesto["conteos"] = {
+        "usuarios": len(usuarios), "empresas": len(empresas), "plantas": len(plantas),
+        "procesos": len(procesos), "submissions": len(submissions), "eventos": len(eventos),
+        "remitos": len(remitos), "remitos_componentes": len(componentes),
+    }
+    return manifiesto
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generar dataset sintético de benchmarks')
+    parser.add_argument('--paises', type=int, default=4)
+    parser.add_argument('--empresas', type=int, default=10, help='Empresas por país')
+    parser.add_argument('--plantas', type=int, default=3, help='Plantas por empresa')
+    parser.add_argument('--ciclos', type=int, default=3, help='Procesos por país')
+    parser.add_argument('--filas', type=int, default=60, help='Filas de datos por submission')
+    parser.add_argument('--remitos', type=int, default=5000, help='Remitos de concreto')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--manifiesto', help='Guardar el manifiesto (usuarios, procesos, IDs) en JSON')
+
+    args = parser.parse_args()
+
+    url_bench()
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from database.connection import engine
+
+    resultado = generar_dataset(engine, ConfigDataset(
+        paises=args.paises, empresas_por_pais=args.empresas, plantas_por_empresa=args.plantas,
+        ciclos=args.ciclos, filas_por_submission=args.filas, semilla=args.semilla
+    ))
+    print("✅ Dataset generado:", resultado["conteos"])
+
+    if args.manifiesto:
+        from benchmarks.estadisticas import guardar_json
+        guardar_json(args.manifiesto, resultado)
+        print(f"  - Manifiesto en {args.manifiesto}")
@@ -0,0 +1,79 @@
+"""
+Estadísticas y comparación contra baseline compartidas por los benchmarks
+"""
+import json
+import math
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+
+def percentil(valores: Sequence[float], p: float) -> float:
+    """Percentil con interpolación lineal (p entre 0 y 100)"""
+    if not valores:
+        return 0.0
+
+    ordenados = sorted(valores)
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = math.floor(posicion)
+    superior = math.ceil(posicion)
+
+    if inferior == superior:
+        return ordenados[inferior]
+
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+
+def resumir_latencias(latencias_ms: List[float]) -> Dict[str, float]:
+    """p50/p95/p99, media y máximo en milisegundos"""
+    return {
+        "n": len(latencias_ms),
+        "p50_ms": round(percentil(latencias_ms, 50), 2),
+        "p95_ms": round(percentil(latencias_ms, 95), 2),
+        "p99_ms": round(percentil(latencias_ms, 99), 2),
+        "media_ms": round(sum(latencias_ms) / len(latencias_ms), 2) if latencias_ms else 0.0,
+        "max_ms": round(max(latencias_ms), 2) if latencias_ms else 0.0,
+    }
+
+
+def guardar_json(ruta: str, datos: dict) -> None:
+    Path(ruta).parent.mkdir(parents=True, exist_ok=True)
+    Path(ruta).write_text(json.dumps(datos, indent=2, ensure_ascii=False, default=str))
+
+
+def cargar_json(ruta: str) -> dict:
+    return json.loads(Path(ruta).read_text())
+
+
+def comparar_con_baseline(
+    actual: Dict[str, dict],
+    baseline: Dict[str, dict],
+    metricas: Dict[str, float]
+) -> List[str]:
+    """
+    Compara escenario por escenario y devuelve las regresiones encontradas.
+
+    Args:
+        actual: Resultados de la corrida, por escenario
+        baseline: Resultados de referencia, por escenario
+        metricas: Métrica -> tolerancia relativa (0.25 = hasta 25% peor).
+            Todas las métricas son "menor es mejor".
+    """
+    regresiones = []
+
+    for escenario, base in baseline.items():
+        medido = actual.get(escenario)
+        if medido is None:
+            regresiones.append(f"{escenario}: escenario ausente en la corrida actual")
+            continue
+
+        for metrica, tolerancia in metricas.items():
+            if metrica not in base or metrica not in medido:
+                continue
+            limite = base[metrica] * (1 + tolerancia)
+            if medido[metrica] > limite:
+                regresiones.append(
+                    f"{escenario}: {metrica} {medido[metrica]} > {round(limite, 2)} "
+                    f"(baseline {base[metrica]}, tolerancia {tolerancia:.0%})"
+                )
+
+    return regresiones
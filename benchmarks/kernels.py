@@ -0,0 +1,354 @@
+"""
+Micro-benchmarks de kernels de cálculo y clasificación
+
+Mide throughput (filas/s) y memoria pico (tracemalloc) de cada kernel en
+tamaños de 1 a 10M filas, y emite los resultados en JSON para comparar
+implementaciones escalares y vectorizadas a lo largo del tiempo. En
+calcular_planta (motor A1-A3) cada fila es una planta, con sus indicadores
+y su concreto por resistencia.
+
+Cada caso se registra como (kernel, implementación). Las implementaciones
+"escalar" llaman a las funciones de producción fila por fila, como lo hace
+hoy el código que las usa; las "vectorizado" son referencias numpy que se
+verifican contra la escalar antes de medirse, y sirven de objetivo para
+migrar los kernels.
+
+Uso:
+    python -m benchmarks.kernels
+    python -m benchmarks.kernels --tamanos 1,1000,100000,1000000,10000000 --presupuesto 120
+    python -m benchmarks.kernels --kernel clasificar_cemento --salida benchmarks/resultados/kernels.json
+    python -m benchmarks.kernels --baseline benchmarks/baseline_kernels.json   # exit 1 si hay regresión
+"""
+import gc
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from modules.bandas_utils import (
+    cargar_bandas, calcular_rangos_gcca, clasificar_cemento, clasificar_en_bandas
+)
+from services.utiles import limpio
+from calculos.factores import Factor, TablaFactores
+from calculos.motor import calcular_planta, registro_bandas
+from benchmarks.estadisticas import guardar_json, cargar_json, comparar_con_baseline
+
+RUTA_BANDAS = os.path.join(os.path.dirname(__file__), '..', 'data', 'bandas_gcca.json')
+TAMANOS_DEFECTO = [1, 1_000, 100_000, 1_000_000]
+CLASES_GCCA = np.array(['A', 'B', 'C', 'D', 'E', 'F', 'G'], dtype=object)
+
+# Factores fijos para el motor: mezcla térmica global y una propia de Perú
+FACTORES_PLANTA = TablaFactores([
+    Factor("combustible", "mezcla_termica", 95.0, "kg CO2/GJ"),
+    Factor("combustible", "mezcla_termica", 88.0, "kg CO2/GJ", pais="peru"),
+])
+PAISES_PLANTA = ["peru", "colombia"]
+RESISTENCIAS_POR_PLANTA = 3
+
+
+@dataclass
+class Caso:
+    """Kernel a medir: `preparar(n, rng)` genera la entrada y `ejecutar(datos)` la procesa"""
+    kernel: str
+    implementacion: str
+    preparar: Callable[[int, np.random.Generator], Any]
+    ejecutar: Callable[[Any], Any]
+
+
+# === Entradas ===
+
+def _df_bandas() -> pd.DataFrame:
+    return pd.DataFrame(cargar_bandas(RUTA_BANDAS)).T
+
+
+def _entrada_ccr(n, rng):
+    return rng.uniform(0.5, 0.95, n)
+
+
+def _entrada_cemento(n, rng):
+    return {"gwp": rng.uniform(0, 1200, n), "rangos": calcular_rangos_gcca(0.75)}
+
+
+def _entrada_concreto(n, rng):
+    df = _df_bandas()
+    return {
+        "rest": rng.choice(np.array(list(df.columns) + [45]), n),  # 45 MPa no está en la tabla
+        "huella": rng.uniform(0, 550, n),
+        "df": df,
+    }
+
+
+def _entrada_plantas(n, rng):
+    registro = registro_bandas()
+    # Resistencias de la tabla y 45 MPa (fuera de la tabla), como floats de la base
+    resistencias = [float(r) for r in sorted(list(registro.tabla.columns) + [45])]
+
+    produccion = rng.uniform(1e4, 2e6, n)
+    factor_clinker = rng.uniform(0.5, 0.95, n)
+    co2_cemento = rng.uniform(400, 900, n)
+    intensidad = rng.uniform(2.8, 4.5, n)
+    # ~10% de plantas de molienda: sin clinker propio
+    sin_clinker = rng.random(n) < 0.1
+    inicio = rng.integers(0, len(resistencias) - RESISTENCIAS_POR_PLANTA + 1, n)
+    volumen = rng.uniform(100, 5000, (n, RESISTENCIAS_POR_PLANTA))
+    co2_concreto = rng.uniform(150, 550, (n, RESISTENCIAS_POR_PLANTA))
+    paises = rng.integers(0, len(PAISES_PLANTA), n)
+    factores = [FACTORES_PLANTA.de_pais(p) for p in PAISES_PLANTA]
+
+    plantas = []
+    for i in range(n):
+        indicadores = {
+            "produccion_cemento_t": produccion[i],
+            "factor_clinker": factor_clinker[i],
+            "co2_cemento_kg_t": co2_cemento[i],
+            "produccion_clinker_t": None if sin_clinker[i] else produccion[i] * factor_clinker[i],
+            "intensidad_termica_gj_t": None if sin_clinker[i] else intensidad[i],
+            "co2_clinker_kg_t": None if sin_clinker[i] else 850.0,
+            "volumen_concreto_m3": volumen[i].sum(),
+            "co2_concreto_kg_m3": co2_concreto[i].mean(),
+        }
+        concreto = [
+            {"resistencia_mpa": r, "volumen_m3": v, "co2_kg_m3": c}
+            for r, v, c in zip(resistencias[inicio[i]:inicio[i] + RESISTENCIAS_POR_PLANTA], volumen[i], co2_concreto[i])
+        ]
+        plantas.append((indicadores, concreto, factores[paises[i]], PAISES_PLANTA[paises[i]]))
+
+    return {"plantas": plantas, "registro": registro}
+
+
+def _entrada_textos(n, rng):
+    base = np.array(["Cementos Pacasmayo S.A.A.", "UNACEM", "Planta Atocongo (Lima)", "Holcim Argentina",
+                     "Cementos Argos S.A.", "Cemento Bío-Bío", "Planta Olavarría", "Votorantim - Unión"])
+    return [f"{base[i]} {j}" for j, i in enumerate(rng.integers(0, len(base), n))]
+
+
+# === Implementaciones escalares (funciones de producción) ===
+
+def _rangos_escalar(ccr):
+    return [calcular_rangos_gcca(c) for c in ccr]
+
+
+def _cemento_escalar(datos):
+    rangos = datos["rangos"]
+    return [clasificar_cemento(g, rangos) for g in datos["gwp"]]
+
+
+def _concreto_escalar(datos):
+    df = datos["df"]
+    return [clasificar_en_bandas(r, h, df) for r, h in zip(datos["rest"].tolist(), datos["huella"].tolist())]
+
+
+def _limpio_escalar(textos):
+    return [limpio(t) for t in textos]
+
+
+def _plantas_escalar(datos):
+    registro = datos["registro"]
+    return [
+        calcular_planta(indicadores, concreto, factores, pais, registro)
+        for indicadores, concreto, factores, pais in datos["plantas"]
+    ]
+
+
+# === Referencias vectorizadas ===
+
+def _rangos_vectorizado(ccr):
+    # int() trunca hacia cero; con bases positivas equivale a floor
+    return np.floor((40 + 85 * ccr)[:, None] * np.arange(1, 8)).astype(np.int64)
+
+
+def _cemento_vectorizado(datos):
+    gwp, rangos = datos["gwp"], datos["rangos"]
+    limites = np.array([rangos[c] for c in ('B', 'C', 'D', 'E', 'F', 'G')])
+    clases = CLASES_GCCA[np.searchsorted(limites, gwp, side='right')]
+    clases[gwp <= rangos['A']] = 'AA'
+    return clases
+
+
+def _concreto_vectorizado(datos):
+    df, rest, huella = datos["df"], datos["rest"], datos["huella"]
+    columnas = {c: i for i, c in enumerate(df.columns)}
+    indice_col = np.array([columnas.get(r, -1) for r in np.unique(rest)])
+    col = indice_col[np.searchsorted(np.unique(rest), rest)]
+
+    tabla = df.to_numpy()                                   # bandas × resistencias
+    umbrales = tabla[:, np.where(col >= 0, col, 0)].T       # filas × bandas
+    dentro = (huella[:, None] <= umbrales) & (col >= 0)[:, None]
+    primera = dentro.argmax(axis=1)
+
+    bandas = np.array(df.index.tolist() + ["Top of H"], dtype=object)
+    return bandas[np.where(dentro.any(axis=1), primera, len(df.index))]
+
+
+CASOS: List[Caso] = [
+    Caso("calcular_rangos_gcca", "escalar", _entrada_ccr, _rangos_escalar),
+    Caso("calcular_rangos_gcca", "vectorizado", _entrada_ccr, _rangos_vectorizado),
+    Caso("clasificar_cemento", "escalar", _entrada_cemento, _cemento_escalar),
+    Caso("clasificar_cemento", "vectorizado", _entrada_cemento, _cemento_vectorizado),
+    Caso("clasificar_en_bandas", "escalar", _entrada_concreto, _concreto_escalar),
+    Caso("clasificar_en_bandas", "vectorizado", _entrada_concreto, _concreto_vectorizado),
+    Caso("limpio", "escalar", _entrada_textos, _limpio_escalar),
+    Caso("calcular_planta", "escalar", _entrada_plantas, _plantas_escalar),
+]
+
+
+def _normalizar(resultado) -> list:
+    """Salida comparable entre implementaciones"""
+    if isinstance(resultado, np.ndarray):
+        return resultado.tolist()
+    if resultado and isinstance(resultado[0], dict):
+        return [[v for k, v in r.items() if k != 'AA'] for r in resultado]
+    return list(resultado)
+
+
+def verificar_equivalencia(casos: List[Caso], n: int = 2_000, semilla: int = 0) -> List[str]:
+    """Compara cada implementación alternativa contra la escalar del mismo kernel"""
+    errores = []
+    escalares = {c.kernel: c for c in casos if c.implementacion == "escalar"}
+
+    for caso in casos:
+        referencia = escalares.get(caso.kernel)
+        if referencia is None or caso is referencia:
+            continue
+
+        datos = caso.preparar(n, np.random.default_rng(semilla))
+        esperado = _normalizar(referencia.ejecutar(datos))
+        obtenido = _normalizar(caso.ejecutar(datos))
+
+        if esperado != obtenido:
+            diferencias = sum(1 for a, b in zip(esperado, obtenido) if a != b)
+            errores.append(f"{caso.kernel}/{caso.implementacion}: {diferencias} de {n} filas difieren")
+
+    return errores
+
+
+def medir(caso: Caso, n: int, repeticiones: int, semilla: int) -> Dict[str, Any]:
+    """Tiempo (mejor y mediana de `repeticiones`) y memoria pico de una corrida"""
+    datos = caso.preparar(n, np.random.default_rng(semilla))
+    caso.ejecutar(datos)  # calentamiento
+
+    tiempos = []
+    for _ in range(repeticiones):
+        gc.collect()
+        inicio = time.perf_counter()
+        caso.ejecutar(datos)
+        tiempos.append(time.perf_counter() - inicio)
+
+    # tracemalloc penaliza el tiempo: la memoria se mide en una corrida aparte
+    gc.collect()
+    tracemalloc.start()
+    caso.ejecutar(datos)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mediana = statistics.median(tiempos)
+    return {
+        "kernel": caso.kernel,
+        "implementacion": caso.implementacion,
+        "filas": n,
+        "repeticiones": repeticiones,
+        "segundos_min": round(min(tiempos), 6),
+        "segundos_mediana": round(mediana, 6),
+        "filas_por_segundo": round(n / mediana, 1) if mediana > 0 else None,
+        "memoria_pico_bytes": pico,
+    }
+
+
+def ejecutar(casos: List[Caso], tamanos: List[int], presupuesto: float, semilla: int) -> List[dict]:
+    """
+    Mide cada caso en tamaños crecientes. Si la proyección lineal del siguiente
+    tamaño supera `presupuesto` segundos por corrida, se omiten los restantes.
+    """
+    resultados = []
+
+    for caso in casos:
+        segundos_por_fila = None
+
+        for n in sorted(tamanos):
+            if segundos_por_fila is not None and segundos_por_fila * n > presupuesto:
+                print(f"  {caso.kernel:<24}{caso.implementacion:<13}{n:>11,}  omitido (> {presupuesto:.0f}s estimado)")
+                continue
+
+            # Más repeticiones en tamaños chicos para estabilizar la medición
+            repeticiones = 5 if n <= 100_000 else 3 if n <= 1_000_000 else 1
+            resultado = medir(caso, n, repeticiones, semilla)
+            segundos_por_fila = resultado["segundos_mediana"] / n
+            resultados.append(resultado)
+
+            print(f"  {caso.kernel:<24}{caso.implementacion:<13}{n:>11,}"
+                  f"{resultado['filas_por_segundo']:>16,.0f} filas/s"
+                  f"{resultado['memoria_pico_bytes'] / 1_048_576:>10.1f} MiB")
+
+    return resultados
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Micro-benchmarks de kernels de cálculo')
+    parser.add_argument('--tamanos', default=",".join(str(t) for t in TAMANOS_DEFECTO),
+                        help='Filas por corrida, separadas por coma (hasta 10000000)')
+    parser.add_argument('--kernel', action='append', help='Medir solo estos kernels')
+    parser.add_argument('--implementacion', action='append', help='Medir solo estas implementaciones')
+    parser.add_argument('--presupuesto', type=float, default=60, help='Segundos máximos estimados por corrida')
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--salida', help='Guardar resultados en JSON')
+    parser.add_argument('--baseline', help='Comparar contra un baseline JSON (exit 1 si hay regresión)')
+    parser.add_argument('--tolerancia', type=float, default=0.25, help='Tolerancia de tiempo (0.25 = 25%%)')
+
+    args = parser.parse_args()
+
+    casos = [
+        c for c in CASOS
+        if (not args.kernel or c.kernel in args.kernel)
+        and (not args.implementacion or c.implementacion in args.implementacion)
+    ]
+
+    errores = verificar_equivalencia(casos)
+    if errores:
+        print("❌ Implementaciones no equivalentes:")
+        for error in errores:
+            print(f"  - {error}")
+        sys.exit(1)
+
+    print(f"{'Kernel':<26}{'Impl.':<13}{'Filas':>11}{'Throughput':>22}{'Pico':>14}")
+    resultados = ejecutar(casos, [int(t) for t in args.tamanos.split(",")], args.presupuesto, args.semilla)
+
+    salida = {
+        "fecha": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }
+
+    if args.salida:
+        guardar_json(args.salida, salida)
+        print(f"\n✅ Resultados guardados en {args.salida}")
+
+    if args.baseline:
+        def por_clave(filas):
+            return {f"{r['kernel']}/{r['implementacion']}/{r['filas']}": r for r in filas}
+
+        actuales = por_clave(resultados)
+        base = {k: v for k, v in por_clave(cargar_json(args.baseline)["resultados"]).items() if k in actuales}
+        regresiones = comparar_con_baseline(actuales, base, {"segundos_mediana": args.tolerancia})
+
+        if regresiones:
+            print("\n❌ Regresiones:")
+            for regresion in regresiones:
+                print(f"  - {regresion}")
+            sys.exit(1)
+
+        print("\n✅ Sin regresiones")
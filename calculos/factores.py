@@ -0,0 +1,141 @@
+"""
+Tabla de factores de emisión con precedencia país > global ya resuelta
+
+Una TablaFactores es una foto inmutable de los factores activos: se construye
+una vez y resuelve cada línea de cálculo con una búsqueda en diccionario, sin
+consultas. Su `version` es un hash del contenido, por lo que dos tablas con
+los mismos factores tienen la misma versión; `a_dict()` / `desde_dict()`
+permiten fijar la foto en los resultados de un cálculo y reproducirlo después.
+
+Las claves (categoria, nombre, pais) se comparan normalizadas con `limpio`
+("Diésel" y "diesel" son el mismo factor).
+"""
+import hashlib
+import json
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from services.utiles import limpio
+
+
+class FactorNoEncontrado(KeyError):
+    """No hay factor para la categoría y nombre, ni del país ni global"""
+
+
+@dataclass(frozen=True)
+class Factor:
+    categoria: str
+    nombre: str
+    valor: float
+    unidad: str
+    pais: Optional[str] = None  # None = global
+    fuente: Optional[str] = None
+
+
+Clave = Tuple[str, str, Optional[str]]
+
+
+# Las líneas de un cálculo repiten pocos nombres: normalizar una sola vez cada uno
+@lru_cache(maxsize=4096)
+def _clave(categoria: str, nombre: str, pais: Optional[str]) -> Clave:
+    return limpio(categoria), limpio(nombre), limpio(pais) if pais else None
+
+
+class TablaFactores:
+    """
+    Factores resueltos por (categoria, nombre, pais).
+
+    Para cada país con algún factor propio se guardan todas las claves con la
+    precedencia aplicada; los países sin factores propios usan las claves
+    globales (pais None).
+    """
+
+    def __init__(self, factores: Iterable[Factor]):
+        self.factores: Tuple[Factor, ...] = tuple(sorted(
+            factores, key=lambda f: (f.categoria, f.nombre, f.pais or "", f.valor)
+        ))
+
+        globales: Dict[Clave, Factor] = {}
+        por_pais: Dict[str, Dict[Clave, Factor]] = {}
+        for factor in self.factores:
+            categoria, nombre, pais = _clave(factor.categoria, factor.nombre, factor.pais)
+            if pais is None:
+                globales[(categoria, nombre, None)] = factor
+            else:
+                por_pais.setdefault(pais, {})[(categoria, nombre, pais)] = factor
+
+        resueltos = dict(globales)
+        for pais, propios in por_pais.items():
+            for (categoria, nombre, _), factor in globales.items():
+                resueltos[(categoria, nombre, pais)] = factor
+            resueltos.update(propios)
+
+        self._resueltos = resueltos
+        self._por_pais: Dict[Optional[str], "TablaFactores"] = {}
+        self.version = hashlib.sha1(
+            json.dumps([asdict(f) for f in self.factores], sort_keys=True).encode()
+        ).hexdigest()[:16]
+
+    def __len__(self) -> int:
+        return len(self.factores)
+
+    def obtener(self, categoria: str, nombre: str, pais: Optional[str] = None) -> Factor:
+        """
+        Factor del país si existe, si no el global.
+
+        Raises:
+            FactorNoEncontrado si no hay ninguno
+        """
+        clave = _clave(categoria, nombre, pais)
+        factor = self._resueltos.get(clave) or self._resueltos.get(clave[:2] + (None,))
+        if factor is None:
+            raise FactorNoEncontrado(f"Sin factor de emisión para {categoria}/{nombre} ({pais or 'global'})")
+        return factor
+
+    def valor(self, categoria: str, nombre: str, pais: Optional[str] = None) -> float:
+        """Valor del factor resuelto (ver `obtener`)"""
+        return self.obtener(categoria, nombre, pais).valor
+
+    def de_pais(self, pais: Optional[str]) -> "TablaFactores":
+        """
+        Subtabla con los factores que rigen para `pais` (propios y globales
+        no reemplazados). Su versión solo cambia si cambia alguno de ellos, por
+        lo que editar factores de otro país no la afecta.
+        """
+        clave_pais = _clave("", "", pais)[2]
+        if clave_pais not in self._por_pais:
+            # Un país con factores propios ya tiene todas las claves resueltas
+            del_pais = [f for (_, _, p), f in self._resueltos.items() if p == clave_pais]
+            self._por_pais[clave_pais] = TablaFactores(
+                del_pais or [f for (_, _, p), f in self._resueltos.items() if p is None]
+            )
+        return self._por_pais[clave_pais]
+
+    def a_dict(self) -> dict:
+        """Foto serializable para guardar con los resultados de un cálculo"""
+        return {"version": self.version, "factores": [asdict(f) for f in self.factores]}
+
+    @classmethod
+    def desde_dict(cls, datos: dict) -> "TablaFactores":
+        """
+        Reconstruir una foto guardada con `a_dict`.
+
+        Raises:
+            ValueError si el contenido no corresponde a la versión registrada
+        """
+        tabla = cls(Factor(**f) for f in datos["factores"])
+        if datos.get("version") and datos["version"] != tabla.version:
+            raise ValueError(f"Foto de factores alterada: versión {datos['version']} != {tabla.version}")
+        return tabla
+
+
+def factores_desde_filas(filas: Iterable) -> List[Factor]:
+    """Factor por cada fila con atributos categoria, nombre, valor, unidad, pais y fuente"""
+    return [
+        Factor(
+            categoria=f.categoria, nombre=f.nombre, valor=f.valor,
+            unidad=f.unidad, pais=f.pais, fuente=f.fuente
+        )
+        for f in filas
+    ]
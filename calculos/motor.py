@@ -0,0 +1,111 @@
+"""
+Motor de cálculos por planta (A1-A3)
+
+Recibe los indicadores ya agregados de una planta (historico_service.SQL_INDICADORES),
+su concreto agrupado por resistencia, los factores de emisión que rigen para
+el país y el registro de bandas GCCA, y devuelve el resultado de la planta.
+No consulta la base de datos: el mismo insumo produce siempre el mismo resultado.
+
+VERSION_MOTOR se incrementa con cada cambio de fórmulas o de la estructura del
+resultado, para que los resultados guardados con la versión anterior se
+recalculen.
+"""
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from calculos.factores import FactorNoEncontrado, TablaFactores
+from modules.bandas_utils import cargar_bandas, calcular_rangos_gcca, clasificar_cemento, clasificar_en_bandas
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+VERSION_MOTOR = 1
+
+RUTA_BANDAS = os.path.join(os.path.dirname(__file__), '..', 'data', 'bandas_gcca.json')
+
+# Factor del mix térmico del país (kg CO2/GJ) para las emisiones de combustión del clinker
+FACTOR_COMBUSTIBLE = ("combustible", "mezcla_termica")
+
+
+@dataclass(frozen=True)
+class RegistroBandas:
+    """Bandas GCCA de concreto (banda → resistencia MPa → kg CO2/m3) y su versión"""
+    bandas: Dict[str, Dict[int, float]]
+    tabla: "pd.DataFrame"
+    version: str
+
+
+@lru_cache(maxsize=1)
+def registro_bandas() -> RegistroBandas:
+    """Registro de bandas de data/bandas_gcca.json, cargado una vez por proceso"""
+    # pandas se importa con el primer cálculo, no al arrancar la API
+    import pandas as pd
+
+    bandas = cargar_bandas(RUTA_BANDAS)
+    version = hashlib.sha1(json.dumps(bandas, sort_keys=True).encode()).hexdigest()[:16]
+    return RegistroBandas(bandas, pd.DataFrame(bandas).T, version)
+
+
+def _resistencia(valor: float):
+    # Las columnas de la tabla de bandas son enteros (20, 25, ...)
+    return int(valor) if float(valor).is_integer() else valor
+
+
+def calcular_planta(
+    indicadores: Dict[str, Optional[float]],
+    concreto: List[dict],
+    factores: TablaFactores,
+    pais: str,
+    registro: RegistroBandas
+) -> dict:
+    """
+    Resultado de una planta.
+
+    Args:
+        indicadores: Indicador → valor (INDICADORES de excel.validaciones)
+        concreto: Filas {resistencia_mpa, volumen_m3, co2_kg_m3} agrupadas por resistencia
+        factores: Factores que rigen para el país de la planta
+        pais: País de la planta
+        registro: Bandas GCCA
+
+    Returns:
+        {"indicadores": {...}, "gcca": {...}, "bandas": [...], "combustion": {...}}
+        (solo las secciones con datos suficientes)
+    """
+    resultado = {"indicadores": {k: v for k, v in indicadores.items() if v is not None}}
+
+    co2_cemento, factor_clinker = indicadores.get("co2_cemento_kg_t"), indicadores.get("factor_clinker")
+    if co2_cemento is not None and factor_clinker is not None:
+        resultado["gcca"] = {
+            "clase": clasificar_cemento(co2_cemento, calcular_rangos_gcca(factor_clinker)),
+            "co2_kg_t": co2_cemento,
+            "factor_clinker": factor_clinker,
+        }
+
+    bandas = [
+        {**fila, "banda": clasificar_en_bandas(_resistencia(fila["resistencia_mpa"]), fila["co2_kg_m3"], registro.tabla)}
+        for fila in concreto
+        if fila.get("resistencia_mpa") is not None and fila.get("co2_kg_m3") is not None
+    ]
+    if bandas:
+        resultado["bandas"] = bandas
+
+    intensidad = indicadores.get("intensidad_termica_gj_t")
+    if intensidad is not None:
+        try:
+            factor = factores.obtener(*FACTOR_COMBUSTIBLE, pais)
+        except FactorNoEncontrado:
+            factor = None
+        if factor is not None:
+            resultado["combustion"] = {
+                "co2_kg_t_clinker": intensidad * factor.valor,
+                "factor": factor.valor,
+                "unidad_factor": factor.unidad,
+                "fuente": factor.fuente,
+            }
+
+    return resultado
@@ -1,12 +1,33 @@
 """
 Gestión de conexiones a la base de datos
+
+Con DATABASE_REPLICA_URL definida, las sesiones marcadas con
+`marcar_lectura_replica` envían sus SELECT a la réplica (también los text()
+que empiezan con SELECT); escrituras, SELECT ... FOR UPDATE y el resto del SQL
+textual siguen en el primario, y después de la primera escritura toda la
+sesión usa el primario. Un usuario que acaba de modificar datos lee del
+primario durante REPLICA_STICKY_SECONDS, por lo que ve sus propios cambios
+aunque la réplica esté atrasada: cada request que modifica datos guarda al
+confirmar la hora en usuarios.ultima_escritura (registrar_escritura_usuario),
+y la cookie COOKIE_LECTURA_PRIMARIA evita la consulta en los navegadores (ver
+get_db_lectura en api/middleware/replica.py).
+
+Esquemas por país: `usar_esquema_datos(db, "peru_data")` antepone el esquema
+al search_path de cada transacción de la sesión (SET LOCAL), por lo que las
+tablas datos_* se resuelven en peru_data si existen allí y el resto en public.
+El SQL compilado es el mismo para todos los esquemas y se reutiliza.
 """
-from sqlalchemy import create_engine
+import re
+
+from sqlalchemy import Select, TextClause, create_engine, event, text
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import Generator, Optional
 import os
 from dotenv import load_dotenv
 
+from database.instrumentacion import instalar_instrumentacion
+from database.consultas_lentas import instalar_registro_consultas_lentas
+
 load_dotenv()
 
 # Configuración de base de datos desde variables de entorno
@@ -24,8 +45,105 @@ engine = create_engine(
     max_overflow=10
 )
 
+# Réplica de lectura opcional (streaming replication del primario)
+DATABASE_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL", "")
+
+engine_replica = create_engine(
+    DATABASE_REPLICA_URL,
+    echo=os.getenv("DEBUG", "False").lower() == "true",
+    pool_pre_ping=True,
+    pool_size=5,
+    max_overflow=10
+) if DATABASE_REPLICA_URL else None
+
+# Lectura de los propios cambios: segundos que un cliente lee del primario
+# después de una escritura (debe superar el retraso habitual de la réplica)
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "10"))
+COOKIE_LECTURA_PRIMARIA = "ficem_lectura_primaria"
+METODOS_LECTURA = ("GET", "HEAD", "OPTIONS")
+
+# Instrumentación: consultas/tiempo de BD por request y registro de consultas lentas
+instalar_instrumentacion(engine)
+if engine_replica is not None:
+    instalar_instrumentacion(engine_replica)
+instalar_registro_consultas_lentas()
+
+# Marcas en Session.info: la sesión puede leer de la réplica; usuario que
+# escribe en la transacción
+_LECTURA_REPLICA = "lectura_replica"
+_ESCRITURA_USUARIO = "escritura_usuario"
+
+
+def _es_lectura(clause) -> bool:
+    if isinstance(clause, Select):
+        return clause._for_update_arg is None
+    if isinstance(clause, TextClause):
+        sql = clause.text.lstrip().upper()
+        return sql.startswith("SELECT") and " FOR UPDATE" not in sql and " FOR SHARE" not in sql
+    return False
+
+
+class SesionEnrutada(Session):
+    """Sesión que envía a la réplica las lecturas de las sesiones marcadas para lectura"""
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.info.get(_LECTURA_REPLICA):
+            if not self._flushing and _es_lectura(clause):
+                return engine_replica
+            # Escritura (o SQL que puede serlo): el resto de la sesión lee del primario
+            self.info.pop(_LECTURA_REPLICA)
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
 # Crear session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=SesionEnrutada, autocommit=False, autoflush=False, bind=engine)
+
+# Esquema de datos por país de la sesión (Session.info)
+_ESQUEMA_DATOS = "esquema_datos"
+_PATRON_ESQUEMA = re.compile(r"^[a-z_][a-z0-9_]{0,62}$")
+
+
+def _fijar_search_path(conexion, esquema: str) -> None:
+    # El nombre ya está validado: SET no admite parámetros
+    conexion.execute(text(f"SET LOCAL search_path TO {esquema}, public"))
+
+
+@event.listens_for(SesionEnrutada, "after_begin")
+def _esquema_al_iniciar(session: Session, transaccion, conexion) -> None:
+    # Cada conexión que entra en una transacción de la sesión (primario o réplica)
+    esquema = session.info.get(_ESQUEMA_DATOS)
+    if esquema:
+        _fijar_search_path(conexion, esquema)
+
+
+def usar_esquema_datos(db: Session, esquema: Optional[str]) -> None:
+    """
+    Resolver las tablas de la sesión primero en `esquema` (None = solo public).
+
+    Aplica a la transacción en curso y a las siguientes de la sesión.
+
+    Raises:
+        ValueError si el nombre no es un identificador válido en minúsculas
+    """
+    if esquema == db.info.get(_ESQUEMA_DATOS):
+        return
+    if esquema is not None and not _PATRON_ESQUEMA.match(esquema):
+        raise ValueError(f"Esquema de datos inválido: {esquema!r}")
+
+    # Conexión de la transacción en curso (la abre si no existe; after_begin
+    # todavía no ve el esquema nuevo y no lo aplica dos veces). Si la sesión
+    # pasa después al primario, after_begin lo aplica a esa conexión.
+    bind = engine_replica if db.info.get(_LECTURA_REPLICA) else engine
+    conexiones = [db.connection(bind_arguments={"bind": bind})]
+
+    if esquema is None:
+        db.info.pop(_ESQUEMA_DATOS, None)
+        for conexion in conexiones:
+            conexion.execute(text("SET LOCAL search_path TO public"))
+    else:
+        db.info[_ESQUEMA_DATOS] = esquema
+        for conexion in conexiones:
+            _fijar_search_path(conexion, esquema)
 
 
 def get_db() -> Generator[Session, None, None]:
@@ -40,6 +158,32 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def marcar_lectura_replica(db: Session) -> None:
+    """Permitir que los SELECT de la sesión vayan a la réplica (si está configurada)"""
+    if engine_replica is not None:
+        db.info[_LECTURA_REPLICA] = True
+
+
+def registrar_escritura_usuario(db: Session, usuario_id: int) -> None:
+    """Guardar la hora de escritura del usuario cuando la sesión confirme (con réplica)"""
+    if engine_replica is not None:
+        db.info[_ESCRITURA_USUARIO] = usuario_id
+
+
+@event.listens_for(SesionEnrutada, "after_commit")
+def _escritura_confirmada(session: Session) -> None:
+    usuario_id = session.info.pop(_ESCRITURA_USUARIO, None)
+    if usuario_id is None:
+        return
+    # Transacción propia y corta: no retiene el lock de la fila del usuario
+    # mientras dura la request
+    with engine.begin() as conexion:
+        conexion.execute(
+            text("UPDATE usuarios SET ultima_escritura = now() AT TIME ZONE 'utc' WHERE id = :id"),
+            {"id": usuario_id}
+        )
+
+
 def init_db():
     """
     Inicializa la base de datos creando todas las tablas.
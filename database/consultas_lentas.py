@@ -0,0 +1,187 @@
+"""
+Registro de consultas lentas con captura de EXPLAIN
+
+Toda sentencia que supere el umbral configurado se guarda en un buffer
+circular en memoria (por worker) con su SQL normalizado, la forma de los
+parámetros, la ruta HTTP que la originó y, por muestreo, el plan de
+`EXPLAIN (ANALYZE, BUFFERS)`. Los administradores lo consultan desde
+/api/v1/admin/consultas-lentas.
+"""
+import json
+import logging
+import os
+import random
+import re
+import threading
+from collections import deque
+from datetime import datetime
+from typing import List, Optional
+
+from database.instrumentacion import estadisticas_request, registrar_observador
+
+logger = logging.getLogger(__name__)
+
+# Umbral en milisegundos (0 = desactivado)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Fracción de consultas lentas a las que se les captura el plan (0 a 1)
+SLOW_QUERY_EXPLAIN_SAMPLE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE", "0"))
+SLOW_QUERY_BUFFER = int(os.getenv("SLOW_QUERY_BUFFER", "200"))
+
+_RE_CADENA = re.compile(r"'(?:[^']|'')*'")
+_RE_NUMERO = re.compile(r"(?<![\w.$])-?\d+(?:\.\d+)?\b")
+_RE_PARAMETRO = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?")
+_RE_LISTA = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_RE_ESPACIOS = re.compile(r"\s+")
+# Sentencias que modifican datos dentro de un WITH (o un SELECT ... FOR UPDATE)
+_RE_ESCRITURA = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+
+def normalizar_sql(sql: str) -> str:
+    """
+    SQL sin literales ni nombres de parámetros, para agrupar sentencias iguales.
+
+    Ej: "... WHERE id = %(id_1)s AND pais = 'peru' AND x IN (1, 2, 3)"
+     -> "... WHERE id = ? AND pais = ? AND x IN (...)"
+    """
+    sql = _RE_CADENA.sub("?", sql)
+    sql = _RE_PARAMETRO.sub("?", sql)
+    sql = _RE_NUMERO.sub("?", sql)
+    sql = _RE_LISTA.sub("(...)", sql)
+    return _RE_ESPACIOS.sub(" ", sql).strip()
+
+
+def forma_parametros(parameters, executemany: bool = False):
+    """Tipos de los parámetros (sin sus valores, que pueden contener datos sensibles)"""
+    if executemany:
+        filas = list(parameters or [])
+        return {"filas": len(filas), "forma": forma_parametros(filas[0]) if filas else None}
+
+    if isinstance(parameters, dict):
+        return {clave: type(valor).__name__ for clave, valor in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(valor).__name__ for valor in parameters]
+    return None
+
+
+class RegistroConsultasLentas:
+    """
+    Buffer circular de consultas lentas.
+
+    Args:
+        umbral_ms: Duración mínima para registrar una consulta (0 desactiva el registro)
+        muestreo_explain: Probabilidad de capturar EXPLAIN ANALYZE de una consulta lenta
+        capacidad: Cantidad máxima de consultas guardadas; las más antiguas se descartan
+    """
+
+    def __init__(self, umbral_ms: float, muestreo_explain: float = 0.0, capacidad: int = 200):
+        self.umbral_ms = umbral_ms
+        self.muestreo_explain = muestreo_explain
+        self._consultas = deque(maxlen=capacidad)
+        self._lock = threading.Lock()
+
+    @property
+    def habilitado(self) -> bool:
+        return self.umbral_ms > 0
+
+    def __call__(self, conn, cursor, statement, parameters, executemany, duracion):
+        """Observador de database.instrumentacion"""
+        duracion_ms = duracion * 1000
+        if not self.habilitado or duracion_ms < self.umbral_ms:
+            return
+
+        stats = estadisticas_request.get()
+        registro = {
+            "fecha": datetime.utcnow().isoformat(),
+            "duracion_ms": round(duracion_ms, 2),
+            "sql": normalizar_sql(statement),
+            "parametros": forma_parametros(parameters, executemany),
+            "ruta": f"{stats.metodo} {stats.ruta}" if stats is not None else None,
+            "plan": None
+        }
+
+        if self._debe_explicar(statement, executemany):
+            registro["plan"] = self._capturar_plan(conn, statement, parameters)
+
+        with self._lock:
+            self._consultas.append(registro)
+
+        logger.warning("Consulta lenta (%.1f ms) en %s: %s", duracion_ms, registro["ruta"], registro["sql"][:500])
+
+    def _debe_explicar(self, statement: str, executemany: bool) -> bool:
+        if executemany or self.muestreo_explain <= 0:
+            return False
+        # EXPLAIN ANALYZE ejecuta la sentencia: solo lecturas. Un WITH puede
+        # contener INSERT/UPDATE/DELETE, que se ejecutarían dos veces
+        if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            return False
+        if _RE_ESCRITURA.search(_RE_CADENA.sub("''", statement)):
+            return False
+        return random.random() < self.muestreo_explain
+
+    @staticmethod
+    def _capturar_plan(conn, statement: str, parameters) -> Optional[list]:
+        """
+        Ejecuta EXPLAIN sobre la misma conexión con un cursor DBAPI directo
+        (no dispara los eventos del engine). Se aísla en un SAVEPOINT para que
+        un error al explicar no aborte la transacción de la request.
+        """
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute("SAVEPOINT explain_consulta_lenta")
+            try:
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters or None)
+                plan = cursor.fetchone()[0]
+                cursor.execute("RELEASE SAVEPOINT explain_consulta_lenta")
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT explain_consulta_lenta")
+                raise
+            return json.loads(plan) if isinstance(plan, str) else plan
+        except Exception as e:
+            logger.info("No se pudo capturar el plan de la consulta lenta: %s", e)
+            return None
+        finally:
+            cursor.close()
+
+    def listar(self, limite: Optional[int] = None) -> List[dict]:
+        """Consultas registradas, de la más reciente a la más antigua"""
+        with self._lock:
+            consultas = list(reversed(self._consultas))
+        return consultas[:limite] if limite else consultas
+
+    def resumen(self) -> List[dict]:
+        """Consultas agrupadas por SQL normalizado, ordenadas por tiempo total"""
+        grupos = {}
+        for consulta in self.listar():
+            grupo = grupos.setdefault(consulta["sql"], {
+                "sql": consulta["sql"],
+                "ejecuciones": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "rutas": set()
+            })
+            grupo["ejecuciones"] += 1
+            grupo["total_ms"] += consulta["duracion_ms"]
+            grupo["max_ms"] = max(grupo["max_ms"], consulta["duracion_ms"])
+            if consulta["ruta"]:
+                grupo["rutas"].add(consulta["ruta"])
+
+        return [
+            {**g, "total_ms": round(g["total_ms"], 2), "rutas": sorted(g["rutas"])}
+            for g in sorted(grupos.values(), key=lambda g: g["total_ms"], reverse=True)
+        ]
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._consultas.clear()
+
+
+registro_consultas_lentas = RegistroConsultasLentas(
+    umbral_ms=SLOW_QUERY_MS,
+    muestreo_explain=SLOW_QUERY_EXPLAIN_SAMPLE,
+    capacidad=SLOW_QUERY_BUFFER
+)
+
+
+def instalar_registro_consultas_lentas() -> None:
+    """Registra el observador de consultas lentas (requiere instalar_instrumentacion)"""
+    registrar_observador(registro_consultas_lentas)
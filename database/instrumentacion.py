@@ -0,0 +1,96 @@
+"""
+Instrumentación de consultas SQL: conteo y tiempo de BD por request
+
+Engancha los eventos before_cursor_execute / after_cursor_execute del engine y
+acumula los valores en el contexto de la request activa (ContextVar), que
+inicializa el middleware de métricas de la API.
+"""
+import time
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class EstadisticasRequest:
+    """
+    Contadores de BD de una request en curso.
+
+    La ruta se resuelve de forma diferida con `resolver_ruta`, ya que el router
+    la determina después de que el middleware crea las estadísticas.
+    """
+
+    __slots__ = ("metodo", "consultas", "tiempo_db", "_ruta", "_resolver_ruta")
+
+    def __init__(self, metodo: str = "", ruta: str = "", resolver_ruta: Optional[Callable[[], str]] = None):
+        self.metodo = metodo
+        self.consultas = 0
+        self.tiempo_db = 0.0
+        self._ruta = ruta
+        self._resolver_ruta = resolver_ruta
+
+    @property
+    def ruta(self) -> str:
+        if not self._ruta and self._resolver_ruta is not None:
+            return self._resolver_ruta()
+        return self._ruta
+
+    @ruta.setter
+    def ruta(self, valor: str) -> None:
+        self._ruta = valor
+
+
+# Request activa; None fuera de una request HTTP (scripts, tareas de fondo)
+estadisticas_request: ContextVar[Optional[EstadisticasRequest]] = ContextVar(
+    "estadisticas_request", default=None
+)
+
+# Funciones adicionales a notificar con cada consulta ejecutada:
+# observador(conn, cursor, statement, parameters, executemany, duracion)
+_observadores: List[Callable] = []
+
+_CLAVE_INICIO = "instrumentacion_inicio"
+
+
+def registrar_observador(observador: Callable) -> None:
+    """Agrega un observador de consultas (ej: registro de consultas lentas)"""
+    if observador not in _observadores:
+        _observadores.append(observador)
+
+
+def _antes_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_CLAVE_INICIO, []).append(time.perf_counter())
+
+
+def _despues_de_ejecutar(conn, cursor, statement, parameters, context, executemany):
+    inicios = conn.info.get(_CLAVE_INICIO)
+    if not inicios:
+        return
+
+    duracion = time.perf_counter() - inicios.pop()
+
+    stats = estadisticas_request.get()
+    if stats is not None:
+        stats.consultas += 1
+        stats.tiempo_db += duracion
+
+    for observador in _observadores:
+        observador(conn, cursor, statement, parameters, executemany, duracion)
+
+
+def _al_fallar(contexto_error):
+    # Una consulta fallida no dispara after_cursor_execute: descartar su inicio
+    conn = contexto_error.connection
+    if conn is not None and conn.info.get(_CLAVE_INICIO):
+        conn.info[_CLAVE_INICIO].pop()
+
+
+def instalar_instrumentacion(engine: Engine) -> None:
+    """Registra los listeners en el engine (idempotente)"""
+    if event.contains(engine, "before_cursor_execute", _antes_de_ejecutar):
+        return
+
+    event.listen(engine, "before_cursor_execute", _antes_de_ejecutar)
+    event.listen(engine, "after_cursor_execute", _despues_de_ejecutar)
+    event.listen(engine, "handle_error", _al_fallar)
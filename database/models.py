@@ -1,10 +1,10 @@
 """
 Modelos de base de datos SQLAlchemy para 4C FICEM CORE
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Boolean, Enum
+from sqlalchemy import Column, Integer, BigInteger, String, Float, DateTime, Text, ForeignKey, Boolean, Enum, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 import enum
 import uuid
@@ -91,6 +91,8 @@ class Usuario(Base):
     activo = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    # Última request que modificó datos (UTC): lee del primario mientras la réplica se pone al día
+    ultima_escritura = Column(DateTime, nullable=True)
 
     # Relaciones
     empresa = relationship("Empresa", back_populates="usuarios")
@@ -290,6 +292,10 @@ class ProcesoMRV(Base):
 class Submission(Base):
     """Tabla de submissions (envíos) dentro de un proceso MRV"""
     __tablename__ = 'submissions'
+    __table_args__ = (
+        # Bandeja de tareas y listados por empresa filtran por ambas columnas
+        Index('idx_submissions_empresa_estado', 'empresa_id', 'estado_actual'),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     proceso_id = Column(String(100), ForeignKey('procesos_mrv.id', ondelete='CASCADE'), nullable=False, index=True)
@@ -333,13 +339,15 @@ class Submission(Base):
     ]
     """
 
-    datos_extraidos = Column(JSONB)
+    # Columnas pesadas diferidas: se leen solo al accederlas o con load_only/undefer
+    datos_extraidos = deferred(Column(JSONB))
     """
-    Estructura datos_extraidos:
+    Resumen de los datos extraídos; las filas están en datos_cemento,
+    datos_concreto y datos_clinker:
     {
-        "cemento": [...],
-        "concreto": [...],
-        "clinker": [...]
+        "cemento": {"filas": 120, "por_planta": {"1": 60, "2": 60}},
+        "concreto": {...},
+        "clinker": {...}
     }
     """
 
@@ -365,14 +373,15 @@ class Submission(Base):
     ]
     """
 
-    resultados_calculos = Column(JSONB)
+    resultados_calculos = deferred(Column(JSONB))
     """
-    Estructura resultados_calculos:
+    Estructura resultados_calculos (ver api/services/calculos_service.py):
     {
         "ejecutado": "2024-11-25T15:00:00",
-        "gcca": {...},
-        "bandas": {...},
-        "benchmarking": {...}
+        "huella": "4be1c0...",
+        "versiones": {"motor": 1, "bandas": "...", "factores": "..."},
+        "factores": {...},
+        "plantas": {"12": {"huella": "...", "gcca": {...}, "bandas": [...], ...}}
     }
     """
 
@@ -382,11 +391,160 @@ class Submission(Base):
     reviewed_at = Column(DateTime)
     approved_at = Column(DateTime)
 
+    # Control de concurrencia optimista: cada UPDATE incluye "WHERE version = ?"
+    # y una transición concurrente ya confirmada provoca StaleDataError
+    version = Column(Integer, nullable=False, default=1, server_default='1')
+
+    __mapper_args__ = {"version_id_col": version}
+
     # Relaciones
     proceso = relationship("ProcesoMRV", back_populates="submissions")
     empresa = relationship("Empresa")
     planta = relationship("Planta")
     usuario = relationship("Usuario")
+    eventos = relationship(
+        "SubmissionEvento",
+        back_populates="submission",
+        order_by="SubmissionEvento.fecha",
+        passive_deletes=True
+    )
 
     def __repr__(self):
         return f"<Submission(id={self.id}, proceso='{self.proceso_id}', estado='{self.estado_actual}')>"
+
+
+class SubmissionEvento(Base):
+    """
+    Log normalizado de transiciones de estado de submissions.
+
+    Replica cada entrada de workflow_history en una fila indexada, de modo que
+    métricas como "días promedio en ENVIADO por país" no requieran desempaquetar
+    el JSONB de cada submission.
+    """
+    __tablename__ = 'submission_eventos'
+    __table_args__ = (
+        Index('idx_submission_eventos_submission_fecha', 'submission_id', 'fecha'),
+        Index('idx_submission_eventos_estado_fecha', 'estado', 'fecha'),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    submission_id = Column(UUID(as_uuid=True), ForeignKey('submissions.id', ondelete='CASCADE'), nullable=False)
+    estado = Column(Enum(EstadoSubmission), nullable=False)
+    fecha = Column(DateTime, default=datetime.utcnow, nullable=False)
+    user_id = Column(Integer, ForeignKey('usuarios.id'), nullable=True)
+
+    # Relaciones
+    submission = relationship("Submission", back_populates="eventos")
+
+    def __repr__(self):
+        return f"<SubmissionEvento(submission_id={self.submission_id}, estado='{self.estado}', fecha='{self.fecha}')>"
+
+
+# === Datos extraídos del Excel (una tabla tipada por hoja) ===
+# submission_id/planta_id identifican el origen de cada fila; proceso_id y
+# empresa_id se copian del submission para filtrar sin joins en analítica
+# (p.ej. "factores de clinker de Perú 2024").
+
+class DatoCemento(Base):
+    """Filas de la hoja Cemento"""
+    __tablename__ = 'datos_cemento'
+    __table_args__ = (
+        Index('idx_datos_cemento_submission', 'submission_id', 'id'),
+        Index('idx_datos_cemento_proceso_empresa', 'proceso_id', 'empresa_id'),
+        Index('idx_datos_cemento_planta', 'planta_id'),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    submission_id = Column(UUID(as_uuid=True), ForeignKey('submissions.id', ondelete='CASCADE'), nullable=False)
+    proceso_id = Column(String(100), nullable=False)
+    empresa_id = Column(Integer, nullable=False)
+    planta_id = Column(Integer, ForeignKey('plantas.id', ondelete='CASCADE'), nullable=False)
+    fila = Column(Integer, nullable=False)  # Posición en la hoja (desde 1)
+
+    mes = Column(Integer)
+    tipo = Column(String(50))
+    produccion_t = Column(Float)
+    factor_clinker = Column(Float)
+    resistencia_mpa = Column(Float)
+    co2_kg_t = Column(Float)
+
+
+class DatoConcreto(Base):
+    """Filas de la hoja Concreto"""
+    __tablename__ = 'datos_concreto'
+    __table_args__ = (
+        Index('idx_datos_concreto_submission', 'submission_id', 'id'),
+        Index('idx_datos_concreto_proceso_empresa', 'proceso_id', 'empresa_id'),
+        Index('idx_datos_concreto_planta', 'planta_id'),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    submission_id = Column(UUID(as_uuid=True), ForeignKey('submissions.id', ondelete='CASCADE'), nullable=False)
+    proceso_id = Column(String(100), nullable=False)
+    empresa_id = Column(Integer, nullable=False)
+    planta_id = Column(Integer, ForeignKey('plantas.id', ondelete='CASCADE'), nullable=False)
+    fila = Column(Integer, nullable=False)
+
+    mes = Column(Integer)
+    resistencia_mpa = Column(Float)
+    volumen_m3 = Column(Float)
+    cemento_kg_m3 = Column(Float)
+    co2_kg_m3 = Column(Float)
+
+
+class DatoClinker(Base):
+    """Filas de la hoja Clinker"""
+    __tablename__ = 'datos_clinker'
+    __table_args__ = (
+        Index('idx_datos_clinker_submission', 'submission_id', 'id'),
+        Index('idx_datos_clinker_proceso_empresa', 'proceso_id', 'empresa_id'),
+        Index('idx_datos_clinker_planta', 'planta_id'),
+    )
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    submission_id = Column(UUID(as_uuid=True), ForeignKey('submissions.id', ondelete='CASCADE'), nullable=False)
+    proceso_id = Column(String(100), nullable=False)
+    empresa_id = Column(Integer, nullable=False)
+    planta_id = Column(Integer, ForeignKey('plantas.id', ondelete='CASCADE'), nullable=False)
+    fila = Column(Integer, nullable=False)
+
+    mes = Column(Integer)
+    produccion_t = Column(Float)
+    combustible_gj = Column(Float)
+    co2_kg_t = Column(Float)
+
+
+class AgregadoHistorico(Base):
+    """
+    Indicadores clave por planta y ciclo de los submissions aprobados por FICEM
+
+    Índice compacto para las validaciones interanuales y de atípicos: una sola
+    consulta por (pais, tipo_proceso, ciclo) trae las plantas del ciclo
+    anterior sin leer las filas de datos_*. Se actualiza al aprobar.
+    """
+    __tablename__ = 'agregados_historicos'
+    __table_args__ = (
+        UniqueConstraint('planta_id', 'tipo_proceso', 'ciclo', name='uq_agregados_historicos_planta_ciclo'),
+        Index('idx_agregados_historicos_pais_ciclo', 'pais', 'tipo_proceso', 'ciclo'),
+        Index('idx_agregados_historicos_empresa', 'empresa_id', 'ciclo'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    pais = Column(String(100), nullable=False)
+    tipo_proceso = Column(Enum(TipoProceso), nullable=False)
+    ciclo = Column(String(20), nullable=False)
+    empresa_id = Column(Integer, ForeignKey('empresas.id', ondelete='CASCADE'), nullable=False)
+    planta_id = Column(Integer, ForeignKey('plantas.id', ondelete='CASCADE'), nullable=False)
+    proceso_id = Column(String(100), nullable=False)
+    submission_id = Column(UUID(as_uuid=True), ForeignKey('submissions.id', ondelete='CASCADE'), nullable=False)
+
+    produccion_cemento_t = Column(Float)
+    factor_clinker = Column(Float)            # Promedio ponderado por producción
+    co2_cemento_kg_t = Column(Float)          # GWP del cemento, ponderado por producción
+    produccion_clinker_t = Column(Float)
+    intensidad_termica_gj_t = Column(Float)   # Combustible (GJ) / clinker producido
+    co2_clinker_kg_t = Column(Float)
+    volumen_concreto_m3 = Column(Float)
+    co2_concreto_kg_m3 = Column(Float)        # Ponderado por volumen
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,153 @@
+"""
+Generación de la plantilla Excel de un proceso
+
+La plantilla base (hojas de config["hojas_requeridas"], encabezados, anchos y
+validaciones) se escribe con xlsxwriter en modo constant_memory. Para pre-poblarla
+con los datos de una empresa no se regenera el libro: se copian las partes del
+.xlsx base y solo se agregan filas al XML de cada hoja.
+"""
+import io
+import math
+import zipfile
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+from xml.sax.saxutils import escape
+
+from excel.schemas import HOJAS, Hoja, obtener_hoja
+
+# Filas con validación de datos en la columna "mes"
+FILAS_VALIDADAS = 5000
+
+ANCHO_COLUMNA = 18
+
+
+@dataclass(frozen=True)
+class PlantillaBase:
+    """Libro base ya generado y la parte XML de cada hoja (clave → ruta en el zip)"""
+    contenido: bytes
+    partes: Dict[str, str]
+
+
+def hojas_plantilla(config: Optional[dict]) -> List[Hoja]:
+    """Hojas de config["hojas_requeridas"] conocidas; todas si no se indica ninguna"""
+    hojas = []
+    for nombre in (config or {}).get("hojas_requeridas") or []:
+        hoja = obtener_hoja(nombre)
+        if hoja is not None and hoja not in hojas:
+            hojas.append(hoja)
+    return hojas or list(HOJAS.values())
+
+
+def nombre_plantilla(proceso_id: str, config: Optional[dict]) -> str:
+    """Nombre de archivo: config["template_version"] o el id del proceso"""
+    nombre = (config or {}).get("template_version") or proceso_id
+    return nombre if nombre.lower().endswith(".xlsx") else f"{nombre}.xlsx"
+
+
+def _columna_excel(indice: int) -> str:
+    letras = ""
+    indice += 1
+    while indice:
+        indice, resto = divmod(indice - 1, 26)
+        letras = chr(65 + resto) + letras
+    return letras
+
+
+def generar_base(proceso_id: str, nombre_proceso: str, config: Optional[dict]) -> PlantillaBase:
+    """
+    Escribir la plantilla vacía de un proceso.
+
+    Las hojas se nombran como en HOJAS para que excel/parser.py las reconozca
+    al subir el archivo completado.
+    """
+    import xlsxwriter
+
+    buffer = io.BytesIO()
+    libro = xlsxwriter.Workbook(buffer, {"constant_memory": True})
+    libro.set_properties({
+        "title": nombre_proceso,
+        "subject": nombre_plantilla(proceso_id, config),
+        "comments": f"Proceso {proceso_id}",
+    })
+    encabezado = libro.add_format({"bold": True, "bg_color": "#D9E1F2", "border": 1})
+
+    partes = {}
+    for numero, hoja in enumerate(hojas_plantilla(config), start=1):
+        ws = libro.add_worksheet(hoja.nombre)
+        # xlsxwriter nombra las partes por orden de creación
+        partes[hoja.clave] = f"xl/worksheets/sheet{numero}.xml"
+
+        ws.set_column(0, len(hoja.columnas) - 1, ANCHO_COLUMNA)
+        ws.freeze_panes(1, 0)
+        ws.write_row(0, 0, hoja.nombres_columnas, encabezado)
+
+        if "mes" in hoja.nombres_columnas:
+            col = hoja.nombres_columnas.index("mes")
+            ws.data_validation(1, col, FILAS_VALIDADAS, col, {
+                "validate": "integer",
+                "criteria": "between",
+                "minimum": 1,
+                "maximum": 12,
+                "error_message": "El mes debe estar entre 1 y 12",
+            })
+
+    libro.close()
+    return PlantillaBase(contenido=buffer.getvalue(), partes=partes)
+
+
+def _celda_xml(referencia: str, valor) -> str:
+    if valor is None or (isinstance(valor, float) and not math.isfinite(valor)):
+        return ""
+    if isinstance(valor, bool):
+        return f'<c r="{referencia}" t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float)):
+        return f'<c r="{referencia}"><v>{valor!r}</v></c>'
+    return f'<c r="{referencia}" t="inlineStr"><is><t>{escape(str(valor))}</t></is></c>'
+
+
+def _filas_xml(filas: Sequence[tuple], letras: List[str]) -> str:
+    """Filas desde la 2 (la 1 es el encabezado), con strings inline como xlsxwriter"""
+    partes = []
+    for r, fila in enumerate(filas, start=2):
+        celdas = "".join(_celda_xml(f"{letras[c]}{r}", v) for c, v in enumerate(fila))
+        partes.append(f'<row r="{r}">{celdas}</row>')
+    return "".join(partes)
+
+
+def completar_plantilla(base: PlantillaBase, filas: Dict[str, Sequence[tuple]]) -> bytes:
+    """
+    Copia de la plantilla base con filas agregadas a sus hojas.
+
+    Args:
+        base: Plantilla generada con generar_base
+        filas: clave de hoja → filas en el orden de `hoja.columnas`
+    """
+    modificadas = {}
+    for clave, filas_hoja in filas.items():
+        if not filas_hoja or clave not in base.partes:
+            continue
+        letras = [_columna_excel(i) for i in range(len(HOJAS[clave].columnas))]
+        modificadas[base.partes[clave]] = (letras, filas_hoja)
+
+    if not modificadas:
+        return base.contenido
+
+    salida = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(base.contenido)) as origen, \
+            zipfile.ZipFile(salida, "w", zipfile.ZIP_DEFLATED) as destino:
+        for info in origen.infolist():
+            contenido = origen.read(info)
+
+            if info.filename in modificadas:
+                letras, filas_hoja = modificadas[info.filename]
+                xml = contenido.decode("utf-8")
+                xml = xml.replace(
+                    f'<dimension ref="A1:{letras[-1]}1"/>',
+                    f'<dimension ref="A1:{letras[-1]}{len(filas_hoja) + 1}"/>', 1
+                )
+                xml = xml.replace("</sheetData>", _filas_xml(filas_hoja, letras) + "</sheetData>", 1)
+                contenido = xml.encode("utf-8")
+
+            destino.writestr(info, contenido)
+
+    return salida.getvalue()
@@ -0,0 +1,155 @@
+"""
+Lectura del Excel de carga
+
+Lee las hojas definidas en excel/schemas.py con openpyxl en modo read_only
+(sin cargar estilos ni el libro completo en memoria) y convierte cada celda
+al tipo de su columna.
+"""
+import io
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from excel.schemas import HOJAS, MAX_ENTERO, MIN_ENTERO, Columna, Hoja, obtener_hoja
+from services.utiles import limpio
+
+# Errores de conversión que se conservan por hoja (el resto solo se cuenta)
+MAX_ERRORES_POR_HOJA = 50
+
+
+class ExcelInvalido(Exception):
+    """El archivo no es un libro .xlsx legible"""
+
+
+@dataclass
+class HojaLeida:
+    """Filas de una hoja, como tuplas en el orden de `hoja.columnas`"""
+    hoja: Hoja
+    filas: List[tuple] = field(default_factory=list)
+    errores: List[str] = field(default_factory=list)
+    total_errores: int = 0
+    columnas_faltantes: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ExcelLeido:
+    hojas: Dict[str, HojaLeida]
+    hojas_desconocidas: List[str]
+
+    def resumen(self) -> dict:
+        """Resumen por hoja para validaciones y datos_extraidos"""
+        return {
+            clave: {
+                "filas": len(leida.filas),
+                "errores": leida.total_errores,
+                "columnas_faltantes": leida.columnas_faltantes,
+            }
+            for clave, leida in self.hojas.items()
+        }
+
+
+def _convertir(valor: Any, columna: Columna) -> Any:
+    """
+    Valor de la celda en el tipo de la columna.
+
+    Raises:
+        ValueError si no se puede convertir o no cabe en la columna de la tabla
+    """
+    if valor is None or (isinstance(valor, str) and not valor.strip()):
+        return None
+    if columna.tipo is str:
+        texto = str(valor).strip()
+        if columna.longitud is not None and len(texto) > columna.longitud:
+            raise ValueError(f"más de {columna.longitud} caracteres")
+        return texto
+    if isinstance(valor, str):
+        valor = valor.strip().replace(",", ".")
+    if columna.tipo is int:
+        entero = int(float(valor))
+        if not MIN_ENTERO <= entero <= MAX_ENTERO:
+            raise ValueError("fuera de rango")
+        return entero
+    return columna.tipo(valor)
+
+
+def _indices_columnas(hoja: Hoja, encabezado: tuple) -> Dict[int, int]:
+    """Posición en el Excel → posición en hoja.columnas"""
+    nombres = {}
+    for j, columna in enumerate(hoja.columnas):
+        for nombre in (columna.nombre,) + columna.alias:
+            nombres.setdefault(limpio(nombre), j)
+
+    indices = {}
+    for i, titulo in enumerate(encabezado):
+        j = nombres.get(limpio(titulo)) if titulo is not None else None
+        # Si una columna aparece dos veces se usa la primera
+        if j is not None and j not in indices.values():
+            indices[i] = j
+    return indices
+
+
+def _leer_hoja(ws, hoja: Hoja) -> HojaLeida:
+    leida = HojaLeida(hoja=hoja)
+    filas = ws.iter_rows(values_only=True)
+
+    encabezado = next(filas, None)
+    if encabezado is None:
+        leida.columnas_faltantes = list(hoja.nombres_columnas)
+        return leida
+
+    indices = _indices_columnas(hoja, encabezado)
+    leida.columnas_faltantes = [c.nombre for j, c in enumerate(hoja.columnas) if j not in indices.values()]
+    ancho = len(hoja.columnas)
+
+    for numero, valores in enumerate(filas, start=2):
+        if not any(v is not None for v in valores):
+            continue
+
+        fila = [None] * ancho
+        for i_excel, j in indices.items():
+            if i_excel >= len(valores):
+                continue
+            columna = hoja.columnas[j]
+            try:
+                fila[j] = _convertir(valores[i_excel], columna)
+            except (TypeError, ValueError, OverflowError):
+                leida.total_errores += 1
+                if len(leida.errores) < MAX_ERRORES_POR_HOJA:
+                    leida.errores.append(f"{hoja.nombre} fila {numero}: '{columna.nombre}' inválido ({valores[i_excel]!r})")
+
+        leida.filas.append(tuple(fila))
+
+    return leida
+
+
+def leer_excel(contenido: bytes, hojas: Optional[List[str]] = None) -> ExcelLeido:
+    """
+    Leer las hojas conocidas de un .xlsx.
+
+    Args:
+        contenido: Bytes del archivo
+        hojas: Claves de hoja a leer (por defecto todas las de HOJAS)
+
+    Raises:
+        ExcelInvalido si el archivo no se puede abrir
+    """
+    from openpyxl import load_workbook
+
+    try:
+        libro = load_workbook(io.BytesIO(contenido), read_only=True, data_only=True)
+    except Exception as e:
+        raise ExcelInvalido(f"No se pudo leer el archivo Excel: {e}") from e
+
+    try:
+        claves = set(hojas or HOJAS)
+        leidas, desconocidas = {}, []
+
+        for ws in libro.worksheets:
+            hoja = obtener_hoja(ws.title)
+            if hoja is None:
+                desconocidas.append(ws.title)
+            elif hoja.clave in claves and hoja.clave not in leidas:
+                leidas[hoja.clave] = _leer_hoja(ws, hoja)
+
+        return ExcelLeido(hojas=leidas, hojas_desconocidas=desconocidas)
+    finally:
+        libro.close()
@@ -0,0 +1,105 @@
+"""
+Lectura y validación de Excel en un pool de procesos
+
+openpyxl es CPU y mantiene el GIL, por lo que leer varios libros en threads no
+los paraleliza. Los libros de un submission (uno por planta) se leen y validan
+en paralelo en un ProcessPoolExecutor compartido por el worker de la API:
+la latencia de validar N plantas queda cerca de la de la más lenta.
+
+EXCEL_WORKERS fija el tamaño del pool (por defecto, núcleos disponibles);
+con 0 se lee en el proceso actual, en un thread.
+"""
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from excel.parser import ExcelInvalido, ExcelLeido, leer_excel
+from excel.validaciones import agregados_leido, validar_leido
+
+EXCEL_WORKERS = int(os.getenv("EXCEL_WORKERS", str(os.cpu_count() or 1)))
+
+_pool: Optional[ProcessPoolExecutor] = None
+_lock_pool = threading.Lock()
+
+
+@dataclass
+class ResultadoArchivo:
+    """Lectura, validaciones y agregados de un libro; `error` si no se pudo leer"""
+    ruta: str
+    leido: Optional[ExcelLeido] = None
+    validaciones: List[dict] = field(default_factory=list)
+    agregados: Optional[dict] = None
+    error: Optional[str] = None
+
+
+def procesar_archivo(ruta: str, config: Optional[dict] = None) -> ResultadoArchivo:
+    """Leer y validar un libro desde disco (se ejecuta en el pool)"""
+    try:
+        with open(ruta, "rb") as f:
+            leido = leer_excel(f.read())
+    except FileNotFoundError:
+        return ResultadoArchivo(ruta=ruta, error="Archivo no disponible en el almacenamiento")
+    except ExcelInvalido as e:
+        return ResultadoArchivo(ruta=ruta, error=str(e))
+
+    return ResultadoArchivo(
+        ruta=ruta,
+        leido=leido,
+        validaciones=validar_leido(leido, config),
+        agregados=agregados_leido(leido)
+    )
+
+
+def _obtener_pool() -> Optional[Executor]:
+    """Pool compartido, creado en el primer uso (None con EXCEL_WORKERS=0)"""
+    global _pool
+
+    if EXCEL_WORKERS <= 0:
+        return None
+
+    with _lock_pool:
+        if _pool is None:
+            # spawn: el worker de la API tiene threads y fork podría heredar locks tomados
+            _pool = ProcessPoolExecutor(
+                max_workers=EXCEL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pool
+
+
+def _descartar_pool(pool: Executor) -> None:
+    global _pool
+
+    with _lock_pool:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def procesar_archivos(rutas: List[str], config: Optional[dict] = None) -> List[ResultadoArchivo]:
+    """
+    Leer y validar varios libros en paralelo, en el orden de `rutas`.
+
+    Si un proceso del pool muere, el pool se recrea y el lote se reintenta una vez.
+    """
+    if not rutas:
+        return []
+
+    loop = asyncio.get_running_loop()
+
+    for intento in range(2):
+        pool = _obtener_pool()
+        try:
+            return list(await asyncio.gather(*(
+                loop.run_in_executor(pool, procesar_archivo, ruta, config) for ruta in rutas
+            )))
+        except BrokenProcessPool:
+            if pool is None or intento:
+                raise
+            _descartar_pool(pool)
+
@@ -0,0 +1,86 @@
+"""
+Estructura esperada de las hojas del Excel de carga
+
+Cada hoja se guarda en su propia tabla tipada (datos_cemento, datos_concreto,
+datos_clinker). Los nombres de columna del Excel se comparan normalizados
+(minúsculas, sin acentos ni espacios), por lo que "Producción (t)" y
+"produccion_t" son equivalentes.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+# Rango de las columnas INTEGER de las tablas de datos
+MIN_ENTERO = -2**31
+MAX_ENTERO = 2**31 - 1
+
+
+@dataclass(frozen=True)
+class Columna:
+    """
+    Columna de una hoja: nombre en la tabla y tipo Python al que se convierte.
+
+    Los valores deben caber en la columna de la tabla: los int en INTEGER y
+    los str en `longitud` caracteres (VARCHAR(longitud)).
+    """
+    nombre: str
+    tipo: type
+    alias: Tuple[str, ...] = ()
+    longitud: Optional[int] = None
+
+
+@dataclass(frozen=True)
+class Hoja:
+    """Hoja del Excel y tabla donde se guardan sus filas"""
+    clave: str
+    nombre: str
+    tabla: str
+    columnas: Tuple[Columna, ...]
+
+    @property
+    def nombres_columnas(self) -> Tuple[str, ...]:
+        return tuple(c.nombre for c in self.columnas)
+
+
+HOJAS: Dict[str, Hoja] = {
+    "cemento": Hoja(
+        clave="cemento",
+        nombre="Cemento",
+        tabla="datos_cemento",
+        columnas=(
+            Columna("mes", int),
+            Columna("tipo", str, alias=("tipo_cemento",), longitud=50),
+            Columna("produccion_t", float, alias=("produccion",)),
+            Columna("factor_clinker", float),
+            Columna("resistencia_mpa", float, alias=("resistencia",)),
+            Columna("co2_kg_t", float, alias=("co2",)),
+        ),
+    ),
+    "concreto": Hoja(
+        clave="concreto",
+        nombre="Concreto",
+        tabla="datos_concreto",
+        columnas=(
+            Columna("mes", int),
+            Columna("resistencia_mpa", float, alias=("resistencia",)),
+            Columna("volumen_m3", float, alias=("volumen",)),
+            Columna("cemento_kg_m3", float, alias=("contenido_cemento",)),
+            Columna("co2_kg_m3", float, alias=("co2",)),
+        ),
+    ),
+    "clinker": Hoja(
+        clave="clinker",
+        nombre="Clinker",
+        tabla="datos_clinker",
+        columnas=(
+            Columna("mes", int),
+            Columna("produccion_t", float, alias=("produccion",)),
+            Columna("combustible_gj", float, alias=("combustible",)),
+            Columna("co2_kg_t", float, alias=("co2",)),
+        ),
+    ),
+}
+
+
+def obtener_hoja(nombre: str) -> Optional[Hoja]:
+    """Hoja por clave o nombre de pestaña, sin distinguir mayúsculas"""
+    return HOJAS.get(nombre.strip().lower())
@@ -0,0 +1,336 @@
+"""
+Validaciones de un Excel leído
+
+Se ejecutan las validaciones de config["validaciones"] del proceso (tipo y
+nivel); sin configuración se usan estructura (error), rangos y consistencia
+(warning). Cada validación devuelve un dict con el formato de ValidacionResult.
+
+estructura y rangos se evalúan por archivo de planta; consistencia compara
+plantas usando solo los agregados por archivo (agregados_leido), que se
+guardan junto al resultado y no requieren volver a leer los Excel.
+interanual y atipicos comparan indicadores por planta con el ciclo anterior
+(ver api/services/historico_service.py).
+"""
+import hashlib
+import json
+import statistics
+from typing import Dict, List, Optional, Tuple
+
+from excel.parser import ExcelLeido
+from excel.schemas import obtener_hoja
+
+VALIDACIONES_DEFECTO = [
+    {"tipo": "estructura", "nivel": "error"},
+    {"tipo": "rangos", "nivel": "warning"},
+    {"tipo": "consistencia", "nivel": "warning"},
+    {"tipo": "interanual", "nivel": "warning"},
+    {"tipo": "atipicos", "nivel": "warning"},
+]
+
+# Validaciones que dependen solo del archivo de una planta (se guardan por sha256)
+TIPOS_POR_ARCHIVO = ("estructura", "rangos")
+
+# Indicadores por planta de agregados_historicos
+INDICADORES = (
+    "produccion_cemento_t", "factor_clinker", "co2_cemento_kg_t",
+    "produccion_clinker_t", "intensidad_termica_gj_t", "co2_clinker_kg_t",
+    "volumen_concreto_m3", "co2_concreto_kg_m3",
+)
+
+# Indicadores de intensidad, comparables entre plantas de distinto tamaño
+INDICADORES_INTENSIDAD = (
+    "factor_clinker", "co2_cemento_kg_t", "intensidad_termica_gj_t", "co2_clinker_kg_t", "co2_concreto_kg_m3",
+)
+
+# Subir al cambiar las reglas: invalida los resultados guardados por archivo
+VERSION_VALIDACIONES = 1
+
+# Rango aceptado por columna; config["validaciones"][rangos]["params"] los reemplaza
+RANGOS_DEFECTO: Dict[str, Tuple[float, float]] = {
+    "mes": (1, 12),
+    "factor_clinker": (0, 1),
+    "produccion_t": (0, float("inf")),
+    "volumen_m3": (0, float("inf")),
+    "combustible_gj": (0, float("inf")),
+    "resistencia_mpa": (0, 150),
+    "cemento_kg_m3": (0, 1000),
+    "co2_kg_t": (0, 2000),
+    "co2_kg_m3": (0, 1000),
+}
+
+# Detalles que se conservan por validación (el resto solo se cuenta)
+MAX_DETALLES = 50
+
+
+def _resultado(tipo: str, nivel: str, detalles: List[str], total: int, mensaje_ok: str, mensaje: str) -> dict:
+    if not total:
+        return {"tipo": tipo, "status": "ok", "mensaje": mensaje_ok, "detalles": None}
+    return {"tipo": tipo, "status": nivel, "mensaje": mensaje.format(total=total), "detalles": detalles[:MAX_DETALLES]}
+
+
+def validar_estructura(leido: ExcelLeido, hojas_requeridas: List[str], nivel: str) -> dict:
+    """Hojas requeridas presentes, columnas completas y celdas convertibles"""
+    detalles = []
+
+    for nombre in hojas_requeridas:
+        hoja = obtener_hoja(nombre)
+        if hoja is not None and hoja.clave not in leido.hojas:
+            detalles.append(f"Falta la hoja '{hoja.nombre}'")
+
+    for leida in leido.hojas.values():
+        if leida.columnas_faltantes:
+            detalles.append(f"{leida.hoja.nombre}: faltan columnas {', '.join(leida.columnas_faltantes)}")
+        detalles.extend(leida.errores)
+        if leida.total_errores > len(leida.errores):
+            detalles.append(f"{leida.hoja.nombre}: {leida.total_errores - len(leida.errores)} celdas inválidas más")
+
+    return _resultado("estructura", nivel, detalles, len(detalles), "Estructura correcta", "{total} problemas de estructura")
+
+
+def validar_rangos(leido: ExcelLeido, nivel: str, params: Optional[dict] = None) -> dict:
+    """Valores numéricos fuera del rango esperado de su columna"""
+    rangos = dict(RANGOS_DEFECTO)
+    for columna, rango in (params or {}).items():
+        # [min, max] con null como límite abierto
+        if isinstance(rango, (list, tuple)) and len(rango) == 2:
+            minimo, maximo = rango
+            rangos[columna] = (
+                float("-inf") if minimo is None else minimo,
+                float("inf") if maximo is None else maximo
+            )
+    detalles, total = [], 0
+
+    for leida in leido.hojas.values():
+        columnas = [(j, c.nombre, rangos[c.nombre]) for j, c in enumerate(leida.hoja.columnas) if c.nombre in rangos]
+
+        for numero, fila in enumerate(leida.filas, start=1):
+            for j, nombre, (minimo, maximo) in columnas:
+                valor = fila[j]
+                if valor is not None and not minimo <= valor <= maximo:
+                    total += 1
+                    if len(detalles) < MAX_DETALLES:
+                        detalles.append(f"{leida.hoja.nombre} registro {numero}: {nombre}={valor} fuera de [{minimo}, {maximo}]")
+
+    return _resultado("rangos", nivel, detalles, total, "Rangos válidos", "{total} valores fuera de rango")
+
+
+def configuradas(config: Optional[dict]) -> List[dict]:
+    """Validaciones del proceso (o las por defecto)"""
+    return (config or {}).get("validaciones") or VALIDACIONES_DEFECTO
+
+
+def huella_validaciones(config: Optional[dict]) -> str:
+    """Identifica las reglas por archivo del proceso; si cambia, los resultados guardados no sirven"""
+    config = config or {}
+    datos = {
+        "version": VERSION_VALIDACIONES,
+        "validaciones": [v for v in configuradas(config) if v.get("tipo") in TIPOS_POR_ARCHIVO],
+        "hojas_requeridas": config.get("hojas_requeridas") or [],
+    }
+    return hashlib.sha1(json.dumps(datos, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+def agregados_leido(leido: ExcelLeido) -> dict:
+    """Filas y meses reportados por hoja, para las reglas entre plantas"""
+    agregados = {}
+    for clave, leida in leido.hojas.items():
+        meses = set()
+        if "mes" in leida.hoja.nombres_columnas:
+            j = leida.hoja.nombres_columnas.index("mes")
+            # Meses fuera de 1-12 ya los reporta rangos
+            meses = {fila[j] for fila in leida.filas if fila[j] is not None and 1 <= fila[j] <= 12}
+        agregados[clave] = {"filas": len(leida.filas), "meses": sorted(meses)}
+    return agregados
+
+
+def validar_leido(leido: ExcelLeido, config: Optional[dict]) -> List[dict]:
+    """Ejecutar las validaciones por archivo configuradas del proceso sobre un Excel leído"""
+    config = config or {}
+    resultados = []
+
+    for validacion in configuradas(config):
+        tipo, nivel = validacion.get("tipo"), validacion.get("nivel", "error")
+        if tipo == "estructura":
+            resultados.append(validar_estructura(leido, config.get("hojas_requeridas") or [], nivel))
+        elif tipo == "rangos":
+            resultados.append(validar_rangos(leido, nivel, validacion.get("params")))
+
+    return resultados
+
+
+_GRAVEDAD = {"ok": 0, "warning": 1, "error": 2}
+
+
+def combinar_validaciones(por_planta: List[Tuple[str, List[dict]]]) -> List[dict]:
+    """
+    Una validación por tipo para todo el submission.
+
+    El status es el más grave entre las plantas y los detalles se prefijan con
+    el nombre de la planta.
+
+    Args:
+        por_planta: (nombre de planta, validaciones de su archivo)
+    """
+    combinadas: Dict[str, dict] = {}
+
+    for planta, validaciones in por_planta:
+        for v in validaciones:
+            actual = combinadas.setdefault(v["tipo"], {"tipo": v["tipo"], "status": "ok", "mensajes": [], "detalles": []})
+            if v["status"] == "ok":
+                continue
+            if _GRAVEDAD[v["status"]] > _GRAVEDAD[actual["status"]]:
+                actual["status"] = v["status"]
+            actual["mensajes"].append(f"{planta}: {v['mensaje']}")
+            actual["detalles"].extend(f"{planta} - {d}" for d in v.get("detalles") or [])
+
+    return [
+        {
+            "tipo": c["tipo"],
+            "status": c["status"],
+            "mensaje": "; ".join(c["mensajes"]) if c["mensajes"] else "Sin observaciones",
+            "detalles": c["detalles"][:MAX_DETALLES] or None,
+        }
+        for c in combinadas.values()
+    ]
+
+
+def validar_consistencia(por_planta: List[Tuple[str, Optional[str], Optional[dict]]], nivel: str) -> dict:
+    """
+    Reglas entre plantas del submission, sobre los agregados de cada archivo.
+
+    - Archivos idénticos en más de una planta
+    - Plantas sin filas en ninguna hoja
+    - Meses que reportan otras plantas y faltan en una
+
+    Args:
+        por_planta: (nombre de planta, sha256 del archivo, agregados_leido o None si no se leyó)
+    """
+    detalles = []
+
+    por_sha: Dict[str, List[str]] = {}
+    for planta, sha256, _ in por_planta:
+        if sha256:
+            por_sha.setdefault(sha256, []).append(planta)
+    for plantas in por_sha.values():
+        if len(plantas) > 1:
+            detalles.append(f"Archivo idéntico en {', '.join(plantas)}")
+
+    leidas = [(planta, agregados) for planta, _, agregados in por_planta if agregados is not None]
+    for planta, agregados in leidas:
+        if not any(h["filas"] for h in agregados.values()):
+            detalles.append(f"{planta}: el archivo no tiene filas")
+
+    if len(leidas) > 1:
+        for clave in sorted({c for _, agregados in leidas for c in agregados}):
+            reportados = {planta: set(a[clave]["meses"]) for planta, a in leidas if a.get(clave, {}).get("filas")}
+            todos = set().union(*reportados.values()) if reportados else set()
+            for planta, meses in reportados.items():
+                faltan = sorted(todos - meses)
+                if faltan:
+                    detalles.append(f"{planta}: {clave} sin los meses {', '.join(map(str, faltan))} que reportan otras plantas")
+
+    return _resultado("consistencia", nivel, detalles, len(detalles), "Plantas consistentes", "{total} diferencias entre plantas")
+
+
+def validar_entre_plantas(config: Optional[dict], por_planta: List[Tuple[str, Optional[str], Optional[dict]]]) -> List[dict]:
+    """Ejecutar las validaciones configuradas que comparan plantas"""
+    return [
+        validar_consistencia(por_planta, validacion.get("nivel", "warning"))
+        for validacion in configuradas(config)
+        if validacion.get("tipo") == "consistencia"
+    ]
+
+
+def _numero(valor: float) -> str:
+    return f"{valor:,.0f}" if abs(valor) >= 1000 else f"{valor:.4g}"
+
+
+def validar_interanual(
+    actuales: Dict[str, dict],
+    previos: Dict[str, dict],
+    ciclo_previo: Optional[str],
+    nivel: str,
+    params: dict
+) -> dict:
+    """
+    Variación de cada indicador de la planta respecto del ciclo anterior.
+
+    Args:
+        actuales: planta → indicadores del submission
+        previos: planta → indicadores de la misma planta en `ciclo_previo`
+        params: tolerancia (0.15 = 15%) e indicadores a comparar
+    """
+    if not ciclo_previo:
+        return _resultado("interanual", nivel, [], 0, "Sin datos del ciclo anterior", "")
+
+    tolerancia = params.get("tolerancia", 0.15)
+    indicadores = params.get("indicadores") or INDICADORES
+    detalles = []
+
+    for planta, valores in actuales.items():
+        previo = previos.get(planta)
+        if previo is None:
+            continue
+        for indicador in indicadores:
+            antes, ahora = previo.get(indicador), valores.get(indicador)
+            if not antes or ahora is None:
+                continue
+            variacion = (ahora - antes) / abs(antes)
+            if abs(variacion) > tolerancia:
+                detalles.append(
+                    f"{planta}: {indicador} {variacion:+.0%} respecto de {ciclo_previo} ({_numero(antes)} → {_numero(ahora)})"
+                )
+
+    return _resultado(
+        "interanual", nivel, detalles, len(detalles), f"Variaciones dentro de ±{tolerancia:.0%} respecto de {ciclo_previo}",
+        f"{{total}} variaciones mayores a {tolerancia:.0%} respecto de {ciclo_previo}"
+    )
+
+
+def validar_atipicos(
+    actuales: Dict[str, dict],
+    pares: List[dict],
+    ciclo_previo: Optional[str],
+    nivel: str,
+    params: dict
+) -> dict:
+    """
+    Indicadores de intensidad atípicos frente a las demás plantas del país.
+
+    Usa el z-score robusto (mediana y MAD) sobre el ciclo anterior.
+
+    Args:
+        actuales: planta → indicadores del submission
+        pares: indicadores de las plantas de otras empresas en `ciclo_previo`
+        params: umbral (z robusto, 3.5), minimo_pares (5) e indicadores a comparar
+    """
+    umbral = params.get("umbral", 3.5)
+    minimo = params.get("minimo_pares", 5)
+    indicadores = params.get("indicadores") or INDICADORES_INTENSIDAD
+    detalles, comparados = [], 0
+
+    for indicador in indicadores:
+        valores = [p[indicador] for p in pares if p.get(indicador) is not None]
+        if len(valores) < minimo:
+            continue
+
+        mediana = statistics.median(valores)
+        mad = statistics.median(abs(v - mediana) for v in valores)
+        if not mad:
+            continue
+        comparados += 1
+
+        for planta, actuales_planta in actuales.items():
+            valor = actuales_planta.get(indicador)
+            if valor is not None and abs(0.6745 * (valor - mediana) / mad) > umbral:
+                detalles.append(
+                    f"{planta}: {indicador}={_numero(valor)} atípico frente a {len(valores)} plantas en {ciclo_previo} (mediana {_numero(mediana)})"
+                )
+
+    if not comparados:
+        return _resultado("atipicos", nivel, [], 0, "Sin suficientes plantas de referencia", "")
+
+    return _resultado(
+        "atipicos", nivel, detalles, len(detalles), f"Indicadores dentro del rango de las plantas del país en {ciclo_previo}",
+        "{total} indicadores atípicos frente a las plantas del país"
+    )
@@ -3,7 +3,6 @@ Utilidades para manejo de Bandas GCCA
 Funciones comunes para clasificación de cementos y concretos
 """
 import json
-import pandas as pd
 
 
 def cargar_bandas(json_path):
@@ -0,0 +1,135 @@
+"""
+Migración: Índice histórico de indicadores por planta y ciclo
+Fecha: 2026-10-19
+Descripción: Crea agregados_historicos (producción, factor clinker, intensidad
+térmica y CO2 por planta, ciclo y tipo de proceso) y lo completa con los
+submissions ya aprobados por FICEM, para las validaciones interanual y de
+atípicos. Lee las tablas de datos de public y de cada esquema por país
+(scripts/migrate_esquemas_pais.py), por lo que se puede volver a ejecutar
+después de mover filas a un esquema.
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from database.connection import engine
+from api.services.historico_service import sql_indicadores
+
+
+def migrate():
+    """Ejecutar migración"""
+
+    with engine.connect() as conn:
+        print("Creando tabla agregados_historicos...")
+
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS agregados_historicos (
+                id SERIAL PRIMARY KEY,
+                pais VARCHAR(100) NOT NULL,
+                tipo_proceso tipoproceso NOT NULL,
+                ciclo VARCHAR(20) NOT NULL,
+                empresa_id INTEGER NOT NULL REFERENCES empresas(id) ON DELETE CASCADE,
+                planta_id INTEGER NOT NULL REFERENCES plantas(id) ON DELETE CASCADE,
+                proceso_id VARCHAR(100) NOT NULL,
+                submission_id UUID NOT NULL REFERENCES submissions(id) ON DELETE CASCADE,
+                produccion_cemento_t DOUBLE PRECISION,
+                factor_clinker DOUBLE PRECISION,
+                co2_cemento_kg_t DOUBLE PRECISION,
+                produccion_clinker_t DOUBLE PRECISION,
+                intensidad_termica_gj_t DOUBLE PRECISION,
+                co2_clinker_kg_t DOUBLE PRECISION,
+                volumen_concreto_m3 DOUBLE PRECISION,
+                co2_concreto_kg_m3 DOUBLE PRECISION,
+                updated_at TIMESTAMP DEFAULT NOW() NOT NULL,
+                CONSTRAINT uq_agregados_historicos_planta_ciclo UNIQUE (planta_id, tipo_proceso, ciclo)
+            )
+        """))
+
+        # Índices: plantas del país en un ciclo (atípicos) y por empresa
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_agregados_historicos_pais_ciclo
+            ON agregados_historicos(pais, tipo_proceso, ciclo)
+        """))
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_agregados_historicos_empresa
+            ON agregados_historicos(empresa_id, ciclo)
+        """))
+
+        print("Calculando indicadores de submissions aprobados...")
+
+        # Esquemas con tablas de datos: public y los esquemas por país
+        esquemas = conn.execute(text("""
+            SELECT table_schema FROM information_schema.tables
+            WHERE table_name = 'datos_cemento'
+            ORDER BY table_schema = 'public' DESC, table_schema
+        """)).scalars().all()
+
+        # Si una planta tiene más de un submission aprobado en el ciclo, se usa
+        # el último aprobado. Las filas ya registradas no se modifican.
+        for esquema in esquemas:
+            conn.execute(text(f'SET LOCAL search_path TO "{esquema}", public'))
+            result = conn.execute(text(f"""
+                WITH indicadores AS ({sql_indicadores("TRUE")})
+                INSERT INTO agregados_historicos (
+                    pais, tipo_proceso, ciclo, empresa_id, planta_id, proceso_id, submission_id,
+                    produccion_cemento_t, factor_clinker, co2_cemento_kg_t,
+                    produccion_clinker_t, intensidad_termica_gj_t, co2_clinker_kg_t,
+                    volumen_concreto_m3, co2_concreto_kg_m3, updated_at
+                )
+                SELECT DISTINCT ON (i.planta_id, p.tipo, p.ciclo)
+                       e.pais, p.tipo, p.ciclo, s.empresa_id, i.planta_id, s.proceso_id, s.id,
+                       i.produccion_cemento_t, i.factor_clinker, i.co2_cemento_kg_t,
+                       i.produccion_clinker_t, i.intensidad_termica_gj_t, i.co2_clinker_kg_t,
+                       i.volumen_concreto_m3, i.co2_concreto_kg_m3, now()
+                FROM indicadores i
+                JOIN submissions s ON s.id = i.submission_id
+                JOIN empresas e ON e.id = s.empresa_id
+                JOIN procesos_mrv p ON p.id = s.proceso_id
+                WHERE s.estado_actual IN ('APROBADO_FICEM', 'PUBLICADO', 'ARCHIVADO')
+                AND p.ciclo IS NOT NULL
+                ORDER BY i.planta_id, p.tipo, p.ciclo, s.approved_at DESC NULLS LAST
+                ON CONFLICT (planta_id, tipo_proceso, ciclo) DO NOTHING
+            """))
+            print(f"  - {esquema}: {result.rowcount} plantas registradas")
+
+        conn.commit()
+
+        print("✅ Migración completada exitosamente")
+        print("\nTablas creadas:")
+        print("  - agregados_historicos (con 2 índices y restricción única por planta/ciclo)")
+
+
+def rollback():
+    """Revertir migración (usar con precaución)"""
+    print("⚠️  ADVERTENCIA: Esta operación eliminará la tabla agregados_historicos")
+    print("   Se puede reconstruir ejecutando la migración nuevamente.")
+    confirmacion = input("Escriba 'CONFIRMAR' para continuar: ")
+
+    if confirmacion != "CONFIRMAR":
+        print("Operación cancelada")
+        return
+
+    with engine.connect() as conn:
+        print("Eliminando tabla agregados_historicos...")
+
+        conn.execute(text("DROP TABLE IF EXISTS agregados_historicos"))
+        conn.commit()
+
+        print("✅ Rollback completado")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Migración del índice histórico de indicadores')
+    parser.add_argument('--rollback', action='store_true', help='Revertir migración')
+
+    args = parser.parse_args()
+
+    if args.rollback:
+        rollback()
+    else:
+        migrate()
@@ -0,0 +1,183 @@
+"""
+Migración: Tablas tipadas por hoja para los datos extraídos del Excel
+Fecha: 2026-10-19
+Descripción: Crea datos_cemento, datos_concreto y datos_clinker con índices
+por submission, proceso/empresa y planta; copia las filas guardadas en
+submissions.datos_extraidos y deja en ese JSONB solo el resumen por hoja.
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from database.connection import engine
+
+
+# hoja → columnas tipadas (nombre, tipo SQL)
+HOJAS = {
+    "cemento": [
+        ("mes", "INTEGER"), ("tipo", "VARCHAR(50)"), ("produccion_t", "DOUBLE PRECISION"),
+        ("factor_clinker", "DOUBLE PRECISION"), ("resistencia_mpa", "DOUBLE PRECISION"),
+        ("co2_kg_t", "DOUBLE PRECISION"),
+    ],
+    "concreto": [
+        ("mes", "INTEGER"), ("resistencia_mpa", "DOUBLE PRECISION"), ("volumen_m3", "DOUBLE PRECISION"),
+        ("cemento_kg_m3", "DOUBLE PRECISION"), ("co2_kg_m3", "DOUBLE PRECISION"),
+    ],
+    "clinker": [
+        ("mes", "INTEGER"), ("produccion_t", "DOUBLE PRECISION"), ("combustible_gj", "DOUBLE PRECISION"),
+        ("co2_kg_t", "DOUBLE PRECISION"),
+    ],
+}
+
+
+def migrate():
+    """Ejecutar migración"""
+
+    with engine.connect() as conn:
+        for hoja, columnas in HOJAS.items():
+            tabla = f"datos_{hoja}"
+            print(f"Creando tabla {tabla}...")
+
+            definiciones = ",\n".join(f"                {nombre} {tipo}" for nombre, tipo in columnas)
+            conn.execute(text(f"""
+                CREATE TABLE IF NOT EXISTS {tabla} (
+                    id BIGSERIAL PRIMARY KEY,
+                    submission_id UUID NOT NULL REFERENCES submissions(id) ON DELETE CASCADE,
+                    proceso_id VARCHAR(100) NOT NULL,
+                    empresa_id INTEGER NOT NULL,
+                    planta_id INTEGER NOT NULL REFERENCES plantas(id) ON DELETE CASCADE,
+                    fila INTEGER NOT NULL,
+{definiciones}
+                )
+            """))
+
+            # Índices: paginación por submission, analítica por proceso/empresa y por planta
+            conn.execute(text(f"""
+                CREATE INDEX IF NOT EXISTS idx_{tabla}_submission
+                ON {tabla}(submission_id, id)
+            """))
+            conn.execute(text(f"""
+                CREATE INDEX IF NOT EXISTS idx_{tabla}_proceso_empresa
+                ON {tabla}(proceso_id, empresa_id)
+            """))
+            conn.execute(text(f"""
+                CREATE INDEX IF NOT EXISTS idx_{tabla}_planta
+                ON {tabla}(planta_id)
+            """))
+
+            print(f"  Migrando filas de datos_extraidos->'{hoja}'...")
+
+            # Solo submissions sin filas en la tabla, para que la migración sea idempotente.
+            # Filas sin planta válida (ni en la fila ni en el submission) se omiten.
+            nombres = ", ".join(nombre for nombre, _ in columnas)
+            conversiones = ", ".join(
+                f"NULLIF(r.fila->>'{nombre}', '')::{tipo}" for nombre, tipo in columnas
+            )
+            result = conn.execute(text(f"""
+                INSERT INTO {tabla} (submission_id, proceso_id, empresa_id, planta_id, fila, {nombres})
+                SELECT s.id, s.proceso_id, s.empresa_id, p.id, r.posicion, {conversiones}
+                FROM submissions s
+                CROSS JOIN LATERAL jsonb_array_elements(s.datos_extraidos -> '{hoja}')
+                    WITH ORDINALITY AS r(fila, posicion)
+                JOIN plantas p ON p.id = COALESCE(NULLIF(r.fila->>'planta_id', '')::integer, s.planta_id)
+                WHERE jsonb_typeof(s.datos_extraidos -> '{hoja}') = 'array'
+                AND NOT EXISTS (SELECT 1 FROM {tabla} d WHERE d.submission_id = s.id)
+                ORDER BY s.id, r.posicion
+            """))
+            print(f"  - {result.rowcount} filas migradas")
+
+        print("Reemplazando datos_extraidos por el resumen por hoja...")
+
+        conteos = " UNION ALL ".join(
+            f"SELECT submission_id, '{hoja}' AS hoja, planta_id, COUNT(*) AS filas "
+            f"FROM datos_{hoja} GROUP BY submission_id, planta_id"
+            for hoja in HOJAS
+        )
+        result = conn.execute(text(f"""
+            UPDATE submissions s
+            SET datos_extraidos = r.resumen
+            FROM (
+                SELECT submission_id,
+                       jsonb_object_agg(hoja, jsonb_build_object('filas', filas, 'por_planta', por_planta)) AS resumen
+                FROM (
+                    SELECT submission_id, hoja, SUM(filas)::integer AS filas,
+                           jsonb_object_agg(planta_id::text, filas) AS por_planta
+                    FROM ({conteos}) c
+                    GROUP BY submission_id, hoja
+                ) h
+                GROUP BY submission_id
+            ) r
+            WHERE r.submission_id = s.id
+            AND EXISTS (
+                SELECT 1
+                FROM jsonb_each(
+                    CASE WHEN jsonb_typeof(s.datos_extraidos) = 'object' THEN s.datos_extraidos ELSE '{{}}'::jsonb END
+                ) e
+                WHERE jsonb_typeof(e.value) = 'array'
+            )
+        """))
+        print(f"  - {result.rowcount} submissions resumidos")
+
+        conn.commit()
+
+        print("✅ Migración completada exitosamente")
+        print("\nTablas creadas:")
+        for hoja in HOJAS:
+            print(f"  - datos_{hoja} (con 3 índices)")
+
+
+def rollback():
+    """Revertir migración (usar con precaución)"""
+    print("⚠️  ADVERTENCIA: Esta operación eliminará las tablas datos_cemento, datos_concreto y datos_clinker")
+    print("   Las filas se copian de vuelta a submissions.datos_extraidos antes de eliminarlas.")
+    confirmacion = input("Escriba 'CONFIRMAR' para continuar: ")
+
+    if confirmacion != "CONFIRMAR":
+        print("Operación cancelada")
+        return
+
+    with engine.connect() as conn:
+        print("Restaurando filas en datos_extraidos...")
+
+        for hoja, columnas in HOJAS.items():
+            campos = ", ".join(f"'{nombre}', d.{nombre}" for nombre, _ in columnas)
+            conn.execute(text(f"""
+                UPDATE submissions s
+                SET datos_extraidos = COALESCE(
+                    CASE WHEN jsonb_typeof(s.datos_extraidos) = 'object' THEN s.datos_extraidos END,
+                    '{{}}'::jsonb
+                ) || jsonb_build_object('{hoja}', r.filas)
+                FROM (
+                    SELECT d.submission_id,
+                           jsonb_agg(jsonb_build_object('planta_id', d.planta_id, {campos}) ORDER BY d.id) AS filas
+                    FROM datos_{hoja} d
+                    GROUP BY d.submission_id
+                ) r
+                WHERE r.submission_id = s.id
+            """))
+
+        print("Eliminando tablas...")
+
+        for hoja in HOJAS:
+            conn.execute(text(f"DROP TABLE IF EXISTS datos_{hoja}"))
+
+        conn.commit()
+
+        print("✅ Rollback completado")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Migración de datos extraídos a tablas por hoja')
+    parser.add_argument('--rollback', action='store_true', help='Revertir migración')
+
+    args = parser.parse_args()
+
+    if args.rollback:
+        rollback()
+    else:
+        migrate()
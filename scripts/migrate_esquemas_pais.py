@@ -0,0 +1,109 @@
+"""
+Migración: Esquemas de datos por país
+Fecha: 2026-10-19
+Descripción: Para cada esquema declarado en procesos_mrv.config->>'esquema_bd'
+(ej: peru_data) crea el esquema con sus propias datos_cemento, datos_concreto
+y datos_clinker (mismas columnas e índices que en public) y mueve allí las
+filas de los procesos que lo usan. Cada país queda con tablas e índices
+propios, que se vacían y reindexan por separado.
+
+Las sesiones de la API eligen el esquema del proceso con search_path
+(api/services/esquemas_service.py); las tablas que no existen en el esquema
+se siguen resolviendo en public.
+
+Cambiar esquema_bd desde la API (PUT /procesos/{id}) ya mueve las filas del
+proceso; esta migración sirve para la carga inicial y es idempotente.
+"""
+import sys
+import os
+import re
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from database.connection import engine
+from api.services.esquemas_service import TABLAS_DATOS as TABLAS, crear_tablas_esquema, mover_filas
+PATRON_ESQUEMA = re.compile(r"^[a-z_][a-z0-9_]{0,62}$")
+
+
+def esquemas_configurados(conn) -> dict:
+    """esquema → procesos que lo declaran"""
+    esquemas = {}
+    filas = conn.execute(text("""
+        SELECT id, config->>'esquema_bd' AS esquema
+        FROM procesos_mrv
+        WHERE config->>'esquema_bd' IS NOT NULL
+    """))
+    for proceso_id, esquema in filas:
+        if not PATRON_ESQUEMA.match(esquema):
+            print(f"  ⚠️  Esquema inválido en {proceso_id}: {esquema!r} (omitido)")
+            continue
+        esquemas.setdefault(esquema, []).append(proceso_id)
+    return esquemas
+
+
+def migrate():
+    """Ejecutar migración"""
+
+    with engine.connect() as conn:
+        esquemas = esquemas_configurados(conn)
+        if not esquemas:
+            print("Ningún proceso declara esquema_bd")
+            return
+
+        for esquema, procesos in esquemas.items():
+            print(f"Esquema {esquema} ({len(procesos)} procesos)...")
+            crear_tablas_esquema(conn, esquema)
+            for tabla, filas in mover_filas(conn, procesos, "public", esquema).items():
+                print(f"  - {tabla}: {filas} filas movidas")
+
+            conn.execute(text(f"ANALYZE {', '.join(f'{esquema}.{t}' for t in TABLAS)}"))
+
+        conn.commit()
+
+        print("✅ Migración completada exitosamente")
+        print("\nEsquemas:")
+        for esquema in esquemas:
+            print(f"  - {esquema} ({', '.join(TABLAS)})")
+
+
+def rollback():
+    """Revertir migración (usar con precaución)"""
+    print("⚠️  ADVERTENCIA: Esta operación devolverá las filas a public y eliminará los esquemas por país")
+    confirmacion = input("Escriba 'CONFIRMAR' para continuar: ")
+
+    if confirmacion != "CONFIRMAR":
+        print("Operación cancelada")
+        return
+
+    with engine.connect() as conn:
+        for esquema in esquemas_configurados(conn):
+            existe = conn.execute(
+                text("SELECT 1 FROM information_schema.schemata WHERE schema_name = :esquema"), {"esquema": esquema}
+            ).scalar()
+            if not existe:
+                continue
+
+            print(f"Devolviendo filas de {esquema}...")
+            for tabla in TABLAS:
+                conn.execute(text(f"INSERT INTO public.{tabla} SELECT * FROM {esquema}.{tabla}"))
+            conn.execute(text(f"DROP SCHEMA {esquema} CASCADE"))
+
+        conn.commit()
+
+        print("✅ Rollback completado")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Migración de esquemas de datos por país')
+    parser.add_argument('--rollback', action='store_true', help='Revertir migración')
+
+    args = parser.parse_args()
+
+    if args.rollback:
+        rollback()
+    else:
+        migrate()
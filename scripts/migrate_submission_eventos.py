@@ -0,0 +1,161 @@
+"""
+Migración: Crear tabla submission_eventos y resumen de duración por estado
+Fecha: 2026-10-19
+Descripción: Log normalizado de transiciones de estado (antes solo en
+workflow_history JSONB) con índices y vista materializada de SLA por estado.
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from database.connection import engine
+
+
+def migrate():
+    """Ejecutar migración"""
+
+    with engine.connect() as conn:
+        print("Creando tabla submission_eventos...")
+
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS submission_eventos (
+                id BIGSERIAL PRIMARY KEY,
+                submission_id UUID NOT NULL REFERENCES submissions(id) ON DELETE CASCADE,
+                estado estadosubmission NOT NULL,
+                fecha TIMESTAMP DEFAULT NOW() NOT NULL,
+                user_id INTEGER REFERENCES usuarios(id)
+            )
+        """))
+
+        # Índices para submission_eventos
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_submission_eventos_submission_fecha
+            ON submission_eventos(submission_id, fecha)
+        """))
+
+        conn.execute(text("""
+            CREATE INDEX IF NOT EXISTS idx_submission_eventos_estado_fecha
+            ON submission_eventos(estado, fecha)
+        """))
+
+        print("Migrando historial existente desde workflow_history...")
+
+        # Solo submissions sin eventos, para que la migración sea idempotente
+        result = conn.execute(text("""
+            INSERT INTO submission_eventos (submission_id, estado, fecha, user_id)
+            SELECT s.id,
+                   upper(h->>'estado')::estadosubmission,
+                   (h->>'fecha')::timestamp,
+                   NULLIF(h->>'user_id', '')::integer
+            FROM submissions s
+            CROSS JOIN LATERAL jsonb_array_elements(s.workflow_history) AS h
+            WHERE NOT EXISTS (
+                SELECT 1 FROM submission_eventos e WHERE e.submission_id = s.id
+            )
+            AND upper(h->>'estado') IN (
+                SELECT unnest(enum_range(NULL::estadosubmission))::text
+            )
+            AND h->>'fecha' IS NOT NULL
+        """))
+        print(f"  - {result.rowcount} eventos migrados")
+
+        print("Creando vista materializada mv_duracion_estados...")
+
+        # Un tramo = permanencia en un estado, desde su evento hasta el siguiente
+        conn.execute(text("""
+            CREATE MATERIALIZED VIEW IF NOT EXISTS mv_duracion_estados AS
+            WITH tramos AS (
+                SELECT
+                    s.proceso_id,
+                    emp.pais,
+                    e.estado,
+                    e.fecha AS fecha_inicio,
+                    LEAD(e.fecha) OVER (PARTITION BY e.submission_id ORDER BY e.fecha, e.id) AS fecha_fin
+                FROM submission_eventos e
+                JOIN submissions s ON s.id = e.submission_id
+                JOIN empresas emp ON emp.id = s.empresa_id
+            ),
+            duraciones AS (
+                SELECT
+                    proceso_id,
+                    pais,
+                    estado,
+                    fecha_fin IS NULL AS vigente,
+                    EXTRACT(EPOCH FROM (COALESCE(fecha_fin, NOW() AT TIME ZONE 'UTC') - fecha_inicio)) / 86400.0 AS dias
+                FROM tramos
+            )
+            SELECT
+                proceso_id,
+                pais,
+                estado,
+                COUNT(*) FILTER (WHERE NOT vigente) AS tramos_cerrados,
+                COUNT(*) FILTER (WHERE vigente) AS en_curso,
+                ROUND(AVG(dias) FILTER (WHERE NOT vigente)::numeric, 2)::float AS dias_promedio,
+                ROUND((percentile_cont(0.5) WITHIN GROUP (ORDER BY dias) FILTER (WHERE NOT vigente))::numeric, 2)::float AS dias_p50,
+                ROUND((percentile_cont(0.9) WITHIN GROUP (ORDER BY dias) FILTER (WHERE NOT vigente))::numeric, 2)::float AS dias_p90,
+                ROUND(MAX(dias) FILTER (WHERE vigente)::numeric, 2)::float AS dias_max_en_curso
+            FROM duraciones
+            GROUP BY proceso_id, pais, estado
+        """))
+
+        # Índice único requerido por REFRESH ... CONCURRENTLY
+        conn.execute(text("""
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_duracion_estados
+            ON mv_duracion_estados(proceso_id, pais, estado)
+        """))
+
+        conn.commit()
+
+        print("✅ Migración completada exitosamente")
+        print("\nObjetos creados:")
+        print("  - submission_eventos (con 2 índices)")
+        print("  - mv_duracion_estados (refrescar con --refresh)")
+
+
+def refresh():
+    """Refrescar el resumen de duración por estado (programar vía cron)"""
+    with engine.connect() as conn:
+        print("Refrescando mv_duracion_estados...")
+        conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_duracion_estados"))
+        conn.commit()
+        print("✅ Vista refrescada")
+
+
+def rollback():
+    """Revertir migración (usar con precaución)"""
+    print("⚠️  ADVERTENCIA: Esta operación eliminará submission_eventos y mv_duracion_estados")
+    confirmacion = input("Escriba 'CONFIRMAR' para continuar: ")
+
+    if confirmacion != "CONFIRMAR":
+        print("Operación cancelada")
+        return
+
+    with engine.connect() as conn:
+        print("Eliminando objetos...")
+
+        conn.execute(text("DROP MATERIALIZED VIEW IF EXISTS mv_duracion_estados"))
+        conn.execute(text("DROP TABLE IF EXISTS submission_eventos CASCADE"))
+
+        conn.commit()
+
+        print("✅ Rollback completado")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Migración de log de eventos de submissions')
+    parser.add_argument('--rollback', action='store_true', help='Revertir migración')
+    parser.add_argument('--refresh', action='store_true', help='Refrescar vista de duración por estado')
+
+    args = parser.parse_args()
+
+    if args.rollback:
+        rollback()
+    elif args.refresh:
+        refresh()
+    else:
+        migrate()
@@ -0,0 +1,61 @@
+"""
+Migración: Agregar columna version a submissions
+Fecha: 2026-10-19
+Descripción: Control de concurrencia optimista en transiciones de estado.
+Cada UPDATE sobre submissions se condiciona a la versión leída
+(UPDATE ... WHERE id = ? AND version = ?).
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from database.connection import engine
+
+
+def migrate():
+    """Ejecutar migración"""
+
+    with engine.connect() as conn:
+        print("Agregando columna version a submissions...")
+
+        conn.execute(text("""
+            ALTER TABLE submissions
+            ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1
+        """))
+
+        conn.commit()
+
+        print("✅ Migración completada exitosamente")
+
+
+def rollback():
+    """Revertir migración (usar con precaución)"""
+    print("⚠️  ADVERTENCIA: Esta operación eliminará la columna submissions.version")
+    confirmacion = input("Escriba 'CONFIRMAR' para continuar: ")
+
+    if confirmacion != "CONFIRMAR":
+        print("Operación cancelada")
+        return
+
+    with engine.connect() as conn:
+        conn.execute(text("ALTER TABLE submissions DROP COLUMN IF EXISTS version"))
+        conn.commit()
+
+        print("✅ Rollback completado")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Migración de control de concurrencia en submissions')
+    parser.add_argument('--rollback', action='store_true', help='Revertir migración')
+
+    args = parser.parse_args()
+
+    if args.rollback:
+        rollback()
+    else:
+        migrate()
@@ -0,0 +1,51 @@
+"""
+Migración: Índice compuesto (empresa_id, estado_actual) en submissions
+Fecha: 2026-10-19
+Descripción: Soporta la bandeja de tareas pendientes (/auth/mis-tareas) y los
+listados filtrados por empresa y estado con un solo index scan.
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from database.connection import engine
+
+
+def migrate():
+    """Ejecutar migración"""
+
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        print("Creando índice idx_submissions_empresa_estado...")
+
+        conn.execute(text("""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_submissions_empresa_estado
+            ON submissions(empresa_id, estado_actual)
+        """))
+
+        print("✅ Migración completada exitosamente")
+
+
+def rollback():
+    """Revertir migración"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS idx_submissions_empresa_estado"))
+
+        print("✅ Rollback completado")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Migración de índice compuesto en submissions')
+    parser.add_argument('--rollback', action='store_true', help='Revertir migración')
+
+    args = parser.parse_args()
+
+    if args.rollback:
+        rollback()
+    else:
+        migrate()
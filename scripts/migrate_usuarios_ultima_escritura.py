@@ -0,0 +1,61 @@
+"""
+Migración: Agregar columna ultima_escritura a usuarios
+Fecha: 2026-10-19
+Descripción: Lectura de los propios cambios con réplica de lectura. Guarda la
+hora (UTC) de la última request del usuario que modificó datos; mientras no
+pasen REPLICA_STICKY_SECONDS, sus lecturas van al primario.
+"""
+import sys
+import os
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import text
+from database.connection import engine
+
+
+def migrate():
+    """Ejecutar migración"""
+
+    with engine.connect() as conn:
+        print("Agregando columna ultima_escritura a usuarios...")
+
+        conn.execute(text("""
+            ALTER TABLE usuarios
+            ADD COLUMN IF NOT EXISTS ultima_escritura TIMESTAMP
+        """))
+
+        conn.commit()
+
+        print("✅ Migración completada exitosamente")
+
+
+def rollback():
+    """Revertir migración (usar con precaución)"""
+    print("⚠️  ADVERTENCIA: Esta operación eliminará la columna usuarios.ultima_escritura")
+    confirmacion = input("Escriba 'CONFIRMAR' para continuar: ")
+
+    if confirmacion != "CONFIRMAR":
+        print("Operación cancelada")
+        return
+
+    with engine.connect() as conn:
+        conn.execute(text("ALTER TABLE usuarios DROP COLUMN IF EXISTS ultima_escritura"))
+        conn.commit()
+
+        print("✅ Rollback completado")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Migración de lectura de los propios cambios')
+    parser.add_argument('--rollback', action='store_true', help='Revertir migración')
+
+    args = parser.parse_args()
+
+    if args.rollback:
+        rollback()
+    else:
+        migrate()
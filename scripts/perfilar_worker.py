@@ -0,0 +1,106 @@
+"""
+Perfilar un worker de la API en ejecución o un script local
+
+Uso:
+    # Worker remoto (usa el endpoint /api/v1/admin/perfilador, requiere ROOT)
+    python scripts/perfilar_worker.py --segundos 30 --salida perfil.txt
+
+    # Script local, perfilado en el mismo proceso
+    python scripts/perfilar_worker.py --ejecutar scripts/mi_calculo.py -- --arg1 valor
+
+El resultado está en formato collapsed stacks:
+    flamegraph.pl perfil.txt > perfil.svg   (o abrirlo en https://speedscope.app)
+
+Las credenciales para el modo remoto se leen de ADMIN_EMAIL / ADMIN_PASSWORD,
+o se pasa un token con --token.
+"""
+import sys
+import os
+import json
+import runpy
+import urllib.parse
+import urllib.request
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from services.perfilador import perfilar_bloque
+
+
+def _login(api_url: str, email: str, password: str) -> str:
+    """Obtener un token JWT"""
+    request = urllib.request.Request(
+        f"{api_url}/api/v1/auth/login",
+        data=json.dumps({"email": email, "password": password}).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    with urllib.request.urlopen(request) as respuesta:
+        return json.load(respuesta)["access_token"]
+
+
+def perfilar_remoto(args) -> str:
+    """Perfilar el worker que atienda la request"""
+    token = args.token
+    if not token:
+        password = os.getenv("ADMIN_PASSWORD", "")
+        if not password:
+            print("❌ Defina ADMIN_PASSWORD o use --token")
+            sys.exit(1)
+        token = _login(args.url, os.getenv("ADMIN_EMAIL", "admin@ficem.org"), password)
+
+    parametros = urllib.parse.urlencode({
+        "segundos": args.segundos,
+        "intervalo_ms": args.intervalo_ms,
+        "incluir_inactivos": str(args.incluir_inactivos).lower()
+    })
+    request = urllib.request.Request(
+        f"{args.url}/api/v1/admin/perfilador?{parametros}",
+        headers={"Authorization": f"Bearer {token}"},
+        method="POST"
+    )
+
+    print(f"Perfilando worker en {args.url} durante {args.segundos}s...")
+    with urllib.request.urlopen(request, timeout=args.segundos + 30) as respuesta:
+        print(f"  - {respuesta.headers.get('X-Profile-Samples')} muestras")
+        return respuesta.read().decode()
+
+
+def perfilar_local(args) -> str:
+    """Ejecutar un script bajo el perfilador"""
+    sys.argv = [args.ejecutar] + args.argumentos
+    print(f"Perfilando {args.ejecutar}...")
+
+    with perfilar_bloque(intervalo=args.intervalo_ms / 1000) as perfil:
+        try:
+            runpy.run_path(args.ejecutar, run_name="__main__")
+        except SystemExit:
+            pass
+
+    print(f"  - {perfil.total_muestras} muestras en {perfil.duracion:.1f}s")
+    return perfil.colapsado()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Perfilador por muestreo (collapsed stacks)')
+    parser.add_argument('--url', default=os.getenv("API_URL", "http://localhost:8000"), help='URL de la API')
+    parser.add_argument('--token', help='Token JWT de un usuario ROOT')
+    parser.add_argument('--segundos', type=float, default=10, help='Duración del muestreo remoto')
+    parser.add_argument('--intervalo-ms', type=float, default=5, help='Intervalo entre muestras')
+    parser.add_argument('--incluir-inactivos', action='store_true', help='Incluir hilos en espera')
+    parser.add_argument('--ejecutar', help='Script local a perfilar en lugar de un worker remoto')
+    parser.add_argument('--salida', default='perfil.txt', help='Archivo de salida')
+    parser.add_argument('argumentos', nargs='*', help='Argumentos para el script local (después de --)')
+
+    args = parser.parse_args()
+
+    perfil = perfilar_local(args) if args.ejecutar else perfilar_remoto(args)
+
+    Path(args.salida).write_text(perfil)
+    print(f"✅ Perfil guardado en {args.salida}")
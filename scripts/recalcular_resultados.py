@@ -0,0 +1,68 @@
+"""
+Recalcular resultados de submissions aprobados tras actualizar factores de emisión
+
+Solo se procesan los submissions cuya huella de insumos cambió y, dentro de
+cada uno, solo las plantas afectadas. Actualizar factores de un país solo
+recalcula ese país.
+
+Uso:
+    python scripts/recalcular_resultados.py                # todos los países
+    python scripts/recalcular_resultados.py --pais Perú
+    python scripts/recalcular_resultados.py --forzar       # ignorar huellas
+"""
+import sys
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Cargar variables de entorno
+load_dotenv()
+
+# Agregar el directorio raíz al path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from database.connection import SessionLocal
+from database.models import Submission, Empresa
+from api.services.calculos_service import ESTADOS_CALCULADOS, ejecutar_calculos, submissions_por_recalcular
+from api.services.esquemas_service import usar_esquema_proceso
+
+
+def recalcular(pais: str = None, forzar: bool = False):
+    """Recalcular y confirmar submission por submission"""
+    db = SessionLocal()
+    inicio = time.perf_counter()
+
+    try:
+        if forzar:
+            consulta = db.query(Submission.id).join(Empresa, Empresa.id == Submission.empresa_id).filter(
+                Submission.estado_actual.in_(ESTADOS_CALCULADOS)
+            )
+            if pais:
+                consulta = consulta.filter(Empresa.pais == pais)
+            pendientes = [s.id for s in consulta]
+        else:
+            pendientes = submissions_por_recalcular(db, pais)
+
+        print(f"Submissions por recalcular: {len(pendientes)}")
+
+        plantas = 0
+        for submission_id in pendientes:
+            submission = db.query(Submission).filter(Submission.id == submission_id).first()
+            usar_esquema_proceso(db, submission.proceso_id)
+            plantas += ejecutar_calculos(db, submission, submission.empresa.pais, forzar)
+            db.commit()
+
+        print(f"✅ {len(pendientes)} submissions y {plantas} plantas recalculadas en {time.perf_counter() - inicio:.1f} s")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Recalcular resultados con huella desactualizada')
+    parser.add_argument('--pais', help='Solo submissions de empresas de este país')
+    parser.add_argument('--forzar', action='store_true', help='Recalcular todo aunque la huella coincida')
+
+    args = parser.parse_args()
+    recalcular(args.pais, args.forzar)
@@ -0,0 +1,174 @@
+"""
+Perfilador por muestreo en proceso (solo biblioteca estándar)
+
+Toma muestras periódicas de las pilas de todos los hilos con
+sys._current_frames() y las agrega en formato "collapsed stacks"
+(una línea `marco;marco;marco conteo`), compatible con flamegraph.pl,
+speedscope e inferno.
+
+No instala hooks de trazado (sys.setprofile/settrace): mientras no hay una
+sesión activa no tiene ningún costo, y durante la sesión el costo es el de un
+hilo que despierta cada `intervalo` segundos.
+
+Solo ve los hilos del proceso: la lectura de Excel que corre en el pool de
+procesos (excel/procesamiento.py) no aparece; el hilo de la request se ve
+esperando el resultado. Para perfilar la lectura, ejecutar el worker o el
+script con EXCEL_WORKERS=0 (se lee en un thread del mismo proceso).
+"""
+import concurrent.futures.thread
+import os
+import queue
+import selectors
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Iterable, Optional
+
+# Marcos hoja de hilos esperando trabajo (pools de threads, event loop, colas,
+# conexiones entrantes). Se comparan por objeto de código, no por nombre: un
+# `get` o `wait` de la aplicación con el mismo nombre sigue contando.
+_CODIGOS_INACTIVOS = {
+    threading.Condition.wait.__code__,
+    threading.Thread._wait_for_tstate_lock.__code__,
+    queue.Queue.get.__code__,
+    concurrent.futures.thread._worker.__code__,
+    socket.socket.accept.__code__,
+} | {
+    clase.select.__code__
+    for clase in vars(selectors).values()
+    if isinstance(clase, type) and issubclass(clase, selectors.BaseSelector)
+    and isinstance(vars(clase).get("select"), type(lambda: None))
+}
+
+_sesion_activa = threading.Lock()
+
+
+class PerfiladorOcupado(RuntimeError):
+    """Ya hay una sesión de perfilado en curso en este proceso"""
+
+
+def _nombre_marco(frame) -> str:
+    codigo = frame.f_code
+    modulo = frame.f_globals.get("__name__") or os.path.basename(codigo.co_filename)
+    return f"{modulo}:{codigo.co_name}"
+
+
+def _pila(frame) -> list:
+    """Marcos desde la raíz hasta la hoja"""
+    marcos = []
+    while frame is not None:
+        marcos.append(_nombre_marco(frame))
+        frame = frame.f_back
+    marcos.reverse()
+    return marcos
+
+
+class PerfiladorMuestreo:
+    """
+    Sesión de muestreo sobre los hilos del proceso.
+
+    Args:
+        intervalo: Segundos entre muestras
+        incluir_inactivos: Incluir hilos esperando trabajo (pools, event loop, colas)
+        hilos: Identificadores de hilo a muestrear (None = todos salvo el muestreador)
+    """
+
+    def __init__(self, intervalo: float = 0.005, incluir_inactivos: bool = False,
+                 hilos: Optional[Iterable[int]] = None):
+        self.intervalo = intervalo
+        self.incluir_inactivos = incluir_inactivos
+        self.hilos = set(hilos) if hilos is not None else None
+        self.muestras = Counter()
+        self.total_muestras = 0
+        self.duracion = 0.0
+
+    def _muestrear(self, propio: int) -> None:
+        nombres = {hilo.ident: hilo.name for hilo in threading.enumerate()}
+
+        for ident, frame in sys._current_frames().items():
+            if ident == propio or (self.hilos is not None and ident not in self.hilos):
+                continue
+            if not self.incluir_inactivos and frame.f_code in _CODIGOS_INACTIVOS:
+                continue
+
+            pila = [nombres.get(ident, f"hilo-{ident}")] + _pila(frame)
+            self.muestras[";".join(pila)] += 1
+
+        self.total_muestras += 1
+
+    def ejecutar(self, segundos: float, detener: Optional[threading.Event] = None) -> "PerfiladorMuestreo":
+        """
+        Muestrea durante `segundos` bloqueando el hilo que llama (que se excluye).
+
+        Raises:
+            PerfiladorOcupado: Si ya hay otra sesión en curso
+        """
+        if not _sesion_activa.acquire(blocking=False):
+            raise PerfiladorOcupado("Ya hay una sesión de perfilado en curso")
+
+        try:
+            propio = threading.get_ident()
+            inicio = time.perf_counter()
+            fin = inicio + segundos
+            detener = detener or threading.Event()
+
+            while not detener.is_set():
+                ahora = time.perf_counter()
+                if ahora >= fin:
+                    break
+                self._muestrear(propio)
+                detener.wait(min(self.intervalo, max(fin - ahora, 0)))
+
+            self.duracion = time.perf_counter() - inicio
+        finally:
+            _sesion_activa.release()
+
+        return self
+
+    def colapsado(self) -> str:
+        """Perfil en formato collapsed stacks, ordenado por cantidad de muestras"""
+        return "".join(f"{pila} {conteo}\n" for pila, conteo in self.muestras.most_common())
+
+
+def perfilar(segundos: float, intervalo: float = 0.005, incluir_inactivos: bool = False) -> PerfiladorMuestreo:
+    """Muestrea todos los hilos del proceso durante `segundos`"""
+    return PerfiladorMuestreo(intervalo, incluir_inactivos).ejecutar(segundos)
+
+
+class perfilar_bloque:
+    """
+    Context manager que perfila el hilo actual mientras se ejecuta el bloque.
+
+    Uso:
+        with perfilar_bloque() as perfil:
+            clasificar_en_bandas(rest, huella, df_bandas)
+        open("perfil.txt", "w").write(perfil.colapsado())
+    """
+
+    def __init__(self, intervalo: float = 0.001, limite_segundos: float = 3600):
+        self.perfilador = PerfiladorMuestreo(intervalo, incluir_inactivos=True)
+        self.limite_segundos = limite_segundos
+        self._detener = threading.Event()
+        self._hilo = None
+        self._error = None
+
+    def _ejecutar(self):
+        try:
+            self.perfilador.ejecutar(self.limite_segundos, self._detener)
+        except PerfiladorOcupado as e:
+            self._error = e
+
+    def __enter__(self) -> PerfiladorMuestreo:
+        self.perfilador.hilos = {threading.get_ident()}
+        self._hilo = threading.Thread(target=self._ejecutar, name="perfilador", daemon=True)
+        self._hilo.start()
+        return self.perfilador
+
+    def __exit__(self, tipo, valor, traza):
+        self._detener.set()
+        self._hilo.join()
+        if self._error is not None and tipo is None:
+            raise self._error
+        return False